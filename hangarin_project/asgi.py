@@ -9,8 +9,29 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+
+from hangarin_project.static import StaticFilesASGI
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hangarin_project.settings')
 
-application = get_asgi_application()
+
+class AsyncViewsASGIHandler(ASGIHandler):
+    """Resolve requests with ASYNC_ROOT_URLCONF, which serves the async views"""
+
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None:
+            request.urlconf = settings.ASYNC_ROOT_URLCONF
+        return request, error_response
+
+
+def get_asgi_application():
+    django.setup(set_prefix=False)
+    return AsyncViewsASGIHandler()
+
+
+# Serve STATIC_URL (precompressed, with cache headers) before Django
+application = StaticFilesASGI(get_asgi_application())
@@ -0,0 +1,114 @@
+"""
+Primary/replica database routing.
+
+Everything reads from and writes to ``default`` unless a view opts in:
+views using ``ReplicaReadMixin`` (the list pages, the dashboard) run their
+GET requests inside ``replica_reads()``, and the export streams from
+``read_database(request)``. A client that just wrote something is pinned to
+the primary for ``REPLICA_MAX_LAG`` seconds by ``PrimaryPinMiddleware``, so
+it always sees its own change even though the replica is behind.
+
+Without a ``replica`` entry in ``settings.DATABASES`` all of this falls back
+to ``default``; nothing here depends on the replica being SQLite.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+REPLICA = 'replica'
+PRIMARY = 'default'
+
+PIN_COOKIE = 'primary_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def replica_available():
+    return REPLICA in settings.DATABASES
+
+
+def pinned_to_primary(request):
+    return PIN_COOKIE in request.COOKIES
+
+
+def read_database(request):
+    """Alias a read-only request may read from"""
+    if request.method in SAFE_METHODS and replica_available() and not pinned_to_primary(request):
+        return REPLICA
+    return PRIMARY
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Route the ORM reads inside the block to the replica, if there is one"""
+    token = _replica_reads.set(enabled and replica_available())
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """Writes go to the primary; reads too, except inside ``replica_reads()``"""
+
+    def db_for_read(self, model, **hints):
+        return REPLICA if _replica_reads.get() else PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return {obj1._state.db, obj2._state.db} <= {PRIMARY, REPLICA}
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is a copy of the primary, never migrated on its own
+        return db != REPLICA
+
+
+class PrimaryPinMiddleware:
+    """Pin a client to the primary for a while after each write it makes"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.pin(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.pin(request, await self.get_response(request))
+
+    def pin(self, request, response):
+        if request.method not in SAFE_METHODS and replica_available():
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_MAX_LAG, httponly=True, samesite='Lax',
+            )
+        return response
+
+
+class ReplicaReadMixin:
+    """
+    Serve a view's GET requests from the replica.
+
+    The response is rendered inside the block, so the queries a template
+    triggers lazily are routed to the replica as well. The session user is
+    loaded from the primary first: a fresh login is not on the replica yet.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        user = getattr(request, 'user', None)
+        if user is not None:
+            user.is_authenticated
+        with replica_reads(read_database(request) == REPLICA):
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+            return response
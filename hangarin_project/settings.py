@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
 import socket
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -66,15 +67,29 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'allauth.account.middleware.AccountMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'hangarin_project.routers.PrimaryPinMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'hangarin_project.urls'
 
+# URLconf of the ASGI entry point: the same routes, with the read-heavy
+# pages served by async views (see hangarin_project.urls_async)
+ASYNC_ROOT_URLCONF = 'hangarin_project.urls_async'
+
+# Threads the async views run their independent queries on, each with its
+# own database connection (see tasks.concurrency)
+ASYNC_QUERY_THREADS = 4
+
+# Files written by background jobs (exports), see tasks.jobs
+JOB_OUTPUT_DIR = BASE_DIR / 'job_output'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
+        # Without explicit loaders Django already wraps these in the cached
+        # loader, so templates are compiled once per process
         'APP_DIRS': True,
         'OPTIONS': {
             "context_processors": [
@@ -92,13 +107,78 @@ WSGI_APPLICATION = 'hangarin_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Run on every new SQLite connection. WAL lets readers carry on while a
+# request writes; the rest trades a little durability on power loss
+# (synchronous=NORMAL) and memory for fewer disk reads and syncs.
+# `python manage.py db_maintenance` keeps the database itself in shape.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,          # ms to wait for a lock before "database is locked"
+    'cache_size': -64000,          # KiB of page cache per connection
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            # Take the write lock when a transaction starts instead of on
+            # its first write, where a busy database cannot be waited for
+            'transaction_mode': 'IMMEDIATE',
+        },
+        # Keep connections open across requests instead of reopening the
+        # file (and rerunning the pragmas) every time
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Read replica for the list pages, the dashboard and exports (see
+# hangarin_project/routers.py). `python manage.py refresh_replica` creates
+# and refreshes this local copy with SQLite's backup API; in production point
+# DATABASES['replica'] at a real replica instead. Without it every query
+# goes to 'default'. Restart the app after the replica is first created.
+REPLICA_PATH = BASE_DIR / 'db.replica.sqlite3'
+# The test runner always gets one, mirroring the test database, so the
+# routing is exercised whether or not a local copy exists
+if REPLICA_PATH.exists() or sys.argv[1:2] == ['test']:
+    DATABASES['replica'] = {**DATABASES['default'], 'NAME': REPLICA_PATH, 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['hangarin_project.routers.PrimaryReplicaRouter']
+
+# Upper bound on how far the replica trails the primary, in seconds. A client
+# reads from the primary for this long after each write it makes, so it
+# always sees its own changes; refresh the replica at least this often.
+REPLICA_MAX_LAG = 60
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Dashboard and list pages are cached and invalidated through per-model
+# generation stamps (see tasks/cache.py). The stamps must be shared by every
+# process that writes or serves pages (web workers, the ASGI and WSGI entry
+# points, run_worker's job processes), so the default cache lives on disk;
+# a local-memory cache would only invalidate within one process.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+    },
+    # Rendered table rows of the list pages ({% cache %} in the list
+    # templates). Row keys change with the rows, so this only needs room for
+    # the rows people page through; the oldest are culled beyond that.
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'hangarin-rows',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -138,6 +218,14 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR / 'static'),
 ]
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# collectstatic writes content-hashed copies (style.1a2b3c4d5e6f.css) and a
+# manifest that {% static %} and the service worker's precache list read
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'hangarin_project.storage.StaticFilesStorage'},
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -186,4 +274,15 @@ PWA_APP_ICONS_APPLE = [
     }
 ]
 PWA_APP_DIR = 'ltr'
-PWA_SERVICE_WORKER_PATH = os.path.join(BASE_DIR, 'static/js', 'serviceworker.js')
+PWA_SERVICE_WORKER_PATH = os.path.join(BASE_DIR, 'templates', 'serviceworker.js')
+
+# Static files the service worker caches at install (see tasks.serviceworker)
+PWA_PRECACHE = [
+    'css/bootstrap.min.css',
+    'css/style.css',
+    'js/main.js',
+    'js/autocomplete.js',
+    'js/task-bulk.js',
+    'js/priority-reorder.js',
+    'img/p.jpg',
+]
@@ -0,0 +1,253 @@
+"""
+Static file serving from STATIC_ROOT without a reverse proxy.
+
+``collectstatic`` (see ``hangarin_project.storage``) writes a ``.br`` and a
+``.gz`` copy next to every compressible file. The WSGI and ASGI wrappers
+below index STATIC_ROOT once at startup and answer ``STATIC_URL`` requests
+before Django sees them:
+
+* the smallest variant the client accepts is sent, with ``Vary:
+  Accept-Encoding``;
+* every variant has its own ``ETag`` and ``If-None-Match`` gets a 304;
+* content-hashed names are cached for a year as ``immutable``, other names
+  are revalidated on every use.
+
+Restart the server after ``collectstatic`` so the index is rebuilt.
+"""
+import asyncio
+import gzip
+import mimetypes
+import os
+from email.utils import formatdate
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip variants are still written
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {
+    '.css', '.js', '.mjs', '.map', '.json', '.svg', '.html', '.txt', '.xml',
+    '.eot', '.ttf', '.otf', '.ico',
+}
+
+# A variant is only kept when it saves at least this share of the bytes
+MIN_SAVING = 0.05
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=0, must-revalidate'
+
+# (Content-Encoding, file suffix), in order of preference
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+CHUNK_SIZE = 256 * 1024
+
+
+def _compress_gzip(data):
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _compress_brotli(data):
+    return brotli.compress(data, quality=11)
+
+
+def compress_static_file(path):
+    """
+    Write the ``.br`` and ``.gz`` variants of ``path`` if it is compressible.
+
+    Variants newer than the file are left alone, so re-running
+    ``collectstatic`` only compresses what changed.
+    """
+    if os.path.splitext(path)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+        return
+    compressors = [('.gz', _compress_gzip)]
+    if brotli is not None:
+        compressors.insert(0, ('.br', _compress_brotli))
+
+    mtime = os.path.getmtime(path)
+    data = None
+    for suffix, compress in compressors:
+        target = path + suffix
+        if os.path.exists(target) and os.path.getmtime(target) >= mtime:
+            continue
+        if data is None:
+            with open(path, 'rb') as handle:
+                data = handle.read()
+        compressed = compress(data)
+        if len(compressed) <= len(data) * (1 - MIN_SAVING):
+            with open(target, 'wb') as handle:
+                handle.write(compressed)
+        elif os.path.exists(target):
+            os.remove(target)
+
+
+def _etag(stat, suffix=''):
+    return f'"{stat.st_size:x}-{int(stat.st_mtime):x}{suffix}"'
+
+
+def _content_type(path):
+    content_type, _ = mimetypes.guess_type(path)
+    content_type = content_type or 'application/octet-stream'
+    if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json'):
+        content_type += '; charset=utf-8'
+    return content_type
+
+
+class StaticFile:
+    """One file under STATIC_ROOT with its precompressed variants"""
+
+    def __init__(self, path, immutable):
+        stat = os.stat(path)
+        self.cache_control = IMMUTABLE if immutable else REVALIDATE
+        self.headers = [
+            ('Content-Type', _content_type(path)),
+            ('Last-Modified', formatdate(stat.st_mtime, usegmt=True)),
+            ('Cache-Control', self.cache_control),
+        ]
+        # (encoding, path, size, etag); the identity file is always last
+        self.variants = []
+        for encoding, suffix in ENCODINGS:
+            try:
+                variant = os.stat(path + suffix)
+            except FileNotFoundError:
+                continue
+            self.variants.append((encoding, path + suffix, variant.st_size, _etag(stat, '-' + suffix[1:])))
+        if self.variants:
+            self.headers.append(('Vary', 'Accept-Encoding'))
+        self.variants.append((None, path, stat.st_size, _etag(stat)))
+
+    def choose(self, accept_encoding):
+        accepted = _accepted_encodings(accept_encoding)
+        for variant in self.variants:
+            if variant[0] is None or variant[0] in accepted:
+                return variant
+
+    def response(self, method, accept_encoding, if_none_match):
+        """``(status, headers, path to send or None)`` for a GET or HEAD request"""
+        encoding, path, size, etag = self.choose(accept_encoding)
+        if if_none_match and _etag_matches(if_none_match, etag):
+            headers = [('ETag', etag), ('Cache-Control', self.cache_control)]
+            if len(self.variants) > 1:
+                headers.append(('Vary', 'Accept-Encoding'))
+            return 304, headers, None
+        headers = [*self.headers, ('ETag', etag), ('Content-Length', str(size))]
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        return 200, headers, path if method == 'GET' else None
+
+
+def _accepted_encodings(header):
+    accepted = set()
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+def _etag_matches(header, etag):
+    if header.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in header.split(','))
+
+
+class StaticFiles:
+    """Index of the files collectstatic wrote to STATIC_ROOT, keyed by URL path"""
+
+    def __init__(self, root=None, prefix=None):
+        self.root = root or settings.STATIC_ROOT
+        self.prefix = prefix or settings.STATIC_URL
+        if not self.prefix.startswith('/'):
+            self.prefix = '/' + self.prefix
+        self.files = {}
+        if self.root and os.path.isdir(self.root):
+            self._index()
+
+    def _index(self):
+        hashed = set(self._manifest_names())
+        variant_suffixes = tuple(suffix for _, suffix in ENCODINGS)
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith(variant_suffixes):
+                    continue
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, '/')
+                self.files[self.prefix + name] = StaticFile(path, immutable=name in hashed)
+
+    @staticmethod
+    def _manifest_names():
+        from django.contrib.staticfiles.storage import staticfiles_storage
+
+        return getattr(staticfiles_storage, 'hashed_files', {}).values()
+
+    def lookup(self, method, path):
+        if method not in ('GET', 'HEAD') or not path.startswith(self.prefix):
+            return None
+        return self.files.get(path)
+
+
+class StaticFilesWSGI:
+    """WSGI wrapper serving STATIC_URL from STATIC_ROOT in front of ``application``"""
+
+    def __init__(self, application, static_files=None):
+        self.application = application
+        self.static_files = static_files or StaticFiles()
+
+    def __call__(self, environ, start_response):
+        static_file = self.static_files.lookup(environ['REQUEST_METHOD'], environ.get('PATH_INFO', ''))
+        if static_file is None:
+            return self.application(environ, start_response)
+
+        status, headers, path = static_file.response(
+            environ['REQUEST_METHOD'], environ.get('HTTP_ACCEPT_ENCODING'), environ.get('HTTP_IF_NONE_MATCH'),
+        )
+        start_response('200 OK' if status == 200 else '304 Not Modified', headers)
+        if path is None:
+            return []
+        file_wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return file_wrapper(open(path, 'rb'), CHUNK_SIZE)
+
+
+class StaticFilesASGI:
+    """ASGI counterpart of StaticFilesWSGI"""
+
+    def __init__(self, application, static_files=None):
+        self.application = application
+        self.static_files = static_files or StaticFiles()
+
+    async def __call__(self, scope, receive, send):
+        static_file = None
+        if scope['type'] == 'http':
+            static_file = self.static_files.lookup(scope['method'], scope['path'])
+        if static_file is None:
+            return await self.application(scope, receive, send)
+
+        request_headers = dict(scope['headers'])
+        status, headers, path = static_file.response(
+            scope['method'],
+            request_headers.get(b'accept-encoding', b'').decode('latin-1'),
+            request_headers.get(b'if-none-match', b'').decode('latin-1'),
+        )
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+        })
+        if path is None:
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        with open(path, 'rb') as handle:
+            while True:
+                chunk = await asyncio.to_thread(handle.read, CHUNK_SIZE)
+                more = len(chunk) == CHUNK_SIZE
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': more})
+                if not more:
+                    break
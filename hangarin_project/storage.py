@@ -0,0 +1,33 @@
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+from .static import compress_static_file
+
+
+class StaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Content-hashed static files that tolerate dangling references.
+
+    The vendored template bundles point at source maps and images that are
+    not shipped; those references are left as they are instead of failing
+    collectstatic. Files missing from the manifest (tests, a stale
+    collectstatic) fall back to their plain name the same way.
+
+    Every compressible file is also written as ``.br`` and ``.gz`` for the
+    static-serving layer in ``hangarin_project.static``.
+    """
+    manifest_strict = False
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            if content is not None:
+                raise
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted({*paths, *self.hashed_files.values()}):
+            compress_static_file(self.path(name))
@@ -15,20 +15,23 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from tasks.views import (
     HomePageView, 
-    TaskListView, TaskCreateView, TaskUpdateView, TaskDeleteView,
+    TaskListView, TaskCreateView, TaskUpdateView, TaskDeleteView, TaskBulkActionView, TaskExportView,
     CategoryListView, CategoryCreateView, CategoryUpdateView, CategoryDeleteView,
-    PriorityListView, PriorityCreateView, PriorityUpdateView, PriorityDeleteView,
+    PriorityListView, PriorityCreateView, PriorityUpdateView, PriorityDeleteView, PriorityReorderView,
     SubTaskListView, SubTaskCreateView, SubTaskUpdateView, SubTaskDeleteView,
-    NoteListView, NoteCreateView, NoteUpdateView, NoteDeleteView
+    NoteListView, NoteCreateView, NoteUpdateView, NoteDeleteView,
+    SearchView, AutocompleteView, SyncView, ServiceWorkerView, JobStatusView,
 
 )
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     
+    # Ahead of django-pwa's own view, which serves a static file
+    re_path(r'^serviceworker\.js$', ServiceWorkerView.as_view(), name='serviceworker'),
     path('', include('pwa.urls')),
     path("accounts/", include("allauth.urls")), # allauth
     
@@ -40,6 +43,8 @@ urlpatterns = [
     path('tasks/add/', TaskCreateView.as_view(), name='task-add'),
     path('tasks/<int:pk>/', TaskUpdateView.as_view(), name='task-update'),
     path('tasks/<int:pk>/delete/', TaskDeleteView.as_view(), name='task-delete'),
+    path('tasks/bulk/', TaskBulkActionView.as_view(), name='task-bulk'),
+    path('tasks/export/', TaskExportView.as_view(), name='task-export'),
     
     # Category URLs
     path('categories/', CategoryListView.as_view(), name='category-list'),
@@ -52,6 +57,7 @@ urlpatterns = [
     path('priorities/add/', PriorityCreateView.as_view(), name='priority-add'),
     path('priorities/<int:pk>/', PriorityUpdateView.as_view(), name='priority-update'),
     path('priorities/<int:pk>/delete/', PriorityDeleteView.as_view(), name='priority-delete'),
+    path('priorities/reorder/', PriorityReorderView.as_view(), name='priority-reorder'),
     
     # SubTask URLs
     path('subtasks/', SubTaskListView.as_view(), name='subtask-list'),
@@ -64,4 +70,14 @@ urlpatterns = [
     path('notes/add/', NoteCreateView.as_view(), name='note-add'),
     path('notes/<int:pk>/', NoteUpdateView.as_view(), name='note-update'),
     path('notes/<int:pk>/delete/', NoteDeleteView.as_view(), name='note-delete'),
+    
+    # Search across tasks, subtasks and notes
+    path('search/', SearchView.as_view(), name='search'),
+    path('autocomplete/<str:kind>/', AutocompleteView.as_view(), name='autocomplete'),
+
+    # Delta sync for offline clients
+    path('api/sync/', SyncView.as_view(), name='sync'),
+
+    # Progress of background jobs (see run_worker)
+    path('api/jobs/<int:pk>/', JobStatusView.as_view(), name='job-status'),
 ]
\ No newline at end of file
@@ -0,0 +1,19 @@
+"""
+URLconf of the ASGI entry point (see hangarin_project.asgi).
+
+The same routes as ROOT_URLCONF, except that the dashboard and the task,
+subtask and note lists are served by their async variants, which run their
+independent queries concurrently. Everything else falls through to the
+regular patterns and runs as a sync view.
+"""
+from django.urls import path
+from tasks.views import AsyncHomePageView, AsyncTaskListView, AsyncSubTaskListView, AsyncNoteListView
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('', AsyncHomePageView.as_view(), name='home'),
+    path('tasks/', AsyncTaskListView.as_view(), name='task-list'),
+    path('subtasks/', AsyncSubTaskListView.as_view(), name='subtask-list'),
+    path('notes/', AsyncNoteListView.as_view(), name='note-list'),
+] + sync_urlpatterns
@@ -11,6 +11,9 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from hangarin_project.static import StaticFilesWSGI
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hangarin_project.settings')
 
-application = get_wsgi_application()
+# Serve STATIC_URL (precompressed, with cache headers) before Django
+application = StaticFilesWSGI(get_wsgi_application())
@@ -0,0 +1,117 @@
+// Autocomplete for <select data-autocomplete-url="..."> elements.
+// The server renders only the selected option; this script hides the select,
+// shows a search box instead and pages through the endpoint as the user types
+// or scrolls. Picking a suggestion updates the select and fires "change", so
+// existing onchange handlers (e.g. submitting a filter form) keep working.
+(function () {
+    var DEBOUNCE_MS = 200;
+
+    function setup(select) {
+        var url = select.dataset.autocompleteUrl;
+        var emptyOption = select.querySelector('option[value=""]');
+        var wrapper = document.createElement('div');
+        wrapper.className = 'position-relative';
+
+        var input = document.createElement('input');
+        input.type = 'text';
+        input.autocomplete = 'off';
+        input.className = select.className.replace('form-select', 'form-control');
+        input.placeholder = emptyOption ? emptyOption.textContent.trim() : 'Search...';
+        var current = select.options[select.selectedIndex];
+        input.value = current && current.value ? current.textContent.trim() : '';
+
+        var menu = document.createElement('ul');
+        menu.className = 'dropdown-menu w-100 overflow-auto';
+        menu.style.maxHeight = '16rem';
+
+        select.style.display = 'none';
+        select.parentNode.insertBefore(wrapper, select);
+        wrapper.appendChild(input);
+        wrapper.appendChild(menu);
+        wrapper.appendChild(select);
+
+        var term = '';
+        var page = 1;
+        var more = false;
+        var loading = false;
+        var timer = null;
+
+        function choose(id, text) {
+            var option = select.querySelector('option[value="' + id + '"]');
+            if (!option) {
+                option = new Option(text, id);
+                select.appendChild(option);
+            }
+            select.value = id;
+            input.value = id ? text : '';
+            menu.classList.remove('show');
+            select.dispatchEvent(new Event('change'));
+        }
+
+        function addItem(id, text) {
+            var item = document.createElement('li');
+            var link = document.createElement('a');
+            link.className = 'dropdown-item';
+            link.href = '#';
+            link.textContent = text;
+            link.addEventListener('mousedown', function (e) {
+                e.preventDefault();
+                choose(id, text);
+            });
+            item.appendChild(link);
+            menu.appendChild(item);
+        }
+
+        function load(reset) {
+            if (loading) {
+                return;
+            }
+            if (reset) {
+                page = 1;
+            }
+            loading = true;
+            var query = '?q=' + encodeURIComponent(term) + '&page=' + page;
+            fetch(url + query, {headers: {'Accept': 'application/json'}})
+                .then(function (response) { return response.json(); })
+                .then(function (data) {
+                    if (reset) {
+                        menu.innerHTML = '';
+                        if (emptyOption && !term) {
+                            addItem('', emptyOption.textContent.trim());
+                        }
+                    }
+                    data.results.forEach(function (result) {
+                        addItem(String(result.id), result.text);
+                    });
+                    more = data.pagination.more;
+                    page += 1;
+                    menu.classList.toggle('show', menu.children.length > 0);
+                })
+                .finally(function () { loading = false; });
+        }
+
+        input.addEventListener('focus', function () {
+            term = '';
+            load(true);
+        });
+        input.addEventListener('input', function () {
+            clearTimeout(timer);
+            timer = setTimeout(function () {
+                term = input.value.trim();
+                load(true);
+            }, DEBOUNCE_MS);
+        });
+        input.addEventListener('blur', function () {
+            menu.classList.remove('show');
+            var selected = select.options[select.selectedIndex];
+            input.value = selected && selected.value ? selected.textContent.trim() : '';
+        });
+        menu.addEventListener('scroll', function () {
+            if (more && menu.scrollTop + menu.clientHeight >= menu.scrollHeight - 20) {
+                load(false);
+            }
+        });
+    }
+
+    document.querySelectorAll('select[data-autocomplete-url]').forEach(setup);
+})();
@@ -0,0 +1,59 @@
+// Drag-and-drop reordering for the priority list.
+// Rows marked draggable can be moved within the page; on drop the new order
+// of the ids on this page is posted to the reorder endpoint.
+(function () {
+    var table = document.getElementById('priorityTable');
+    if (!table) {
+        return;
+    }
+    var body = table.querySelector('tbody');
+    var dragged = null;
+
+    function csrfToken() {
+        var input = document.querySelector('input[name="csrfmiddlewaretoken"]');
+        return input ? input.value : '';
+    }
+
+    function saveOrder() {
+        var data = new URLSearchParams();
+        body.querySelectorAll('tr.priority-draggable').forEach(function (row) {
+            data.append('ids', row.dataset.id);
+        });
+        fetch(table.dataset.reorderUrl, {
+            method: 'POST',
+            headers: {'X-CSRFToken': csrfToken()},
+            body: data
+        }).then(function (response) {
+            if (!response.ok) {
+                window.location.reload();
+            }
+        });
+    }
+
+    body.addEventListener('dragstart', function (e) {
+        dragged = e.target.closest('tr.priority-draggable');
+        if (dragged) {
+            e.dataTransfer.effectAllowed = 'move';
+            dragged.classList.add('opacity-50');
+        }
+    });
+
+    body.addEventListener('dragover', function (e) {
+        var target = e.target.closest('tr.priority-draggable');
+        if (!dragged || !target || target === dragged) {
+            return;
+        }
+        e.preventDefault();
+        var rect = target.getBoundingClientRect();
+        var after = e.clientY > rect.top + rect.height / 2;
+        body.insertBefore(dragged, after ? target.nextSibling : target);
+    });
+
+    body.addEventListener('dragend', function () {
+        if (dragged) {
+            dragged.classList.remove('opacity-50');
+            dragged = null;
+            saveOrder();
+        }
+    });
+})();
@@ -0,0 +1,98 @@
+// Bulk actions on the task list: apply one change to the ticked tasks, or to
+// every task matching the current filters, through the bulk endpoint. The
+// latter runs as a background job, which is polled until it finishes.
+(function () {
+    var form = document.getElementById('bulkForm');
+    if (!form) {
+        return;
+    }
+    var action = form.querySelector('select[name="action"]');
+    var scopeAll = form.querySelector('input[name="scope"]');
+    var selectPage = document.getElementById('bulkSelectPage');
+    var rows = document.querySelectorAll('input.bulk-select');
+
+    function valueInput() {
+        return form.querySelector('[data-value-for="' + action.value + '"]');
+    }
+
+    action.addEventListener('change', function () {
+        form.querySelectorAll('[data-value-for]').forEach(function (input) {
+            input.classList.toggle('d-none', input.dataset.valueFor !== action.value);
+        });
+    });
+
+    var submit = form.querySelector('button[type="submit"]');
+
+    function pollJob(url) {
+        fetch(url, {headers: {'Accept': 'application/json'}})
+            .then(function (response) { return response.json(); })
+            .then(function (job) {
+                if (job.error && !job.status) {
+                    alert(job.error);
+                    return;
+                }
+                if (job.status === 'Succeeded') {
+                    window.location.reload();
+                    return;
+                }
+                if (job.status === 'Failed') {
+                    submit.disabled = false;
+                    submit.textContent = 'Apply';
+                    alert('Bulk action failed: ' + job.error);
+                    return;
+                }
+                submit.textContent = job.status === 'Queued'
+                    ? 'Queued...'
+                    : 'Working' + (job.percent !== null ? ' ' + job.percent + '%' : '...');
+                setTimeout(function () { pollJob(url); }, 1000);
+            });
+    }
+
+    if (selectPage) {
+        selectPage.addEventListener('change', function () {
+            rows.forEach(function (row) { row.checked = selectPage.checked; });
+        });
+    }
+
+    form.addEventListener('submit', function (e) {
+        e.preventDefault();
+        if (!action.value) {
+            return;
+        }
+        var data = new FormData(form);
+        var input = valueInput();
+        if (input) {
+            data.append('value', input.value);
+        }
+        if (!scopeAll.checked) {
+            var checked = Array.prototype.filter.call(rows, function (row) { return row.checked; });
+            if (!checked.length) {
+                alert('Select at least one task.');
+                return;
+            }
+            checked.forEach(function (row) { data.append('ids', row.value); });
+        }
+        if (action.value === 'delete' && !confirm('Delete the selected tasks with their subtasks and notes?')) {
+            return;
+        }
+
+        fetch(form.dataset.url, {
+            method: 'POST',
+            headers: {'X-CSRFToken': data.get('csrfmiddlewaretoken')},
+            body: data
+        })
+            .then(function (response) { return response.json(); })
+            .then(function (result) {
+                if (result.error) {
+                    alert(result.error);
+                    return;
+                }
+                if (result.status_url) {
+                    submit.disabled = true;
+                    pollJob(result.status_url);
+                    return;
+                }
+                window.location.reload();
+            });
+    });
+})();
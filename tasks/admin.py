@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Priority, Category, Task, SubTask, Note
+from .models import Priority, Category, Task, SubTask, Note, Job
 
 class SubTaskInline(admin.TabularInline):
     model = SubTask
@@ -77,4 +77,10 @@ class NoteAdmin(admin.ModelAdmin):
     
     def content_preview(self, obj):
         return obj.content[:50] + '...' if len(obj.content) > 50 else obj.content
-    content_preview.short_description = 'Content'
\ No newline at end of file
+    content_preview.short_description = 'Content'
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'progress', 'total', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind']
+    readonly_fields = ['status', 'progress', 'total', 'message', 'result', 'error', 'attempts', 'worker',
+                       'heartbeat_at', 'started_at', 'finished_at']
@@ -0,0 +1,120 @@
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.utils import timezone
+
+from .bulk import bulk_delete_tasks
+from .models import Task, SubTask, Note, ArchivedTask, ArchivedSubTask, ArchivedNote
+
+# Completed tasks untouched for this long leave the hot tables
+ARCHIVE_AFTER_DAYS = 90
+
+# Tasks moved per transaction, with their subtasks and notes
+ARCHIVE_BATCH_SIZE = 1000
+
+# (hot model, archive model, column linking the rows to the batch of tasks)
+ARCHIVE_TABLES = [
+    (Task, ArchivedTask, 'id'),
+    (SubTask, ArchivedSubTask, 'task_id'),
+    (Note, ArchivedNote, 'task_id'),
+]
+
+
+def archivable_tasks(days=ARCHIVE_AFTER_DAYS, now=None):
+    """
+    Completed tasks last changed more than ``days`` ago.
+
+    Tasks have no completion date; ``updated_at`` is when the status last
+    changed (or anything else about the task), which is what matters here.
+    """
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    return Task.objects.filter(status='Completed', updated_at__lt=cutoff)
+
+
+def _copy(source, target, key, ids, now):
+    """INSERT ... SELECT the rows of ``source`` whose ``key`` is in ``ids`` into ``target``"""
+    columns = [
+        field.column for field in target._meta.concrete_fields
+        if field.column != 'archived_at'
+    ]
+    names = ', '.join(connection.ops.quote_name(column) for column in columns)
+    placeholders = ', '.join(['%s'] * len(ids))
+    extra_column, extra_value, params = '', '', list(ids)
+    if target is ArchivedTask:
+        extra_column, extra_value, params = ', archived_at', ', %s', [now, *ids]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {target._meta.db_table} ({names}{extra_column}) '
+            f'SELECT {names}{extra_value} FROM {source._meta.db_table} WHERE {key} IN ({placeholders})',
+            params,
+        )
+
+
+def archive_tasks(days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE, now=None):
+    """
+    Move archivable tasks with their subtasks and notes to the archive tables.
+
+    Each batch is copied with one INSERT ... SELECT per table and removed
+    through ``bulk_delete_tasks`` in the same transaction, so the dashboard
+    counters, the search index and the sync tombstones follow as for any
+    delete. Returns the number of archived tasks.
+    """
+    now = now or timezone.now()
+    archived_at = ArchivedTask._meta.get_field('archived_at').get_db_prep_value(now, connection)
+    moved = 0
+    while True:
+        ids = list(archivable_tasks(days, now).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return moved
+        with transaction.atomic():
+            for source, target, key in ARCHIVE_TABLES:
+                _copy(source, target, key, ids, archived_at)
+            bulk_delete_tasks(Task.objects.filter(pk__in=ids))
+        moved += len(ids)
+
+
+class TaskArchiveUnion:
+    """
+    Hot and archived tasks as one ordered, sliceable sequence for Django's
+    Paginator (the task list's "include archived" view).
+
+    Counting and slicing run on a ``UNION ALL`` of ``(id, sort value,
+    archived)`` over both tables, so the database picks the page; only the
+    rows on it are then loaded, each from its own table, ready to render.
+    """
+    model = Task
+    ordered = True
+
+    def __init__(self, hot, archived, sort):
+        descending = sort.startswith('-')
+        path = sort.lstrip('-')
+        keys = [
+            queryset.order_by().values(key_id=F('pk'), sort_value=F(path), archived=Value(flag))
+            for queryset, flag in [(hot, False), (archived, True)]
+        ]
+        direction = '-' if descending else ''
+        self.keys = keys[0].union(keys[1], all=True).order_by(f'{direction}sort_value', f'{direction}key_id')
+
+    def count(self):
+        return self.keys.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        rows = list(self.keys[index])
+        hot_ids = [row['key_id'] for row in rows if not row['archived']]
+        archived_ids = [row['key_id'] for row in rows if row['archived']]
+        objects = {(False, task.pk): task for task in Task.objects.for_listing().filter(pk__in=hot_ids)}
+        objects.update(
+            ((True, task.pk), task)
+            for task in ArchivedTask.objects.select_related('priority', 'category').defer('description')
+            .filter(pk__in=archived_ids)
+        )
+        return [
+            objects[row['archived'], row['key_id']] for row in rows
+            if (row['archived'], row['key_id']) in objects
+        ]
@@ -0,0 +1,59 @@
+import string
+
+from django.db.models.functions import Lower
+
+from .lookups import lookup_table
+from .models import Task
+
+# Suggestions returned per request; the widget asks for the next page when
+# the user scrolls to the end of the list.
+PAGE_SIZE = 20
+
+# Deepest page served, so a runaway client cannot turn a prefix lookup into
+# a large OFFSET scan. Users refine the prefix long before reaching it.
+MAX_PAGE = 50
+
+
+# SQLite's lower() (without the ICU extension) only folds ASCII letters, and
+# the prefix has to be folded the same way to match the indexed values.
+_SQLITE_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def _prefix_upper_bound(prefix):
+    """Smallest string greater than every string starting with ``prefix``"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _page_slice(page, page_size):
+    start = (page - 1) * page_size
+    return start, start + page_size + 1
+
+
+def suggest_tasks(term, page=1, page_size=PAGE_SIZE):
+    """
+    Tasks whose title starts with ``term``, ignoring case.
+
+    The prefix becomes a ``lower(title) >= term AND lower(title) < bound``
+    range on the task_title_lower_idx expression index, so a lookup reads
+    one page of index entries no matter how many tasks there are.
+    Case folding is ASCII-only, like SQLite's lower(): "é" does not match
+    "É". Returns ``(results, more)``.
+    """
+    queryset = Task.objects.annotate(title_lower=Lower('title')).only('id', 'title')
+    prefix = (term or '').strip().translate(_SQLITE_LOWER)
+    if prefix:
+        queryset = queryset.filter(title_lower__gte=prefix, title_lower__lt=_prefix_upper_bound(prefix))
+    start, stop = _page_slice(page, page_size)
+    rows = list(queryset.order_by('title_lower', 'id')[start:stop])
+    results = [{'id': task.pk, 'text': task.title} for task in rows[:page_size]]
+    return results, len(rows) > page_size
+
+
+def suggest_lookup(model, term, page=1, page_size=PAGE_SIZE):
+    """Categories or priorities starting with ``term``, served from the lookup cache"""
+    prefix = (term or '').strip().lower()
+    rows = [row for row in lookup_table(model).rows if row.name.lower().startswith(prefix)]
+    start, stop = _page_slice(page, page_size)
+    rows = rows[start:stop]
+    results = [{'id': row.pk, 'text': row.name} for row in rows[:page_size]]
+    return results, len(rows) > page_size
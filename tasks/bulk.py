@@ -0,0 +1,207 @@
+import time
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .cache import bump_generation
+from .models import Task, SubTask, Note, Category, Priority, ArchivedTask
+from .stats import (
+    apply_counter_delta, counter_delta, note_contributions, subtask_contributions, task_contributions,
+)
+from .sync import record_tombstones
+
+# Every bulk operation also changes what these models' cached pages show
+AFFECTED_MODELS = (Task, SubTask, Note)
+
+# Soft-deleted rows removed per purge transaction
+PURGE_BATCH_SIZE = 1000
+
+
+def _selection(queryset):
+    """
+    Plain ``Task`` queryset selecting the same rows as ``queryset``.
+
+    Listing querysets carry annotations and ordering that UPDATE/DELETE
+    cannot use, so only their ``WHERE`` clause is kept.
+    """
+    return Task.objects.filter(pk__in=queryset.order_by().values('pk'))
+
+
+def bulk_update_tasks(queryset, status=None, priority_id=None, category_id=None, deadline_shift=None):
+    """
+    Apply one change to every task in ``queryset`` with a single UPDATE.
+
+    ``deadline_shift`` is a timedelta added to existing deadlines (tasks
+    without a deadline keep none). The dashboard rollup is adjusted from
+    grouped aggregates and the caches are invalidated, since update() skips
+    the save signals. Returns the number of updated tasks.
+    """
+    changes = {}
+    if status is not None:
+        changes['status'] = status
+    if priority_id is not None:
+        changes['priority_id'] = priority_id
+    if category_id is not None:
+        changes['category_id'] = category_id
+    if deadline_shift:
+        changes['deadline'] = F('deadline') + deadline_shift
+    if not changes:
+        return 0
+
+    with transaction.atomic():
+        tasks = _selection(queryset)
+        before = task_contributions(tasks)
+        after = task_contributions(
+            tasks, status=status, priority_id=priority_id, category_id=category_id,
+            deadline_shift=deadline_shift,
+        )
+        # Stamped in Python like every other write, so updated_at has the
+        # same microsecond text everywhere (SQL's Now() drops to seconds)
+        updated = tasks.update(updated_at=timezone.now(), **changes)
+        apply_counter_delta(counter_delta(before, after))
+
+    bump_generation(*AFFECTED_MODELS)
+    return updated
+
+
+def bulk_delete_tasks(queryset):
+    """
+    Delete every task in ``queryset`` together with its subtasks and notes.
+
+    The rows are removed with one DELETE per table instead of Django's
+    collector, which would load every object to send the delete signals;
+    the sync tombstones are written the same way. Returns the deleted row
+    counts per model.
+    """
+    with transaction.atomic():
+        tasks = _selection(queryset)
+        subtasks = SubTask.objects.filter(task__in=tasks.values('pk'))
+        notes = Note.objects.filter(task__in=tasks.values('pk'))
+
+        removed = task_contributions(tasks) + subtask_contributions(subtasks) + note_contributions(notes)
+        for rows in (subtasks, notes, tasks):
+            record_tombstones(rows)
+
+        counts = {
+            'subtasks': subtasks._raw_delete(subtasks.db),
+            'notes': notes._raw_delete(notes.db),
+        }
+        counts['tasks'] = tasks._raw_delete(tasks.db)
+        apply_counter_delta(counter_delta(removed, ()))
+
+    bump_generation(*AFFECTED_MODELS)
+    return counts
+
+
+def soft_delete_tasks(queryset, now=None):
+    """
+    Flag every task in ``queryset`` and its subtasks and notes as deleted.
+
+    One UPDATE per table over indexed foreign keys, whatever the number of
+    rows; ``purge_deleted`` removes them for good later. Counters and sync
+    tombstones are settled now, since the rows are gone as far as the app is
+    concerned. Returns the flagged row counts per model.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        tasks = _selection(queryset)
+        subtasks = SubTask.objects.filter(task__in=tasks.values('pk'))
+        notes = Note.objects.filter(task__in=tasks.values('pk'))
+
+        removed = task_contributions(tasks) + subtask_contributions(subtasks) + note_contributions(notes)
+        for rows in (subtasks, notes, tasks):
+            record_tombstones(rows)
+
+        counts = {
+            'subtasks': subtasks.update(deleted_at=now),
+            'notes': notes.update(deleted_at=now),
+        }
+        # The import key is released so the same task can be imported again
+        counts['tasks'] = tasks.update(deleted_at=now, external_id=None)
+        apply_counter_delta(counter_delta(removed, ()))
+
+    bump_generation(*AFFECTED_MODELS)
+    return counts
+
+
+def soft_delete_lookup(instance, now=None):
+    """Soft-delete a category or priority together with all of its tasks"""
+    now = now or timezone.now()
+    model = type(instance)
+    with transaction.atomic():
+        counts = soft_delete_tasks(Task.objects.filter(**{model._meta.model_name: instance}), now)
+        model.objects.filter(pk=instance.pk).update(deleted_at=now)
+    bump_generation(model)
+    return counts
+
+
+def _purge_batch(model, before, batch_size, referenced_by=()):
+    """
+    DELETE up to ``batch_size`` rows of ``model`` soft-deleted before
+    ``before``, skipping rows still referenced through ``referenced_by``
+    (``(model, column)`` pairs).
+    """
+    table = model._meta.db_table
+    kept = ''.join(
+        f' AND NOT EXISTS (SELECT 1 FROM {other._meta.db_table} WHERE {column} = {table}.id)'
+        for other, column in referenced_by
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE id IN ('
+            f'SELECT id FROM {table} WHERE deleted_at IS NOT NULL AND deleted_at < %s{kept} LIMIT %s)',
+            [before, batch_size],
+        )
+        return cursor.rowcount
+
+
+def purge_deleted(before=None, batch_size=PURGE_BATCH_SIZE, pause=0.0):
+    """
+    Physically remove rows soft-deleted before ``before`` (default: now).
+
+    Every table goes with plain set-based DELETEs of at most ``batch_size``
+    rows, each in its own short transaction, sleeping ``pause`` seconds in
+    between so other writers get the lock. Children go first: they were
+    flagged together with their task, so no batch leaves a dangling foreign
+    key. Categories and priorities go last, except those still used by a
+    task or an archived task: those stay soft-deleted so the archive keeps
+    its history. Returns the purged row counts per model.
+    """
+    before = before or timezone.now()
+    cutoff = Task._meta.get_field('deleted_at').get_db_prep_value(before, connection)
+    counts = {}
+    for model, referenced_by in [
+        (Note, ()),
+        (SubTask, ()),
+        (Task, ()),
+        (Category, [(Task, 'category_id'), (ArchivedTask, 'category_id')]),
+        (Priority, [(Task, 'priority_id'), (ArchivedTask, 'priority_id')]),
+    ]:
+        purged = 0
+        while True:
+            deleted = _purge_batch(model, cutoff, batch_size, referenced_by)
+            purged += deleted
+            if deleted < batch_size:
+                break
+            time.sleep(pause)
+        counts[model._meta.model_name] = purged
+    return counts
+
+
+@contextmanager
+def manual_timestamps(*models):
+    """Let bulk_create keep the created_at/updated_at values set on the objects"""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+
+# How long a computed page or dashboard stays cached, in seconds. Entries are
+# also invalidated as soon as one of the models they depend on changes.
+CACHE_TIMEOUT = 300
+
+# How long a rebuild may hold the single-flight lock before others give up
+# waiting and compute the value themselves.
+LOCK_TIMEOUT = 30
+LOCK_POLL_INTERVAL = 0.05
+
+KEY_PREFIX = 'hangarin'
+
+_MISSING = object()
+
+
+def _generation_key(model):
+    return f'{KEY_PREFIX}:gen:{model._meta.label_lower}'
+
+
+def get_generations(*models):
+    """
+    Current generation stamp of each model.
+
+    A missing stamp (first use, or evicted from the cache) is initialised
+    from the clock so it can never collide with a stamp used before. Stamps
+    are only seen by processes sharing the cache backend.
+    """
+    keys = [_generation_key(model) for model in models]
+    stamps = cache.get_many(keys)
+    for key in keys:
+        if key not in stamps:
+            cache.add(key, time.time_ns(), None)
+            stamps[key] = cache.get(key)
+    return [stamps[key] for key in keys]
+
+
+def _bump(models):
+    for model in models:
+        key = _generation_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def bump_generation(*models, using=None):
+    """
+    Invalidate every cache entry built from any of ``models``.
+
+    The bump happens when the surrounding transaction on ``using`` commits
+    (immediately outside one): bumping earlier would let a reader rebuild
+    the page from the not yet committed state under the new generation and
+    keep serving that old page after the commit.
+    """
+    transaction.on_commit(lambda: _bump(models), using=using)
+
+
+def versioned_key(name, models, *parts):
+    """
+    Cache key for ``name`` that changes whenever one of ``models`` is saved or
+    deleted. ``parts`` (e.g. the query string) are hashed into the key.
+
+    Returns ``(key, stale_key)``: ``stale_key`` ignores the generations and is
+    used to serve the previous value while a rebuild is in progress.
+    """
+    digest = hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+    stale_key = f'{KEY_PREFIX}:{name}:{digest}'
+    generations = '.'.join(str(stamp) for stamp in get_generations(*models))
+    return f'{stale_key}:{generations}', stale_key
+
+
+def get_or_build(key, builder, timeout=CACHE_TIMEOUT, stale_key=None):
+    """
+    Return the cached value for ``key``, building it with ``builder()`` on a miss.
+
+    Rebuilds are single-flight: the first caller takes a lock with
+    ``cache.add`` and recomputes, everyone else either gets the stale value
+    (when ``stale_key`` is given) or waits for the new one. Any cache backend
+    will do, no external service needed; across processes it only works with
+    a backend they share (the file-based default), since a local-memory
+    cache holds its own entries and generation stamps in every process.
+    """
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, True, LOCK_TIMEOUT):
+        try:
+            value = builder()
+            cache.set(key, value, timeout)
+            if stale_key:
+                cache.set(stale_key, value, None)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    # Somebody else is rebuilding this entry
+    if stale_key:
+        value = cache.get(stale_key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if cache.get(lock_key) is None:
+            break
+    return builder()
+
+
+def cached(name, models, builder, *parts, timeout=CACHE_TIMEOUT):
+    """Shortcut for ``get_or_build`` with a key versioned by ``models``"""
+    key, stale_key = versioned_key(name, models, *parts)
+    return get_or_build(key, builder, timeout=timeout, stale_key=stale_key)
+
+
+async def aget_or_build(key, builder, timeout=CACHE_TIMEOUT, stale_key=None):
+    """``get_or_build`` for async views: ``builder`` is a coroutine function"""
+    value = await cache.aget(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    lock_key = f'{key}:lock'
+    if await cache.aadd(lock_key, True, LOCK_TIMEOUT):
+        try:
+            value = await builder()
+            await cache.aset(key, value, timeout)
+            if stale_key:
+                await cache.aset(stale_key, value, None)
+            return value
+        finally:
+            await cache.adelete(lock_key)
+
+    if stale_key:
+        value = await cache.aget(stale_key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+        value = await cache.aget(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if await cache.aget(lock_key) is None:
+            break
+    return await builder()
+
+
+async def acached(name, models, builder, *parts, timeout=CACHE_TIMEOUT):
+    """Shortcut for ``aget_or_build`` with a key versioned by ``models``"""
+    key, stale_key = await sync_to_async(versioned_key)(name, models, *parts)
+    return await aget_or_build(key, builder, timeout=timeout, stale_key=stale_key)
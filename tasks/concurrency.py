@@ -0,0 +1,66 @@
+"""
+Independent queries of a page, run side by side for the async views.
+
+Django's async ORM methods (``acount()``, ``aaggregate()``...) all hop onto
+the one thread-sensitive worker, so awaiting several of them still runs the
+queries one after another. Here each builder runs on a small dedicated pool
+through ``sync_to_async(thread_sensitive=False)``; every pool thread keeps
+its own database connection, so the queries really overlap (SQLite in WAL
+mode serves concurrent readers).
+
+A "part" is a callable returning a dict of context values. The sync views
+run their parts with ``run_parts``, the async ones with ``gather_parts``.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+_executor = None
+
+
+def query_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.ASYNC_QUERY_THREADS, thread_name_prefix='hangarin-query',
+        )
+    return _executor
+
+
+def _in_pool(builder):
+    def run(*args, **kwargs):
+        # Pool threads outlive requests: apply CONN_MAX_AGE and the health
+        # checks the way request_started does on the request threads
+        close_old_connections()
+        return builder(*args, **kwargs)
+    return run
+
+
+async def run_query(builder, *args, **kwargs):
+    """Await ``builder(*args, **kwargs)`` running on the query pool"""
+    return await sync_to_async(_in_pool(builder), thread_sensitive=False, executor=query_executor())(
+        *args, **kwargs
+    )
+
+
+def run_parts(parts):
+    """Run ``{label: part}`` one after another and merge their values"""
+    context = {}
+    for part in parts.values():
+        context.update(part())
+    return context
+
+
+async def gather_parts(parts):
+    """Run ``{label: part}`` concurrently and merge their values; parts may be coroutine functions"""
+    results = await asyncio.gather(*(
+        part() if iscoroutinefunction(part) else run_query(part)
+        for part in parts.values()
+    ))
+    context = {}
+    for values in results:
+        context.update(values)
+    return context
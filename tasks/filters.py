@@ -0,0 +1,64 @@
+from .lookups import lookup_table
+from .models import Category, Priority
+from .search import search_tasks
+
+# Sort keys accepted by the task list, its export and the API
+TASK_SORTS = [
+    'title', '-title',
+    'status', '-status',
+    'priority__order', '-priority__order',
+    'category__name', '-category__name',
+    'deadline', '-deadline',
+    'created_at', '-created_at',
+]
+DEFAULT_TASK_SORT = '-created_at'
+
+# Priorities sort by their rank, not alphabetically; old links used the name
+LEGACY_TASK_SORTS = {'priority__name': 'priority__order', '-priority__name': '-priority__order'}
+
+
+def filter_tasks(queryset, params):
+    """
+    Apply the task list's search and filter parameters (``q``, ``category``,
+    ``priority``, ``status``) to ``queryset``. Shared by the list, the bulk
+    actions and the export so "matching tasks" means the same everywhere.
+    """
+    search_query = params.get('q', '')
+    category_filter = params.get('category', '')
+    priority_filter = params.get('priority', '')
+    status_filter = params.get('status', '')
+
+    # Apply search filter (full-text index)
+    if search_query:
+        queryset = search_tasks(queryset, search_query)
+
+    # Apply category filter - show ONLY tasks from selected category
+    if category_filter:
+        # Resolve by name first, then by ID, from the cached lookup table
+        category = lookup_table(Category).resolve(category_filter)
+        if category:
+            queryset = queryset.filter(category_id=category.pk)
+        else:
+            queryset = queryset.none()
+
+    # Apply priority filter - show ONLY tasks with selected priority
+    if priority_filter:
+        priority = lookup_table(Priority).resolve(priority_filter)
+        if priority:
+            queryset = queryset.filter(priority_id=priority.pk)
+        else:
+            queryset = queryset.none()
+
+    # Apply status filter - show ONLY tasks with selected status
+    if status_filter:
+        queryset = queryset.filter(status=status_filter)
+
+    return queryset
+
+
+def sort_tasks(queryset, sort_by):
+    """Order ``queryset`` by a task list sort key, falling back to newest first"""
+    sort_by = LEGACY_TASK_SORTS.get(sort_by, sort_by)
+    if sort_by not in TASK_SORTS:
+        sort_by = DEFAULT_TASK_SORT
+    return queryset.order_by(sort_by)
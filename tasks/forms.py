@@ -1,10 +1,105 @@
 from django import forms
+from django.core.exceptions import ValidationError
+from django.urls import reverse_lazy
 from .models import Task, Category, Priority, SubTask, Note
+from .lookups import lookup_table
+
+
+class LookupChoiceIterator(forms.models.ModelChoiceIterator):
+    """Yield choices from the cached lookup table instead of querying"""
+    
+    def rows(self):
+        return lookup_table(self.queryset.model).rows
+    
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in self.rows():
+            yield self.choice(obj)
+    
+    def __len__(self):
+        return len(self.rows()) + (1 if self.field.empty_label is not None else 0)
+    
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.rows())
+
+
+class LookupChoiceField(forms.ModelChoiceField):
+    """ModelChoiceField for Category/Priority that renders and validates from the lookup cache"""
+    iterator = LookupChoiceIterator
+    
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            obj = lookup_table(self.queryset.model).by_id.get(int(value))
+        except (TypeError, ValueError):
+            obj = None
+        if obj is None:
+            raise ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+        return obj
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    Select that renders only the currently selected option.
+
+    static/js/autocomplete.js turns it into a search box that pages through
+    ``url`` as the user types, so the page never carries the whole table.
+    """
+    
+    def __init__(self, url, attrs=None):
+        super().__init__(attrs)
+        self.url = url
+    
+    def __deepcopy__(self, memo):
+        obj = super().__deepcopy__(memo)
+        obj.url = self.url
+        return obj
+    
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs['data-autocomplete-url'] = str(self.url)
+        return attrs
+    
+    def selected_pks(self, value):
+        """Submitted values that are valid primary keys, converted to the pk's type"""
+        pk = self.choices.queryset.model._meta.pk
+        selected = set()
+        for v in value:
+            if v in (None, ''):
+                continue
+            try:
+                selected.add(pk.to_python(v))
+            except ValidationError:
+                pass
+        return selected
+
+    def optgroups(self, name, value, attrs=None):
+        selected = self.selected_pks(value)
+        queryset = self.choices.queryset
+        groups = []
+        if not self.is_required:
+            groups.append((None, [self.create_option(name, '', self.choices.field.empty_label or '', not selected, 0)], 0))
+        if selected:
+            for index, obj in enumerate(queryset.filter(pk__in=selected), start=len(groups)):
+                option_value = self.choices.choice(obj)[0]
+                groups.append((None, [self.create_option(name, option_value, self.choices.field.label_from_instance(obj), True, index)], index))
+        return groups
+
 
 class TaskForm(forms.ModelForm):
     class Meta:
         model = Task
         fields = "__all__"
+        field_classes = {
+            'priority': LookupChoiceField,
+            'category': LookupChoiceField,
+        }
         widgets = {
             'deadline': forms.DateTimeInput(attrs={
                 'type': 'datetime-local',
@@ -29,6 +124,13 @@ class PriorityForm(forms.ModelForm):
         widgets = {
             'name': forms.TextInput(attrs={'placeholder': 'Enter priority name...'}),
         }
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance._state.adding:
+            # Left empty, the new priority is ranked last (see Priority.save)
+            self.fields['order'].required = False
+            self.initial['order'] = None
 
 class SubTaskForm(forms.ModelForm):
     class Meta:
@@ -36,6 +138,7 @@ class SubTaskForm(forms.ModelForm):
         fields = "__all__"
         widgets = {
             'title': forms.TextInput(attrs={'placeholder': 'Enter subtask title...'}),
+            'task': AutocompleteSelect(reverse_lazy('autocomplete', args=['tasks'])),
         }
 
 class NoteForm(forms.ModelForm):
@@ -43,5 +146,6 @@ class NoteForm(forms.ModelForm):
         model = Note
         fields = "__all__"
         widgets = {
+            'task': AutocompleteSelect(reverse_lazy('autocomplete', args=['tasks'])),
             'content': forms.Textarea(attrs={'rows': 3, 'placeholder': 'Enter note content...'}),
         }
\ No newline at end of file
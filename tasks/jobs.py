@@ -0,0 +1,260 @@
+"""
+Database-backed background jobs.
+
+Work too slow for a request (exports, imports, counter rebuilds, archival,
+mass changes) is queued as a ``Job`` row with ``enqueue`` and run by the
+``run_worker`` command in a process pool. Nothing but the database is
+needed: workers claim rows with a conditional UPDATE, progress is written
+to the row for the UI to poll (``JobStatusView``), and failed attempts are
+retried with exponential backoff.
+
+Job functions are registered with ``@job('kind')`` and called as
+``function(progress, **params)``; ``params`` must be JSON-serializable and
+the return value is stored as the job's result. A job is only retried if
+running it again after a partial run is harmless; others register with
+``max_attempts=1``.
+"""
+import os
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import OperationalError
+from django.db.models import F
+from django.utils import timezone
+
+from .archive import ARCHIVE_AFTER_DAYS, archive_tasks
+from .bulk import bulk_update_tasks, purge_deleted, soft_delete_tasks
+from .export import stream_export
+from .filters import DEFAULT_TASK_SORT, filter_tasks, sort_tasks
+from .importer import TaskImporter, read_records
+from .models import Job, Task
+from .stats import rebuild_counters
+
+# Delay before the first retry, in seconds; doubled for every further attempt
+JOB_RETRY_DELAY = 30
+JOB_MAX_RETRY_DELAY = 3600
+
+# A running job whose heartbeat is older than this lost its worker
+JOB_STALE_AFTER = 300
+
+# Least time between two progress writes of one job, in seconds
+PROGRESS_INTERVAL = 1.0
+
+JOBS = {}
+
+
+def job(kind, max_attempts=3):
+    """Register a job function under ``kind``, run at most ``max_attempts`` times by default"""
+    def register(function):
+        function.max_attempts = max_attempts
+        JOBS[kind] = function
+        return function
+    return register
+
+
+def enqueue(kind, max_attempts=None, **params):
+    """Queue a ``kind`` job with ``params`` for the next free worker"""
+    if kind not in JOBS:
+        raise ValueError(f'unknown job {kind!r}')
+    return Job.objects.create(kind=kind, params=params, max_attempts=max_attempts or JOBS[kind].max_attempts)
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim_job(worker, now=None):
+    """
+    Claim the next due job for ``worker``, or return None when there is none.
+
+    The UPDATE only succeeds while the row is still queued, so two workers
+    racing for the same job cannot both get it; the loser tries the next.
+    """
+    now = now or timezone.now()
+    while True:
+        pk = (
+            Job.objects.filter(status=Job.QUEUED, run_after__lte=now)
+            .order_by('run_after', 'id').values_list('pk', flat=True).first()
+        )
+        if pk is None:
+            return None
+        claimed = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, worker=worker, attempts=F('attempts') + 1,
+            started_at=now, heartbeat_at=now,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(JOB_RETRY_DELAY * 2 ** (attempts - 1), JOB_MAX_RETRY_DELAY))
+
+
+def _claim(job):
+    """The row of ``job`` while it is still running under the claim ``job`` was read with"""
+    return Job.objects.filter(pk=job.pk, status=Job.RUNNING, worker=job.worker, attempts=job.attempts)
+
+
+def fail_job(job, error, now=None):
+    """Queue ``job`` again after a backoff, or fail it once out of attempts"""
+    now = now or timezone.now()
+    running = _claim(job)
+    if job.attempts < job.max_attempts:
+        return running.update(
+            status=Job.QUEUED, error=error, worker='', heartbeat_at=None,
+            run_after=now + retry_delay(job.attempts),
+        )
+    return running.update(status=Job.FAILED, error=error, finished_at=now)
+
+
+def requeue_stale_jobs(now=None, exclude=()):
+    """
+    Give the jobs of workers that stopped responding another attempt.
+
+    ``exclude`` lists jobs the caller is running itself: they are alive
+    whatever their heartbeat says.
+    """
+    now = now or timezone.now()
+    stale = Job.objects.filter(
+        status=Job.RUNNING, heartbeat_at__lt=now - timedelta(seconds=JOB_STALE_AFTER),
+    ).exclude(pk__in=exclude)
+    requeued = 0
+    for stale_job in stale.only('pk', 'worker', 'attempts', 'max_attempts'):
+        requeued += fail_job(stale_job, 'Worker stopped responding', now)
+    return requeued
+
+
+class JobProgress:
+    """
+    Passed to job functions to report how far they got.
+
+    ``progress(done, total, message)`` updates the row, at most once per
+    ``PROGRESS_INTERVAL`` unless ``force`` is set; the write doubles as the
+    job's heartbeat. Progress is advisory: when another job holds the
+    SQLite write lock for longer than ``busy_timeout`` the update is
+    skipped rather than failing the job.
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self.last_write = 0.0
+
+    def __call__(self, done, total=None, message=None, force=False):
+        changes = {'progress': done}
+        if total is not None:
+            changes['total'] = total
+        if message is not None:
+            changes['message'] = message[:200]
+        if not force and time.monotonic() - self.last_write < PROGRESS_INTERVAL:
+            return
+        self.last_write = time.monotonic()
+        try:
+            Job.objects.filter(pk=self.job.pk).update(heartbeat_at=timezone.now(), **changes)
+        except OperationalError:
+            pass
+
+
+def run_job(pk):
+    """
+    Run a claimed job in this process and record its outcome. Returns True on success.
+
+    The outcome is only recorded while the job is still this worker's: if
+    it was declared stale and claimed again meanwhile, the new attempt owns
+    the row.
+    """
+    claimed = Job.objects.get(pk=pk)
+    function = JOBS.get(claimed.kind)
+    if function is None:
+        Job.objects.filter(pk=pk).update(
+            status=Job.FAILED, error=f'Unknown job {claimed.kind!r}', finished_at=timezone.now(),
+        )
+        return False
+    try:
+        result = function(JobProgress(claimed), **claimed.params)
+    except Exception:
+        fail_job(claimed, traceback.format_exc())
+        return False
+    return bool(_claim(claimed).update(
+        status=Job.SUCCEEDED, result=result, error='', finished_at=timezone.now(),
+    ))
+
+
+def job_output_path(progress, extension):
+    """File a job writes its output to, under ``JOB_OUTPUT_DIR``"""
+    settings.JOB_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    return settings.JOB_OUTPUT_DIR / f'job-{progress.job.pk}.{extension}'
+
+
+@job('bulk_tasks')
+def run_bulk_tasks(progress, action, filters, changes=None):
+    """A task list bulk action over every task matching ``filters`` (see TaskBulkActionView)"""
+    tasks = filter_tasks(Task.objects.all(), filters)
+    progress(0, 1, f'Applying {action}', force=True)
+    if action == 'delete':
+        affected = soft_delete_tasks(tasks)
+    else:
+        changes = dict(changes or {})
+        days = changes.pop('deadline_shift_days', None)
+        if days is not None:
+            changes['deadline_shift'] = timedelta(days=days)
+        affected = {'tasks': bulk_update_tasks(tasks, **changes)}
+    progress(1, 1, 'Done', force=True)
+    return affected
+
+
+@job('export_tasks')
+def run_export_tasks(progress, format='csv', filters=None, sort_by=DEFAULT_TASK_SORT):
+    tasks = sort_tasks(filter_tasks(Task.objects.all(), filters or {}), sort_by)
+    total = tasks.count()
+    path = job_output_path(progress, format)
+    progress(0, total, f'Exporting {total} tasks', force=True)
+    written = 0
+    with open(path, 'w', encoding='utf-8', newline='') as output:
+        for chunk in stream_export(tasks, format):
+            output.write(chunk)
+            written += 1
+            progress(min(written, total))
+    progress(total, total, f'Exported {total} tasks', force=True)
+    return {'path': str(path), 'tasks': total}
+
+
+# Not retried: the batches written before a failure stay committed, and a
+# second run would import them again
+@job('import_tasks', max_attempts=1)
+def run_import_tasks(progress, path, format='jsonl', upsert=False):
+    def reported(records):
+        for count, record in enumerate(records, 1):
+            yield record
+            progress(count, message=f'{count} records read')
+
+    rejected = []
+
+    def on_error(line, messages, record):
+        rejected.append({'line': line, 'errors': messages})
+
+    with open(path, encoding='utf-8', newline='') as stream:
+        counts = TaskImporter(upsert=upsert, on_error=on_error).run(reported(read_records(stream, format)))
+    # The first rejections are enough to tell what is wrong with a file
+    return {**counts, 'rejected': rejected[:100]}
+
+
+@job('rebuild_stats')
+def run_rebuild_stats(progress):
+    progress(0, message='Rebuilding dashboard counters', force=True)
+    drift = rebuild_counters()
+    return {'drifted': len(drift)}
+
+
+@job('archive_tasks')
+def run_archive_tasks(progress, days=ARCHIVE_AFTER_DAYS):
+    progress(0, message=f'Archiving tasks completed more than {days} days ago', force=True)
+    return {'archived': archive_tasks(days=days)}
+
+
+@job('purge_deleted')
+def run_purge_deleted(progress, older_than_hours=0):
+    progress(0, message='Purging soft-deleted rows', force=True)
+    return purge_deleted(before=timezone.now() - timedelta(hours=older_than_hours))
@@ -0,0 +1,41 @@
+from hangarin_project.routers import PRIMARY
+
+from .cache import get_generations
+
+# Per-process copies of the small lookup tables, keyed by model. Each copy
+# remembers the generation stamp it was loaded at; saving or deleting a row
+# bumps the stamp (see tasks.signals) in the cache all processes share, so
+# every worker process reloads its copy on the next lookup.
+_tables = {}
+
+
+class LookupTable:
+    def __init__(self, generation, rows):
+        self.generation = generation
+        self.rows = rows
+        self.by_id = {row.pk: row for row in rows}
+        self.by_name = {}
+        for row in rows:
+            self.by_name.setdefault(row.name, row)
+
+    def resolve(self, value):
+        """Find a row by name first, then by id. Returns None when neither matches"""
+        if value in self.by_name:
+            return self.by_name[value]
+        try:
+            return self.by_id.get(int(value))
+        except (TypeError, ValueError):
+            return None
+
+
+def lookup_table(model):
+    """Current LookupTable for ``model``, reloading it only when it changed"""
+    generation = get_generations(model)[0]
+    table = _tables.get(model)
+    if table is None or table.generation != generation:
+        # From the primary: a copy loaded from the lagging replica would be
+        # kept, without the latest change, until the next bump
+        table = LookupTable(generation, list(model._default_manager.db_manager(PRIMARY).all()))
+        _tables[model] = table
+    return table
+
@@ -0,0 +1,71 @@
+import time
+
+from django.db import connection
+
+# auto_vacuum values as reported by PRAGMA auto_vacuum
+AUTO_VACUUM_MODES = {0: 'NONE', 1: 'FULL', 2: 'INCREMENTAL'}
+
+
+def _pragma(cursor, name):
+    cursor.execute(f'PRAGMA {name}')
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def database_status():
+    """Size, free pages and journal settings of the default SQLite database"""
+    with connection.cursor() as cursor:
+        page_size = _pragma(cursor, 'page_size')
+        return {
+            'journal_mode': _pragma(cursor, 'journal_mode'),
+            'synchronous': _pragma(cursor, 'synchronous'),
+            'auto_vacuum': AUTO_VACUUM_MODES.get(_pragma(cursor, 'auto_vacuum')),
+            'size_bytes': _pragma(cursor, 'page_count') * page_size,
+            'free_bytes': _pragma(cursor, 'freelist_count') * page_size,
+        }
+
+
+def run_maintenance(analyze=False, vacuum_pages=None, enable_incremental_vacuum=False, checkpoint=True):
+    """
+    Routine upkeep for the SQLite database; returns ``[(step, seconds)]``.
+
+    ``PRAGMA optimize`` re-analyzes only the tables whose statistics are out
+    of date, so it is cheap enough to run daily; ``analyze`` rebuilds all of
+    them. Free pages are handed back to the file system with
+    ``incremental_vacuum``, which needs ``auto_vacuum=INCREMENTAL`` — set once
+    with ``enable_incremental_vacuum``, at the cost of a full VACUUM that
+    rewrites the file. The WAL is checkpointed and truncated last.
+    """
+    if connection.vendor != 'sqlite':
+        raise ValueError('Database maintenance is only implemented for SQLite.')
+
+    steps = []
+
+    def step(name, *statements):
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+                cursor.fetchall()
+        steps.append((name, time.perf_counter() - started))
+
+    if enable_incremental_vacuum:
+        with connection.cursor() as cursor:
+            mode = _pragma(cursor, 'auto_vacuum')
+        if mode != 2:
+            step('enable incremental vacuum', 'PRAGMA auto_vacuum=INCREMENTAL', 'VACUUM')
+
+    if analyze:
+        step('analyze', 'ANALYZE')
+    else:
+        step('optimize', 'PRAGMA optimize')
+
+    with connection.cursor() as cursor:
+        incremental = _pragma(cursor, 'auto_vacuum') == 2
+    if incremental:
+        pages = '' if vacuum_pages is None else f'({int(vacuum_pages)})'
+        step('incremental vacuum', f'PRAGMA incremental_vacuum{pages}')
+
+    if checkpoint:
+        step('wal checkpoint', 'PRAGMA wal_checkpoint(TRUNCATE)')
+    return steps
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tasks.archive import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE, archivable_tasks, archive_tasks
+
+
+class Command(BaseCommand):
+    help = 'Move completed tasks (with subtasks and notes) older than N days to the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=ARCHIVE_AFTER_DAYS,
+                            help='Archive completed tasks not updated for this many days')
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE,
+                            help='Tasks moved per transaction')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only count the tasks that would be archived')
+        parser.add_argument('--every', type=int, default=None,
+                            help='Keep running and archive every N seconds')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = archivable_tasks(options['days']).count()
+            self.stdout.write(f'{count} tasks would be archived')
+            return
+
+        while True:
+            started = time.perf_counter()
+            moved = archive_tasks(days=options['days'], batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Archived {moved} tasks in {time.perf_counter() - started:.2f}s'
+            ))
+            if not options['every']:
+                return
+            time.sleep(options['every'])
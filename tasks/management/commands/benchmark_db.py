@@ -0,0 +1,135 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Stock SQLite as Django used it before SQLITE_PRAGMAS: rollback journal,
+# full syncs, deferred transactions
+DEFAULT_PRAGMAS = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+
+def _connect(path, pragmas):
+    # Autocommit; transactions are opened explicitly like Django does
+    conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+    for name, value in pragmas.items():
+        conn.execute(f'PRAGMA {name}={value}').fetchall()
+    return conn
+
+
+def _create(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE task (id INTEGER PRIMARY KEY, title TEXT, status TEXT, updated_at TEXT)')
+    conn.execute('CREATE INDEX task_status ON task (status, updated_at)')
+    conn.executemany(
+        'INSERT INTO task (title, status, updated_at) VALUES (?, ?, datetime())',
+        ((f'Task {i}', ('Pending', 'In Progress', 'Completed')[i % 3]) for i in range(rows)),
+    )
+    conn.commit()
+    conn.close()
+
+
+class Command(BaseCommand):
+    help = 'Compare stock and tuned SQLite settings under concurrent reads and writes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4, help='Concurrent reader threads')
+        parser.add_argument('--writers', type=int, default=2, help='Concurrent writer threads')
+        parser.add_argument('--seconds', type=float, default=5.0, help='Duration of each run')
+        parser.add_argument('--rows', type=int, default=50000, help='Rows in the scratch table')
+
+    def run(self, path, pragmas, begin, options):
+        stop = threading.Event()
+        counts = {'reads': 0, 'writes': 0, 'locked': 0}
+        lock = threading.Lock()
+        rows = options['rows']
+
+        def count(key):
+            with lock:
+                counts[key] += 1
+
+        def reader(seed):
+            conn = _connect(path, pragmas)
+            pk = seed
+            while not stop.is_set():
+                pk = (pk * 7919 + 1) % rows + 1
+                try:
+                    conn.execute('SELECT * FROM task WHERE id = ?', [pk]).fetchall()
+                    conn.execute(
+                        'SELECT id, title FROM task WHERE status = ? ORDER BY updated_at DESC LIMIT 20',
+                        ['Pending'],
+                    ).fetchall()
+                    count('reads')
+                except sqlite3.OperationalError:
+                    count('locked')
+            conn.close()
+
+        def writer(seed):
+            # One small transaction per "request", like a create/update view
+            conn = _connect(path, pragmas)
+            pk = seed
+            while not stop.is_set():
+                pk = (pk * 104729 + 3) % rows + 1
+                try:
+                    conn.execute(begin)
+                    conn.execute("UPDATE task SET status = 'In Progress', updated_at = datetime() WHERE id = ?", [pk])
+                    conn.execute("INSERT INTO task (title, status, updated_at) VALUES ('new', 'Pending', datetime())")
+                    conn.execute('COMMIT')
+                    count('writes')
+                except sqlite3.OperationalError:
+                    if conn.in_transaction:
+                        conn.execute('ROLLBACK')
+                    count('locked')
+            conn.close()
+
+        threads = [threading.Thread(target=reader, args=(i,)) for i in range(options['readers'])]
+        threads += [threading.Thread(target=writer, args=(i,)) for i in range(options['writers'])]
+        for thread in threads:
+            thread.start()
+        time.sleep(options['seconds'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return {key: value / options['seconds'] for key, value in counts.items()}
+
+    def connect_cost(self, path, pragmas, repeat=200):
+        """Seconds per request for opening a connection vs reusing one"""
+        started = time.perf_counter()
+        for _ in range(repeat):
+            conn = _connect(path, pragmas)
+            conn.execute('SELECT 1 FROM task WHERE id = 1').fetchall()
+            conn.close()
+        reopen = (time.perf_counter() - started) / repeat
+
+        conn = _connect(path, pragmas)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            conn.execute('SELECT 1 FROM task WHERE id = 1').fetchall()
+        reuse = (time.perf_counter() - started) / repeat
+        conn.close()
+        return reopen, reuse
+
+    def handle(self, *args, **options):
+        configurations = [
+            ('stock', DEFAULT_PRAGMAS, 'BEGIN'),
+            ('tuned', settings.SQLITE_PRAGMAS, 'BEGIN IMMEDIATE'),
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            for name, pragmas, begin in configurations:
+                path = os.path.join(directory, f'{name}.sqlite3')
+                _create(path, options['rows'])
+                rates = self.run(path, pragmas, begin, options)
+                self.stdout.write(
+                    f'{name:>6}: {rates["reads"]:9.0f} reads/s  {rates["writes"]:7.0f} writes/s  '
+                    f'{rates["locked"]:6.1f} locked/s'
+                )
+
+            path = os.path.join(directory, 'tuned.sqlite3')
+            reopen, reuse = self.connect_cost(path, settings.SQLITE_PRAGMAS)
+            self.stdout.write(
+                f'connection per request: {reopen * 1000:.3f} ms, '
+                f'persistent connection: {reuse * 1000:.3f} ms'
+            )
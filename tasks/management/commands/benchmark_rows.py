@@ -0,0 +1,88 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory, override_settings
+
+from tasks.views import TaskListView, SubTaskListView, NoteListView
+
+LISTS = {
+    'tasks': TaskListView,
+    'subtasks': SubTaskListView,
+    'notes': NoteListView,
+}
+
+# The list pages with the row fragment cache replaced by one that never hits
+UNCACHED = {
+    **settings.CACHES,
+    'template_fragments': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+class Command(BaseCommand):
+    help = 'Per-row render cost of the task, subtask and note tables with and without the row fragment cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('lists', nargs='*', default=list(LISTS), help=f'Tables to render: {", ".join(LISTS)}')
+        parser.add_argument('--rows', type=int, default=100, help='Rows per page')
+        parser.add_argument('--repeat', type=int, default=20, help='Renders per measurement')
+        parser.add_argument('--user', default=None,
+                            help='Username to render the pages for (default: the first superuser)')
+
+    def page(self, view_class, user, rows):
+        """Template and context of the first page, with the rows already loaded"""
+        # Cursor pages are not cached per query string, so the page size counts
+        request = RequestFactory().get('/', {'cursor': ''})
+        request.user = user
+        response = view_class.as_view(paginate_by=rows)(request)
+        context = dict(response.context_data)
+        context[view_class.context_object_name] = list(context[view_class.context_object_name])
+        return response.resolve_template(response.template_name), context, request
+
+    def render_time(self, page, repeat, before=None):
+        template, context, request = page
+        timings = []
+        for _ in range(repeat):
+            if before:
+                before()
+            started = time.perf_counter()
+            template.render(context, request)
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
+
+    def per_row(self, view_class, user, rows, repeat, before=None):
+        # Subtract a one-row page so the rest of the page does not count
+        one = self.render_time(self.page(view_class, user, 1), repeat, before)
+        page = self.page(view_class, user, rows)
+        shown = len(page[1][view_class.context_object_name])
+        if shown < 2:
+            raise CommandError(f'Not enough rows to measure {view_class.__name__}')
+        return (self.render_time(page, repeat, before) - one) / (shown - 1), shown
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.all()
+        user = (users.filter(username=options['user']) if options['user']
+                else users.filter(is_superuser=True)).order_by('pk').first()
+        if user is None:
+            raise CommandError('No user to render for; pass --user or create a superuser.')
+
+        unknown = set(options['lists']) - set(LISTS)
+        if unknown:
+            raise CommandError(f'Unknown tables: {", ".join(sorted(unknown))}')
+
+        for name in options['lists']:
+            view_class = LISTS[name]
+            args = (view_class, user, options['rows'], options['repeat'])
+            with override_settings(CACHES=UNCACHED):
+                uncached, shown = self.per_row(*args)
+            fragments = caches['template_fragments']
+            missed, _ = self.per_row(*args, before=fragments.clear)
+            fragments.clear()
+            hit, _ = self.per_row(*args)
+            self.stdout.write(
+                f'{name:<9} {shown:>4} rows  uncached {uncached * 1e6:7.1f} us/row  '
+                f'miss {missed * 1e6:7.1f} us/row  hit {hit * 1e6:7.1f} us/row'
+            )
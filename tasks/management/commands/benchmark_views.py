@@ -0,0 +1,152 @@
+import asyncio
+import io
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+DEFAULT_PATHS = ['/', '/tasks/', '/subtasks/', '/notes/']
+
+
+def _session_cookie(user):
+    """Cookie header of a fresh session logged in as ``user``"""
+    engine = import_string(f'{settings.SESSION_ENGINE}.SessionStore')
+    session = engine()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+class Command(BaseCommand):
+    help = 'Compare p50/p99 latency of the list pages served through the WSGI and the ASGI entry points'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', default=DEFAULT_PATHS, help='Pages to request')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per page and entry point')
+        parser.add_argument('--concurrency', type=int, default=8,
+                            help='Requests in flight (WSGI worker threads / concurrent ASGI requests)')
+        parser.add_argument('--cold', action='store_true',
+                            help='Clear the cache before every request, so each one runs its queries')
+        parser.add_argument('--user', default=None,
+                            help='Username to log in as (default: the first superuser)')
+
+    def wsgi_request(self, application, path, cookie):
+        path, _, query = path.partition('?')
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+            'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': 'localhost', 'HTTP_COOKIE': cookie,
+            'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+            'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+        }
+        statuses = []
+        body = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+        try:
+            for _ in body:
+                pass
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+        return int(statuses[0].split()[0])
+
+    async def asgi_request(self, application, path, cookie):
+        path, _, query = path.partition('?')
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'root_path': '',
+            'query_string': query.encode(), 'server': ('localhost', 80), 'client': ('127.0.0.1', 0),
+            'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode())],
+        }
+        status = None
+        finished = asyncio.Event()
+        requested = False
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            # Django listens for a client disconnect while the view runs
+            await finished.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif not message.get('more_body'):
+                finished.set()
+
+        await application(scope, receive, send)
+        await finished.wait()
+        return status
+
+    def timed(self, request, cold):
+        if cold:
+            cache.clear()
+        started = time.perf_counter()
+        status = request()
+        if status != 200:
+            raise CommandError(f'Unexpected status {status}')
+        return time.perf_counter() - started
+
+    def run_wsgi(self, application, path, cookie, options):
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            return list(pool.map(
+                lambda _: self.timed(lambda: self.wsgi_request(application, path, cookie), options['cold']),
+                range(options['requests']),
+            ))
+
+    async def run_asgi(self, application, path, cookie, options):
+        slots = asyncio.Semaphore(options['concurrency'])
+
+        async def one():
+            async with slots:
+                if options['cold']:
+                    cache.clear()
+                started = time.perf_counter()
+                status = await self.asgi_request(application, path, cookie)
+                if status != 200:
+                    raise CommandError(f'Unexpected status {status} from {path}')
+                return time.perf_counter() - started
+
+        return await asyncio.gather(*(one() for _ in range(options['requests'])))
+
+    def report(self, name, path, latencies):
+        self.stdout.write(
+            f'{name:>4} {path:<12} p50 {_percentile(latencies, 50) * 1000:8.2f} ms  '
+            f'p99 {_percentile(latencies, 99) * 1000:8.2f} ms  '
+            f'mean {statistics.mean(latencies) * 1000:8.2f} ms'
+        )
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.all()
+        user = (users.filter(username=options['user']) if options['user']
+                else users.filter(is_superuser=True)).order_by('pk').first()
+        if user is None:
+            raise CommandError('No user to log in as; pass --user or create a superuser.')
+        cookie = _session_cookie(user)
+
+        from hangarin_project.asgi import application as asgi_application
+        from hangarin_project.wsgi import application as wsgi_application
+
+        for path in options['paths']:
+            # One warm-up request each: URL resolvers, templates, connections
+            self.wsgi_request(wsgi_application, path, cookie)
+            asyncio.run(self.asgi_request(asgi_application, path, cookie))
+
+            self.report('wsgi', path, self.run_wsgi(wsgi_application, path, cookie, options))
+            self.report('asgi', path, asyncio.run(self.run_asgi(asgi_application, path, cookie, options)))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.maintenance import database_status, run_maintenance
+
+
+def _megabytes(value):
+    return f'{value / 1024 / 1024:.1f} MB'
+
+
+class Command(BaseCommand):
+    help = 'Refresh SQLite planner statistics, return free pages and checkpoint the WAL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true',
+                            help='Run a full ANALYZE instead of PRAGMA optimize')
+        parser.add_argument('--vacuum-pages', type=int, default=None,
+                            help='Free pages to return per run (default: all)')
+        parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                            help='Switch the database to auto_vacuum=INCREMENTAL (one full VACUUM)')
+        parser.add_argument('--no-checkpoint', action='store_true',
+                            help='Leave the write-ahead log as it is')
+
+    def handle(self, *args, **options):
+        before = database_status()
+        try:
+            steps = run_maintenance(
+                analyze=options['analyze'],
+                vacuum_pages=options['vacuum_pages'],
+                enable_incremental_vacuum=options['enable_incremental_vacuum'],
+                checkpoint=not options['no_checkpoint'],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        after = database_status()
+
+        for name, seconds in steps:
+            self.stdout.write(f'{name}: {seconds:.2f}s')
+        self.stdout.write(
+            f'journal_mode={after["journal_mode"]} auto_vacuum={after["auto_vacuum"]} '
+            f'size {_megabytes(before["size_bytes"])} -> {_megabytes(after["size_bytes"])}, '
+            f'free {_megabytes(before["free_bytes"])} -> {_megabytes(after["free_bytes"])}'
+        )
+        if after['auto_vacuum'] != 'INCREMENTAL' and after['free_bytes']:
+            self.stdout.write(self.style.WARNING(
+                'Free pages are only returned with auto_vacuum=INCREMENTAL; '
+                'run once with --enable-incremental-vacuum'
+            ))
+        self.stdout.write(self.style.SUCCESS('Database maintenance finished'))
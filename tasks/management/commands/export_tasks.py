@@ -0,0 +1,45 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from tasks.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, stream_export
+from tasks.filters import DEFAULT_TASK_SORT, TASK_SORTS, filter_tasks, sort_tasks
+from tasks.models import Task
+
+
+class Command(BaseCommand):
+    help = 'Stream tasks with their subtasks and notes to CSV or JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--output', '-o', default='-',
+                            help='File to write to, "-" for standard output')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+                            help='Tasks read (and prefetched) per query')
+        parser.add_argument('--search', '-q', default='', help='Full-text search, as on the task list')
+        parser.add_argument('--status', default='')
+        parser.add_argument('--priority', default='', help='Priority name or id')
+        parser.add_argument('--category', default='', help='Category name or id')
+        parser.add_argument('--sort-by', choices=TASK_SORTS, default=DEFAULT_TASK_SORT)
+
+    def handle(self, *args, **options):
+        params = {
+            'q': options['search'],
+            'status': options['status'],
+            'priority': options['priority'],
+            'category': options['category'],
+        }
+        tasks = sort_tasks(filter_tasks(Task.objects.all(), params), options['sort_by'])
+        chunks = stream_export(tasks, options['format'], chunk_size=options['chunk_size'])
+
+        if options['output'] == '-':
+            for chunk in chunks:
+                sys.stdout.write(chunk)
+            return
+
+        lines = 0
+        with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+            for chunk in chunks:
+                output.write(chunk)
+                lines += 1
+        self.stderr.write(self.style.SUCCESS(f'Wrote {lines} lines to {options["output"]}'))
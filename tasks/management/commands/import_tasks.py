@@ -0,0 +1,63 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.importer import IMPORT_BATCH_SIZE, IMPORT_FORMATS, TaskImporter, read_records
+
+
+class Command(BaseCommand):
+    help = 'Import tasks with their subtasks and notes from CSV or JSON Lines (as written by export_tasks)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to read, "-" for standard input')
+        parser.add_argument('--format', choices=IMPORT_FORMATS,
+                            help='Input format; guessed from the file extension when omitted')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+                            help='Tasks validated and written per transaction')
+        parser.add_argument('--upsert', action='store_true',
+                            help='Replace tasks whose external_id already exists instead of rejecting them')
+        parser.add_argument('--errors', default=None,
+                            help='JSON Lines file for rejected records (default: <path>.errors.jsonl)')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        errors_path = options['errors'] or (
+            'import-errors.jsonl' if path == '-' else f'{path}.errors.jsonl'
+        )
+
+        error_file = None
+
+        def on_error(line, messages, record):
+            nonlocal error_file
+            if error_file is None:
+                error_file = open(errors_path, 'w', encoding='utf-8')
+            error_file.write(json.dumps({'line': line, 'errors': messages, 'record': record},
+                                        ensure_ascii=False, default=str) + '\n')
+
+        stream = sys.stdin if path == '-' else open(path, encoding='utf-8', newline='')
+        importer = TaskImporter(batch_size=options['batch_size'], upsert=options['upsert'], on_error=on_error)
+        started = time.perf_counter()
+        try:
+            counts = importer.run(read_records(stream, fmt))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if error_file is not None:
+                error_file.close()
+
+        elapsed = time.perf_counter() - started
+        rows = counts['created'] + counts['updated'] + counts['subtasks'] + counts['notes']
+        self.stdout.write(
+            f"Tasks created: {counts['created']}, updated: {counts['updated']}, "
+            f"subtasks: {counts['subtasks']}, notes: {counts['notes']}"
+        )
+        self.stdout.write(f'{rows} rows in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)')
+        if counts['errors']:
+            self.stdout.write(self.style.WARNING(f"{counts['errors']} records rejected, see {errors_path}"))
+        else:
+            self.stdout.write(self.style.SUCCESS('Import finished without errors'))
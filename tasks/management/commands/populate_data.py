@@ -8,8 +8,6 @@ class Command(BaseCommand):
     
     def handle(self, *args, **options):
         fake = Faker()
-    
-        Category.objects.get_or_create(name=c)
         
         # Get all priorities and categories
         all_priorities = list(Priority.objects.all())
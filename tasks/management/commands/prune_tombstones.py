@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from tasks.sync import TOMBSTONE_RETENTION, prune_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Delete sync tombstones older than the retention window'
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(
+            f'Removed {deleted} tombstones older than {TOMBSTONE_RETENTION.days} days'
+        ))
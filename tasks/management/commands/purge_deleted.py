@@ -0,0 +1,31 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tasks.bulk import PURGE_BATCH_SIZE, purge_deleted
+
+
+class Command(BaseCommand):
+    help = 'Physically remove soft-deleted tasks, subtasks, notes, categories and priorities in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=0,
+                            help='Only purge rows deleted at least this many hours ago')
+        parser.add_argument('--batch-size', type=int, default=PURGE_BATCH_SIZE,
+                            help='Rows deleted per transaction')
+        parser.add_argument('--pause', type=float, default=0.05,
+                            help='Seconds to sleep between batches so other writers get the lock')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        counts = purge_deleted(
+            before=timezone.now() - timedelta(hours=options['older_than']),
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+        )
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Purged {summary} in {time.perf_counter() - started:.2f}s'
+        ))
@@ -0,0 +1,48 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from tasks.cache import bump_generation
+from tasks.models import Task, Category, Priority, SubTask, Note
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database to the local read replica with the online backup API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=int, default=None,
+                            help='Keep running and refresh every N seconds (keep below REPLICA_MAX_LAG)')
+
+    def refresh(self):
+        primary = connections['default']
+        if primary.vendor != 'sqlite':
+            raise CommandError('The local replica can only be refreshed from a SQLite primary.')
+        primary.ensure_connection()
+
+        started = time.perf_counter()
+        target = sqlite3.connect(settings.REPLICA_PATH)
+        try:
+            # One step: a consistent snapshot that, under WAL, never blocks
+            # writers on the primary
+            primary.connection.backup(target)
+        finally:
+            target.close()
+
+        # Pages and dashboards cached from the previous copy are stale now
+        bump_generation(Task, Category, Priority, SubTask, Note)
+        return time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        created = not settings.REPLICA_PATH.exists()
+        seconds = self.refresh()
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {settings.REPLICA_PATH} in {seconds:.2f}s'))
+        if created:
+            self.stdout.write(self.style.WARNING('Replica created; restart the app to start reading from it'))
+
+        while options['every']:
+            time.sleep(options['every'])
+            seconds = self.refresh()
+            self.stdout.write(f'Refreshed in {seconds:.2f}s')
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from tasks.search import rebuild_search_index, search_available
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for tasks, subtasks and notes'
+
+    def handle(self, *args, **options):
+        if not search_available():
+            self.stdout.write(self.style.ERROR('The full-text index is only available on SQLite.'))
+            return
+
+        counts = rebuild_search_index()
+        for entity, count in counts.items():
+            self.stdout.write(f'Indexed {count} {entity} rows')
+        self.stdout.write(self.style.SUCCESS('Successfully rebuilt the search index'))
@@ -0,0 +1,85 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections
+from django.utils import timezone
+
+from tasks import worker
+from tasks.jobs import claim_job, fail_job, requeue_stale_jobs, worker_name
+from tasks.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (exports, imports, stats rebuilds, archival, bulk changes) in a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2, help='Jobs run at the same time')
+        parser.add_argument('--poll', type=float, default=1.0,
+                            help='Seconds between looks at the queue when it is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the queue is empty instead of waiting for more jobs')
+
+    def heartbeat(self, running):
+        """Mark the jobs running here as alive, even those that report no progress"""
+        try:
+            Job.objects.filter(pk__in=[job.pk for job in running.values()]).update(
+                heartbeat_at=timezone.now(),
+            )
+        except OperationalError:
+            pass
+
+    def start_jobs(self, name, pool, running, processes):
+        # Heartbeat first, and never sweep our own jobs: a long wait for the
+        # write lock must not get them requeued while they still run here
+        self.heartbeat(running)
+        requeue_stale_jobs(exclude=[job.pk for job in running.values()])
+        while len(running) < processes:
+            job = claim_job(name)
+            if job is None:
+                return
+            self.stdout.write(f'Started {job}')
+            running[pool.submit(worker.execute, job.pk)] = job
+
+    def handle(self, *args, **options):
+        name = worker_name()
+        running = {}
+        # Children start with no database connection of their own to inherit
+        connections.close_all()
+        pool = ProcessPoolExecutor(
+            max_workers=options['processes'],
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=worker.init_process,
+        )
+        self.stdout.write(f'Worker {name} running {options["processes"]} processes')
+        try:
+            while True:
+                try:
+                    self.start_jobs(name, pool, running, options['processes'])
+                except OperationalError as exc:
+                    # A job holds the write lock; claim again on the next round
+                    self.stdout.write(self.style.WARNING(f'Queue busy: {exc}'))
+
+                if not running:
+                    if options['once']:
+                        return
+                    time.sleep(options['poll'])
+                    continue
+
+                done, _ = wait(running, timeout=options['poll'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = running.pop(future)
+                    try:
+                        succeeded = future.result()
+                    except Exception as exc:
+                        # The process died (or the job could not be sent to it)
+                        fail_job(job, f'{type(exc).__name__}: {exc}')
+                        succeeded = False
+                    job.refresh_from_db()
+                    style = self.style.SUCCESS if succeeded else self.style.WARNING
+                    self.stdout.write(style(f'Finished {job}'))
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping; unfinished jobs are retried after JOB_STALE_AFTER')
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
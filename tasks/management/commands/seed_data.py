@@ -0,0 +1,163 @@
+import random
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+
+from tasks.bulk import manual_timestamps
+from tasks.cache import bump_generation
+from tasks.models import Task, Category, Priority, Note, SubTask
+from tasks.stats import apply_counter_delta, note_counter_keys, subtask_counter_keys, task_counter_keys
+
+PRIORITIES = ['Critical', 'High', 'Medium', 'Low', 'Optional']
+CATEGORIES = ['Work', 'School', 'Personal', 'Finance', 'Projects']
+
+# Roughly what a long-lived production database looks like: most work is
+# done, a fair share is still open
+STATUS_WEIGHTS = {'Completed': 6, 'Pending': 3, 'In Progress': 1}
+
+# Faker is far too slow to call per row at this scale, so a pool of texts is
+# generated once from the seed and rows pick from it
+TEXT_POOL_SIZE = 5000
+
+# Tasks are spread over this many days before "now", deadlines up to a month
+# either side of their creation date
+HISTORY_DAYS = 730
+DEADLINE_SPREAD_DAYS = 30
+
+
+class Command(BaseCommand):
+    help = 'Generate a large, reproducible dataset with bulk inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=10000,
+                            help='Number of tasks to create')
+        parser.add_argument('--subtasks-per-task', type=int, default=3,
+                            help='Subtasks created for every task')
+        parser.add_argument('--notes-per-task', type=int, default=2,
+                            help='Notes created for every task')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Random seed; the same seed produces the same data (dates are relative to today)')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Tasks inserted (with their subtasks and notes) per transaction')
+
+    def handle(self, *args, **options):
+        for option in ['tasks', 'subtasks_per_task', 'notes_per_task']:
+            if options[option] < 0:
+                raise CommandError(f'--{option.replace("_", "-")} must not be negative')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        self.rng = random.Random(options['seed'])
+        fake = Faker()
+        fake.seed_instance(options['seed'])
+        self.titles = [fake.sentence(nb_words=5).rstrip('.') for _ in range(TEXT_POOL_SIZE)]
+        self.subtitles = [fake.sentence(nb_words=4).rstrip('.') for _ in range(TEXT_POOL_SIZE)]
+        self.paragraphs = [fake.paragraph(nb_sentences=3) for _ in range(TEXT_POOL_SIZE)]
+        self.statuses = list(STATUS_WEIGHTS)
+        self.weights = list(STATUS_WEIGHTS.values())
+        self.now = timezone.now()
+
+        priorities, categories = self.lookups()
+        total, batch_size = options['tasks'], options['batch_size']
+        rows = 0
+        self.delta = Counter()
+        started = time.perf_counter()
+
+        with manual_timestamps(Task, SubTask, Note):
+            for offset in range(0, total, batch_size):
+                count = min(batch_size, total - offset)
+                batch_started = time.perf_counter()
+                batch_rows = self.create_batch(
+                    count, priorities, categories,
+                    options['subtasks_per_task'], options['notes_per_task'],
+                )
+                rows += batch_rows
+                elapsed = time.perf_counter() - batch_started
+                self.stdout.write(
+                    f'{offset + count}/{total} tasks, {batch_rows} rows in {elapsed:.2f}s '
+                    f'({batch_rows / elapsed:,.0f} rows/s)'
+                )
+
+        # bulk_create skips the save signals, so the dashboard rollup and the
+        # caches are brought up to date here. The rollup only has a few keys
+        # per day, so one update at the end is much cheaper than one per
+        # batch; if the run is interrupted, `rebuild_stats` repairs it.
+        apply_counter_delta(self.delta)
+        bump_generation(Task, SubTask, Note, Category, Priority)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {rows} rows in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)'
+        ))
+
+    def lookups(self):
+        """Make sure the usual priorities and categories exist and return their ids"""
+        for rank, name in enumerate(PRIORITIES, start=1):
+            Priority.objects.get_or_create(name=name, defaults={'order': rank})
+        for name in CATEGORIES:
+            Category.objects.get_or_create(name=name)
+        return (
+            list(Priority.objects.values_list('id', flat=True)),
+            list(Category.objects.values_list('id', flat=True)),
+        )
+
+    def timestamp(self, days):
+        return self.now - timedelta(seconds=self.rng.randrange(days * 86400))
+
+    def create_batch(self, count, priorities, categories, subtasks_per_task, notes_per_task):
+        rng = self.rng
+        tasks = []
+        for _ in range(count):
+            created_at = self.timestamp(HISTORY_DAYS)
+            deadline = None
+            if rng.random() < 0.9:
+                deadline = created_at + timedelta(
+                    seconds=rng.randrange(-DEADLINE_SPREAD_DAYS, DEADLINE_SPREAD_DAYS) * 86400
+                    + rng.randrange(86400)
+                )
+            tasks.append(Task(
+                title=rng.choice(self.titles),
+                description=rng.choice(self.paragraphs),
+                status=rng.choices(self.statuses, self.weights)[0],
+                deadline=deadline,
+                priority_id=rng.choice(priorities),
+                category_id=rng.choice(categories),
+                created_at=created_at,
+                updated_at=created_at,
+            ))
+
+        delta = self.delta
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks)
+            subtasks, notes = [], []
+            for task in tasks:
+                delta.update(task_counter_keys(
+                    task.status, task.priority_id, task.category_id, task.created_at, task.deadline,
+                ))
+                for _ in range(subtasks_per_task):
+                    subtask = SubTask(
+                        task_id=task.pk,
+                        title=rng.choice(self.subtitles),
+                        status=rng.choices(self.statuses, self.weights)[0],
+                        created_at=task.created_at,
+                        updated_at=task.created_at,
+                    )
+                    subtasks.append(subtask)
+                    delta.update(subtask_counter_keys(subtask.status))
+                for _ in range(notes_per_task):
+                    created_at = min(task.created_at + timedelta(seconds=rng.randrange(7 * 86400)), self.now)
+                    notes.append(Note(
+                        task_id=task.pk,
+                        content=rng.choice(self.paragraphs),
+                        created_at=created_at,
+                        updated_at=created_at,
+                    ))
+                    delta.update(note_counter_keys(created_at))
+            SubTask.objects.bulk_create(subtasks)
+            Note.objects.bulk_create(notes)
+        return len(tasks) + len(subtasks) + len(notes)
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:43
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def _grouped(queryset, dimension, expression):
+    counts = Counter()
+    for row in queryset.order_by().values(group=expression).annotate(n=Count('pk')):
+        key = row['group']
+        if key is not None:
+            counts[dimension, key.isoformat() if hasattr(key, 'isoformat') else str(key)] += row['n']
+    return counts
+
+
+def fill_counters(apps, schema_editor):
+    """
+    Start the rollup from the rows already in the database. The keys are
+    those of tasks.stats as of this migration, spelled out here so later
+    changes to that module cannot break it.
+    """
+    Task = apps.get_model('tasks', 'Task')
+    SubTask = apps.get_model('tasks', 'SubTask')
+    Note = apps.get_model('tasks', 'Note')
+    DashboardCounter = apps.get_model('tasks', 'DashboardCounter')
+    tz = timezone.get_current_timezone()
+
+    tasks = Task.objects.all()
+    with_deadline = tasks.filter(deadline__isnull=False)
+    counts = Counter({
+        ('task_total', 'all'): tasks.count(),
+        ('subtask_total', 'all'): SubTask.objects.count(),
+        ('note_total', 'all'): Note.objects.count(),
+    })
+    counts += _grouped(tasks, 'task_status', F('status'))
+    counts += _grouped(tasks, 'task_priority', F('priority_id'))
+    counts += _grouped(tasks, 'task_category', F('category_id'))
+    counts += _grouped(tasks, 'task_created', TruncDate('created_at', tzinfo=tz))
+    counts += _grouped(with_deadline, 'task_deadline', TruncDate('deadline', tzinfo=tz))
+    counts += _grouped(
+        with_deadline.exclude(status='Completed'), 'task_open_deadline', TruncDate('deadline', tzinfo=tz),
+    )
+    counts += _grouped(SubTask.objects.all(), 'subtask_status', F('status'))
+    counts += _grouped(Note.objects.all(), 'note_created', TruncDate('created_at', tzinfo=tz))
+
+    DashboardCounter.objects.bulk_create(
+        [DashboardCounter(dimension=dimension, key=key, count=count) for (dimension, key), count in counts.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_alter_category_options_alter_note_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(max_length=50)),
+                ('key', models.CharField(max_length=100)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Dashboard Counter',
+                'verbose_name_plural': 'Dashboard Counters',
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'key'), name='unique_dashboard_counter')],
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
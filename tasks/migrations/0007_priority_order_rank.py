@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:50
+
+from django.db import migrations, models
+
+# Rank the list view used to hard-code before Priority.order was used
+DEFAULT_RANKS = {'Critical': 1, 'High': 2, 'Medium': 3, 'Low': 4, 'Optional': 5}
+
+
+def rank_unordered_priorities(apps, schema_editor):
+    """Give priorities a meaningful order if it was never set (all zero)"""
+    Priority = apps.get_model('tasks', 'Priority')
+    if Priority.objects.exclude(order=0).exists():
+        return
+    priorities = sorted(Priority.objects.all(), key=lambda p: (DEFAULT_RANKS.get(p.name, len(DEFAULT_RANKS) + 1), p.name))
+    for rank, priority in enumerate(priorities, start=1):
+        priority.order = rank
+    Priority.objects.bulk_update(priorities, ['order'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_task_status_count_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='priority',
+            name='order',
+            field=models.IntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(rank_unordered_priorities, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:52
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_priority_order_rank'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(django.db.models.functions.text.Lower('title'), name='task_title_lower_idx'),
+        ),
+    ]
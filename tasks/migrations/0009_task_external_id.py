@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_task_title_lower_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='external_id',
+            field=models.CharField(blank=True, editable=False, max_length=100, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(condition=models.Q(('external_id__isnull', False)), fields=('external_id',), name='unique_task_external_id'),
+        ),
+    ]
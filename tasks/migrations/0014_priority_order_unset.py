@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0013_jobs'),
+    ]
+
+    operations = [
+        # Python-side defaults are not part of the schema; on SQLite a plain
+        # AlterField would still rebuild tasks_priority for nothing
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='priority',
+                    name='order',
+                    field=models.IntegerField(db_index=True, default=None),
+                ),
+            ],
+        ),
+    ]
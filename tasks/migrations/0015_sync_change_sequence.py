@@ -0,0 +1,112 @@
+# Commit-ordered change feed for the sync API (SQLite)
+#
+# Every insert or update of a synced table takes the next number from the
+# one-row tasks_changesequence table and stores it in the row's change_seq,
+# from triggers so every write path (forms, admin, bulk updates, raw SQL) is
+# covered. SQLite lets one writer at a time hold the write lock until it
+# commits, so numbers are handed out in commit order and a client that has
+# read up to N can never miss a row numbered below N later on. The triggers
+# rely on recursive_triggers being off (SQLite's default): their own UPDATE
+# of change_seq must not fire them again.
+#
+# Like the search triggers of 0004, these are lost if a later migration
+# makes SQLite rebuild one of the tables. Other database backends skip this.
+
+from django.db import migrations, models
+
+SEQUENCE_TABLE = 'tasks_changesequence'
+
+# Synced table and the column existing rows are numbered by
+CHANGE_FEED_TABLES = {
+    'tasks_task': 'updated_at',
+    'tasks_subtask': 'updated_at',
+    'tasks_note': 'updated_at',
+    'tasks_tombstone': 'deleted_at',
+}
+
+
+def _trigger_statements(table):
+    stamp = (
+        f"UPDATE {SEQUENCE_TABLE} SET value = value + 1; "
+        f"UPDATE {table} SET change_seq = (SELECT value FROM {SEQUENCE_TABLE}) WHERE id = new.id; "
+    )
+    return [
+        f"CREATE TRIGGER {table}_seq_ai AFTER INSERT ON {table} BEGIN {stamp}END",
+        f"CREATE TRIGGER {table}_seq_au AFTER UPDATE ON {table} BEGIN {stamp}END",
+    ]
+
+
+def create_change_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f'CREATE TABLE {SEQUENCE_TABLE} (id integer NOT NULL PRIMARY KEY CHECK (id = 1), value integer NOT NULL)'
+    )
+    schema_editor.execute(f'INSERT INTO {SEQUENCE_TABLE} (id, value) VALUES (1, 0)')
+    # Number the existing rows in the order they last changed
+    for table, stamp in CHANGE_FEED_TABLES.items():
+        schema_editor.execute(
+            f'UPDATE {table} SET change_seq = (SELECT value FROM {SEQUENCE_TABLE}) + ranked.n '
+            f'FROM (SELECT id, ROW_NUMBER() OVER (ORDER BY {stamp}, id) AS n FROM {table}) AS ranked '
+            f'WHERE {table}.id = ranked.id'
+        )
+        schema_editor.execute(f'UPDATE {SEQUENCE_TABLE} SET value = value + (SELECT COUNT(*) FROM {table})')
+    for table in CHANGE_FEED_TABLES:
+        for statement in _trigger_statements(table):
+            schema_editor.execute(statement)
+
+
+def drop_change_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table in CHANGE_FEED_TABLES:
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {table}_seq_ai')
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {table}_seq_au')
+    schema_editor.execute(f'DROP TABLE IF EXISTS {SEQUENCE_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0014_priority_order_unset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='change_seq',
+            field=models.BigIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='subtask',
+            name='change_seq',
+            field=models.BigIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='change_seq',
+            field=models.BigIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='change_seq',
+            field=models.BigIntegerField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['change_seq'], name='note_change_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subtask',
+            index=models.Index(fields=['change_seq'], name='subtask_change_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['change_seq'], name='task_change_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['change_seq'], name='tombstone_change_seq_idx'),
+        ),
+        migrations.RunPython(create_change_sequence, drop_change_sequence),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Case, Count, Max, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Lower, Now
 from django.utils import timezone
 from django.urls import reverse
 
@@ -9,29 +11,109 @@ class BaseModel(models.Model):
     class Meta:
         abstract = True
 
-class Priority(models.Model):
-    name = models.CharField(max_length=100)
-    order = models.IntegerField(default=0)
+class SoftDeleteManager(models.Manager):
+    """Default manager of soft-deletable models: rows flagged as deleted are left out"""
+    
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+class SoftDeleteModel(models.Model):
+    """
+    Soft delete, used by the task, category and priority delete views and
+    the bulk delete action. Subtasks and notes are only soft-deleted along
+    with their task; deleting one on its own (SubTaskDeleteView,
+    NoteDeleteView) removes the row for good.
+    
+    Setting ``deleted_at`` hides a row from ``objects`` (and so from every
+    list, form, count and the sync feed); ``all_objects`` still sees it.
+    Deleting then costs one indexed UPDATE per table, see
+    ``tasks.bulk.soft_delete_tasks``, and ``purge_deleted`` removes the rows
+    later in small batches.
+    """
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+    
+    objects = SoftDeleteManager()
+    all_objects = models.Manager()
+    
+    class Meta:
+        abstract = True
+
+class ChangeFeedModel(models.Model):
+    """
+    Rows served by the sync API (``tasks.sync.changes_since``).
+
+    ``change_seq`` is the row's position in the change feed. SQLite triggers
+    (migration 0015) stamp it from a single counter on every insert and
+    update, after the application wrote the row. Writers are serialised, so
+    the numbers are handed out in commit order: once a reader sees a
+    number, every smaller one is already committed, which ``updated_at``
+    (stamped before the commit) cannot promise.
+    """
+    change_seq = models.BigIntegerField(null=True, editable=False)
+    
+    class Meta:
+        abstract = True
+
+def deleted_index(name):
+    """Partial index over the soft-deleted rows, for purge_deleted"""
+    return models.Index(fields=['deleted_at'], condition=Q(deleted_at__isnull=False), name=name)
+
+class Priority(SoftDeleteModel):
+    name = models.CharField(max_length=100, db_index=True)
+    # Rank used everywhere priorities are sorted: lower comes first. Left
+    # unset, save() ranks a new priority after the existing ones.
+    order = models.IntegerField(default=None, db_index=True)
     
     class Meta:
         verbose_name = "Priority"
         verbose_name_plural = "Priorities"
         ordering = ['order']
+        indexes = [deleted_index('priority_deleted_idx')]
     
     def __str__(self):
         return self.name
+    
+    def save(self, *args, **kwargs):
+        # A new priority without a rank goes after the existing ones
+        if self._state.adding and self.order is None:
+            last = Priority.all_objects.aggregate(last=Max('order'))['last']
+            self.order = (last or 0) + 1
+        super().save(*args, **kwargs)
 
-class Category(models.Model):
-    name = models.CharField(max_length=100)
+class Category(SoftDeleteModel):
+    name = models.CharField(max_length=100, db_index=True)
     
     class Meta:
         verbose_name = "Category"
         verbose_name_plural = "Categories"
+        indexes = [deleted_index('category_deleted_idx')]
     
     def __str__(self):
         return self.name
 
-class Task(BaseModel):
+class TaskQuerySet(models.QuerySet):
+    def for_listing(self):
+        """
+        Tasks ready to be rendered in a list: priority and category joined,
+        subtask progress and the overdue flag computed in SQL, and the large
+        description column deferred. A page of tasks then costs one query no
+        matter how many rows it shows.
+        """
+        subtasks = SubTask.objects.filter(task=OuterRef('pk')).order_by().values('task')
+        total = subtasks.annotate(n=Count('pk')).values('n')
+        completed = subtasks.filter(status='Completed').annotate(n=Count('pk')).values('n')
+        
+        return self.select_related('priority', 'category').defer('description').annotate(
+            completed_subtasks=Coalesce(Subquery(completed), 0),
+            total_subtasks=Coalesce(Subquery(total), 0),
+            overdue=Case(
+                When(Q(deadline__lt=Now()) & ~Q(status='Completed'), then=Value(True)),
+                default=Value(False),
+            ),
+        )
+
+
+class Task(SoftDeleteModel, ChangeFeedModel, BaseModel):
     STATUS_CHOICES = [
         ("Pending", "Pending"),
         ("In Progress", "In Progress"),
@@ -48,6 +130,13 @@ class Task(BaseModel):
     deadline = models.DateTimeField(null=True, blank=True)
     priority = models.ForeignKey(Priority, on_delete=models.CASCADE)
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    # Key of the task in the system it was imported from (see import_tasks)
+    external_id = models.CharField(max_length=100, null=True, blank=True, editable=False)
+    
+    objects = SoftDeleteManager.from_queryset(TaskQuerySet)()
+    
+    # ArchivedTask rows share the task list with hot tasks
+    is_archived = False
     
     def __str__(self):
         return self.title
@@ -55,24 +144,64 @@ class Task(BaseModel):
     def get_absolute_url(self):
         return reverse('admin:tasks_task_change', args=[self.id])
     
+    # The properties below prefer the values annotated by for_listing()
+    
     @property
     def is_overdue(self):
+        if 'overdue' in self.__dict__:
+            return self.overdue
         if self.deadline:
             return self.deadline < timezone.now() and self.status != "Completed"
         return False
     
     @property
     def completed_subtasks_count(self):
+        if 'completed_subtasks' in self.__dict__:
+            return self.completed_subtasks
         return self.subtasks.filter(status="Completed").count()
     
     @property
     def total_subtasks_count(self):
+        if 'total_subtasks' in self.__dict__:
+            return self.total_subtasks
         return self.subtasks.count()
     
     class Meta:
         ordering = ['-created_at']
+        # Composite indexes match the filter + sort combinations used by
+        # TaskListView and the dashboard (see QueryPlanTests in tests.py)
+        indexes = [
+            models.Index(fields=['created_at'], name='task_created_idx'),
+            models.Index(fields=['deadline'], name='task_deadline_idx'),
+            models.Index(fields=['title'], name='task_title_idx'),
+            models.Index(fields=['status', 'created_at'], name='task_status_created_idx'),
+            models.Index(fields=['status', 'deadline'], name='task_status_deadline_idx'),
+            models.Index(fields=['category', 'created_at'], name='task_category_created_idx'),
+            models.Index(fields=['priority', 'created_at'], name='task_priority_created_idx'),
+            # Covering indexes for the per-status counts on the category/priority lists
+            models.Index(fields=['category', 'status', 'deleted_at'], condition=Q(deleted_at__isnull=True),
+                         name='task_category_status_idx'),
+            models.Index(fields=['priority', 'status', 'deleted_at'], condition=Q(deleted_at__isnull=True),
+                         name='task_priority_status_idx'),
+            # Case-insensitive title prefix lookups for the autocomplete endpoint
+            models.Index(Lower('title'), name='task_title_lower_idx'),
+            models.Index(fields=['updated_at', 'id'], name='task_updated_idx'),
+            # Change feed for the sync API
+            models.Index(fields=['change_seq'], name='task_change_seq_idx'),
+            deleted_index('task_deleted_idx'),
+        ]
+        constraints = [
+            # Partial so tasks created in the app (no external key) are not
+            # constrained, and so SQLite adds it as an index instead of
+            # rebuilding the table (which would drop the search triggers)
+            models.UniqueConstraint(
+                fields=['external_id'],
+                condition=Q(external_id__isnull=False),
+                name='unique_task_external_id',
+            ),
+        ]
 
-class SubTask(BaseModel):
+class SubTask(SoftDeleteModel, ChangeFeedModel, BaseModel):
     STATUS_CHOICES = [
         ("Pending", "Pending"),
         ("In Progress", "In Progress"),
@@ -97,8 +226,15 @@ class SubTask(BaseModel):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='subtask_created_idx'),
+            models.Index(fields=['task', 'status'], name='subtask_task_status_idx'),
+            models.Index(fields=['updated_at', 'id'], name='subtask_updated_idx'),
+            models.Index(fields=['change_seq'], name='subtask_change_seq_idx'),
+            deleted_index('subtask_deleted_idx'),
+        ]
 
-class Note(BaseModel):
+class Note(SoftDeleteModel, ChangeFeedModel, BaseModel):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='notes')
     content = models.TextField()
     
@@ -106,4 +242,182 @@ class Note(BaseModel):
         return f"Note for {self.task.title}"
     
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='note_created_idx'),
+            models.Index(fields=['task', 'created_at'], name='note_task_created_idx'),
+            models.Index(fields=['updated_at', 'id'], name='note_updated_idx'),
+            models.Index(fields=['change_seq'], name='note_change_seq_idx'),
+            deleted_index('note_deleted_idx'),
+        ]
+
+class DashboardCounter(models.Model):
+    """
+    Precomputed rollup row used by the dashboard.
+
+    Each row holds the number of objects for one ``(dimension, key)`` pair,
+    e.g. ``("task_status", "Completed")`` or ``("task_created", "2025-10-18")``.
+    Rows are maintained by the signal handlers in ``tasks.signals`` and can be
+    recomputed with the ``rebuild_stats`` management command.
+    """
+    dimension = models.CharField(max_length=50)
+    key = models.CharField(max_length=100)
+    count = models.BigIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = "Dashboard Counter"
+        verbose_name_plural = "Dashboard Counters"
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'key'], name='unique_dashboard_counter'),
+        ]
+    
+    def __str__(self):
+        return f"{self.dimension}:{self.key} = {self.count}"
+
+class Tombstone(ChangeFeedModel):
+    """
+    Record of a deleted Task, SubTask or Note, so the sync API can tell
+    clients to drop their copy. Written by the post_delete handlers in
+    ``tasks.signals`` and by the bulk delete paths, which skip signals.
+    """
+    model_name = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_idx'),
+            models.Index(fields=['change_seq'], name='tombstone_change_seq_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.model_name} {self.object_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+# Cold storage for completed tasks (see tasks.archive / archive_tasks).
+# Rows keep the ids they had in the hot tables: AUTOINCREMENT never hands
+# those out again, so links, exports and sync ids stay unambiguous.
+
+class ArchivedTask(models.Model):
+    """A completed task moved out of ``tasks_task`` by ``archive_tasks``; read only"""
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    status = models.CharField(max_length=50, choices=Task.STATUS_CHOICES)
+    deadline = models.DateTimeField(null=True, blank=True)
+    priority = models.ForeignKey(Priority, on_delete=models.CASCADE, related_name='+')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+')
+    external_id = models.CharField(max_length=100, null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+    
+    # Shown in the task list next to hot tasks (TaskListView ?archived=1)
+    is_archived = True
+    is_overdue = False
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='archivedtask_created_idx'),
+            models.Index(fields=['archived_at'], name='archivedtask_archived_idx'),
+        ]
+    
+    def __str__(self):
+        return self.title
+
+class ArchivedSubTask(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    task = models.ForeignKey(ArchivedTask, on_delete=models.CASCADE, related_name='subtasks')
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    status = models.CharField(max_length=50, choices=SubTask.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    
+    def __str__(self):
+        return self.title
+
+class ArchivedNote(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    task = models.ForeignKey(ArchivedTask, on_delete=models.CASCADE, related_name='notes')
+    content = models.TextField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"Note for {self.task.title}"
+
+class Job(models.Model):
+    """
+    Background job run by the ``run_worker`` command (see ``tasks.jobs``).
+    
+    Workers claim queued rows with a conditional UPDATE, so any number of
+    them can share the table. Progress is written to the row as the job
+    runs; failed attempts are queued again with ``run_after`` pushed back.
+    """
+    QUEUED = "Queued"
+    RUNNING = "Running"
+    SUCCEEDED = "Succeeded"
+    FAILED = "Failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+    
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    message = models.CharField(max_length=200, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    # Not claimed before this time; retries back off by moving it
+    run_after = models.DateTimeField(default=timezone.now)
+    worker = models.CharField(max_length=100, blank=True)
+    # Refreshed by the worker while the job runs; a stale one means the worker died
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Next job to claim: WHERE status = 'Queued' AND run_after <= now ORDER BY run_after, id
+            models.Index(fields=['status', 'run_after', 'id'], name='job_claim_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+    
+    @property
+    def percent(self):
+        if not self.total:
+            return None
+        return min(100, round(self.progress * 100 / self.total))
+    
+    def as_dict(self):
+        """Public state of the job, as served to the UI by JobStatusView"""
+        return {
+            'id': self.pk,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'total': self.total,
+            'percent': self.percent,
+            'message': self.message,
+            'result': self.result,
+            # Last line of the traceback only
+            'error': self.error.strip().splitlines()[-1] if self.error.strip() else None,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_after': self.run_after,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
@@ -0,0 +1,183 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from django.db.models.constants import LOOKUP_SEP
+
+
+class CursorPage:
+    """
+    One page of keyset-paginated results.
+
+    Unlike Django's Page there is no page number and no total count: the
+    page only knows whether there is something before/after it and the
+    opaque tokens that fetch those neighbours.
+    """
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.next_querystring = ''
+        self.previous_querystring = ''
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def encode_cursor(sort, value, pk, backwards=False):
+    payload = json.dumps({'s': sort, 'v': value, 'id': pk, 'b': backwards}, default=str)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Decode a cursor token, returning None for anything malformed"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(payload, dict) or type(payload.get('id')) is not int:
+        return None
+    return payload
+
+
+def _resolve_field(model, path):
+    """Return the field a ``__``-separated path ends on and whether it may be NULL"""
+    nullable = False
+    field = None
+    for name in path.split(LOOKUP_SEP):
+        field = model._meta.get_field(name)
+        nullable = nullable or field.null
+        if field.is_relation:
+            model = field.related_model
+    if field.is_relation:
+        field = field.target_field
+    return field, nullable
+
+
+def _after(path, value, pk, descending, nullable):
+    """
+    Filter selecting rows strictly after ``(value, pk)`` in the ordering.
+
+    NULLs sort first in ascending order and last in descending order, which
+    is SQLite's native behaviour and keeps the sort indexes usable.
+    """
+    if value is None:
+        if descending:
+            return Q(**{f'{path}__isnull': True, 'pk__lt': pk})
+        return Q(**{f'{path}__isnull': True, 'pk__gt': pk}) | Q(**{f'{path}__isnull': False})
+
+    if descending:
+        after = Q(**{f'{path}__lte': value}) & (Q(**{f'{path}__lt': value}) | Q(pk__lt=pk))
+    else:
+        after = Q(**{f'{path}__gte': value}) & (Q(**{f'{path}__gt': value}) | Q(pk__gt=pk))
+    if nullable and descending:
+        after |= Q(**{f'{path}__isnull': True})
+    return after
+
+
+def _ordering(path, descending):
+    if descending:
+        return [F(path).desc(nulls_last=True), '-pk']
+    return [F(path).asc(nulls_first=True), 'pk']
+
+
+def sort_key(queryset):
+    """The first ordering term of ``queryset`` as a field path, or None"""
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    if not ordering or not isinstance(ordering[0], str):
+        return None
+    return ordering[0]
+
+
+def paginate_by_cursor(queryset, page_size, token=None):
+    """
+    Fetch one page of ``queryset`` after (or before) the position in ``token``.
+
+    The page is selected with a ``WHERE (key, id) > (value, pk)`` style
+    filter on the queryset's first ordering term plus ``id`` as tie-breaker,
+    so fetching a deep page costs the same as fetching the first one.
+    """
+    sort = sort_key(queryset) or '-pk'
+    descending = sort.startswith('-')
+    path = sort.lstrip('-')
+    field, nullable = _resolve_field(queryset.model, path)
+
+    cursor = decode_cursor(token) if token else None
+    if cursor and cursor.get('s') != sort:
+        cursor = None
+    backwards = bool(cursor and cursor.get('b'))
+
+    # Walking backwards is walking forwards over the reversed ordering
+    walk_descending = descending != backwards
+    queryset = queryset.annotate(cursor_value=F(path)).order_by(*_ordering(path, walk_descending))
+    if cursor:
+        # Tokens come from the query string: a value that does not parse for
+        # the sort field is treated like any other invalid cursor
+        try:
+            value = field.to_python(cursor['v']) if cursor.get('v') is not None else None
+        except (ValidationError, TypeError, ValueError):
+            value, cursor = None, None
+        if cursor:
+            queryset = queryset.filter(_after(path, value, cursor['id'], walk_descending, nullable))
+
+    rows = list(queryset[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+
+    next_cursor = previous_cursor = None
+    if rows:
+        first, last = rows[0], rows[-1]
+        if has_more or backwards:
+            next_cursor = encode_cursor(sort, last.cursor_value, last.pk)
+        if cursor and (has_more or not backwards):
+            previous_cursor = encode_cursor(sort, first.cursor_value, first.pk, backwards=True)
+    return CursorPage(rows, next_cursor, previous_cursor)
+
+
+class CursorPaginationMixin:
+    """
+    Opt-in keyset pagination for ListViews.
+
+    Requests carrying a ``cursor`` parameter (an empty one starts at the first
+    page) are paginated by position instead of by OFFSET, and skip the
+    ``COUNT(*)`` the regular paginator needs. Other requests are unchanged.
+    """
+    cursor_param = 'cursor'
+
+    def is_cursor_paginated(self):
+        return self.cursor_param in self.request.GET
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.is_cursor_paginated():
+            return super().paginate_queryset(queryset, page_size)
+
+        page = paginate_by_cursor(queryset, page_size, self.request.GET.get(self.cursor_param))
+        page.next_querystring = self.cursor_querystring(page.next_cursor)
+        page.previous_querystring = self.cursor_querystring(page.previous_cursor)
+        return None, page, page.object_list, False
+
+    def cursor_querystring(self, token):
+        if token is None:
+            return ''
+        params = self.request.GET.copy()
+        params.pop('page', None)
+        params[self.cursor_param] = token
+        return params.urlencode()
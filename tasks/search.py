@@ -0,0 +1,226 @@
+import re
+from contextlib import contextmanager
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.urls import reverse
+from django.utils.html import escape
+
+from .models import Task, SubTask, Note
+
+# Markers wrapped around matched terms by FTS5; they are swapped for <mark>
+# tags after the rest of the text has been HTML-escaped.
+MATCH_START = '\x02'
+MATCH_END = '\x03'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Columns of each FTS5 table, in index order (see migration 0004)
+SEARCH_COLUMNS = {
+    'tasks_task': ('title', 'description'),
+    'tasks_subtask': ('title', 'description'),
+    'tasks_note': ('content',),
+}
+
+
+def search_available():
+    """The FTS5 index only exists on SQLite (see migration 0004)"""
+    return connection.vendor == 'sqlite'
+
+
+def fts_query(text, column=None):
+    """
+    Turn free user input into a safe FTS5 query.
+
+    Every word becomes a quoted prefix term and all terms must match, so
+    ``"urgent rep"`` finds "Urgent report". Returns None for input without
+    any searchable word.
+    """
+    tokens = TOKEN_RE.findall(text or '')
+    if not tokens:
+        return None
+    query = ' '.join(f'"{token}"*' for token in tokens)
+    if column:
+        query = f'{column} : ({query})'
+    return query
+
+
+def _matching_ids(table, query):
+    """Subquery with the ids of ``table`` rows matching an FTS5 query"""
+    return RawSQL(f'SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH %s', (query,))
+
+
+def _status_matches(choices, text):
+    return [value for value, label in choices if text.lower() in label.lower()]
+
+
+def search_tasks(queryset, text):
+    """Filter ``queryset`` to tasks whose title or description match ``text``"""
+    # Archived tasks have no full-text index; they are only searched on request
+    if not search_available() or queryset.model is not Task:
+        return queryset.filter(Q(title__icontains=text) | Q(description__icontains=text))
+    query = fts_query(text)
+    if query is None:
+        return queryset.none()
+    return queryset.filter(id__in=_matching_ids('tasks_task', query))
+
+
+def search_subtasks(queryset, text):
+    """Filter ``queryset`` to subtasks matching ``text`` on their own text, parent task title or status"""
+    statuses = _status_matches(SubTask.STATUS_CHOICES, text)
+    if not search_available():
+        return queryset.filter(
+            Q(title__icontains=text) |
+            Q(task__title__icontains=text) |
+            Q(status__in=statuses)
+        )
+    query = fts_query(text)
+    if query is None:
+        return queryset.filter(status__in=statuses)
+    return queryset.filter(
+        Q(id__in=_matching_ids('tasks_subtask', query)) |
+        Q(task_id__in=_matching_ids('tasks_task', fts_query(text, column='title'))) |
+        Q(status__in=statuses)
+    )
+
+
+def search_notes(queryset, text):
+    """Filter ``queryset`` to notes whose content or parent task title match ``text``"""
+    if not search_available():
+        return queryset.filter(Q(content__icontains=text) | Q(task__title__icontains=text))
+    query = fts_query(text)
+    if query is None:
+        return queryset.none()
+    return queryset.filter(
+        Q(id__in=_matching_ids('tasks_note', query)) |
+        Q(task_id__in=_matching_ids('tasks_task', fts_query(text, column='title')))
+    )
+
+
+def _marked(text):
+    """HTML-escape FTS5 output and turn the match markers into <mark> tags"""
+    return escape(text or '').replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>')
+
+
+# (entity, FTS table, title column index or None, snippet column index, edit URL name)
+SEARCH_SOURCES = [
+    ('task', 'tasks_task', 0, 1, 'task-update'),
+    ('subtask', 'tasks_subtask', 0, 1, 'subtask-update'),
+    ('note', 'tasks_note', None, 0, 'note-update'),
+]
+
+
+def search_all(text, limit=20):
+    """
+    Ranked, highlighted matches across tasks, subtasks and notes.
+
+    Each entity is searched through its FTS5 index ordered by bm25 rank; the
+    best ``limit`` hits overall are returned as plain dictionaries with the
+    matched terms wrapped in ``<mark>``.
+    """
+    query = fts_query(text)
+    if query is None:
+        return []
+    if not search_available():
+        return _search_all_fallback(text, limit)
+
+    results = []
+    with connection.cursor() as cursor:
+        for entity, table, title_column, snippet_column, url_name in SEARCH_SOURCES:
+            fts = f'{table}_fts'
+            title = (
+                f"highlight({fts}, {title_column}, '{MATCH_START}', '{MATCH_END}')"
+                if title_column is not None else 'NULL'
+            )
+            cursor.execute(
+                f"SELECT rowid, {title}, "
+                f"snippet({fts}, {snippet_column}, '{MATCH_START}', '{MATCH_END}', '…', 16), "
+                f"bm25({fts}) "
+                f"FROM {fts} WHERE {fts} MATCH %s "
+                # Soft-deleted rows stay indexed until purge_deleted removes them
+                f"AND rowid NOT IN (SELECT id FROM {table} WHERE deleted_at IS NOT NULL) "
+                f"ORDER BY rank LIMIT %s",
+                [query, limit],
+            )
+            for pk, title_html, snippet_html, score in cursor.fetchall():
+                results.append({
+                    'type': entity,
+                    'id': pk,
+                    'title': _marked(title_html) if title_html is not None else None,
+                    'snippet': _marked(snippet_html),
+                    'score': score,
+                    'url': reverse(url_name, args=[pk]),
+                })
+
+    # bm25 scores are negative, the most relevant match has the lowest one
+    results.sort(key=lambda result: result['score'])
+    return results[:limit]
+
+
+def _search_all_fallback(text, limit):
+    results = []
+    for task in search_tasks(Task.objects.all(), text)[:limit]:
+        results.append({'type': 'task', 'id': task.pk, 'title': escape(task.title),
+                        'snippet': escape(task.description[:120]), 'score': 0,
+                        'url': reverse('task-update', args=[task.pk])})
+    for subtask in search_subtasks(SubTask.objects.all(), text)[:limit]:
+        results.append({'type': 'subtask', 'id': subtask.pk, 'title': escape(subtask.title),
+                        'snippet': escape(subtask.description[:120]), 'score': 0,
+                        'url': reverse('subtask-update', args=[subtask.pk])})
+    for note in search_notes(Note.objects.all(), text)[:limit]:
+        results.append({'type': 'note', 'id': note.pk, 'title': None,
+                        'snippet': escape(note.content[:120]), 'score': 0,
+                        'url': reverse('note-update', args=[note.pk])})
+    return results[:limit]
+
+
+def rebuild_search_index():
+    """Rebuild every FTS5 table from its source table, returning the indexed row counts"""
+    counts = {}
+    with connection.cursor() as cursor:
+        for entity, table, *rest in SEARCH_SOURCES:
+            fts = f'{table}_fts'
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('optimize')")
+            cursor.execute(f'SELECT COUNT(*) FROM {table}')
+            counts[entity] = cursor.fetchone()[0]
+    return counts
+
+
+@contextmanager
+def deferred_search_inserts(table):
+    """
+    Suspend the FTS insert trigger of ``table`` while bulk rows are inserted.
+
+    Must run inside a transaction; the caller indexes the new rows itself
+    with ``index_search_rows`` before leaving the block. The trigger is put
+    back in the same transaction, so other connections never see it missing
+    and a rollback restores it too.
+    """
+    if not search_available():
+        yield
+        return
+    trigger = f'{table}_fts_ai'
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = %s", [trigger])
+        row = cursor.fetchone()
+        if row is None:
+            yield
+            return
+        cursor.execute(f'DROP TRIGGER {trigger}')
+        yield
+        cursor.execute(row[0])
+
+
+def index_search_rows(table, first_id, last_id):
+    """Add the rows of ``table`` with ids in ``first_id..last_id`` to its FTS index"""
+    if not search_available():
+        return
+    columns = ', '.join(SEARCH_COLUMNS[table])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table}_fts(rowid, {columns}) '
+            f'SELECT id, {columns} FROM {table} WHERE id BETWEEN %s AND %s',
+            [first_id, last_id],
+        )
@@ -0,0 +1,28 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+
+
+def precache_manifest():
+    """
+    Cache version and URLs the service worker precaches at install.
+
+    The URLs are the content-hashed names from the collectstatic manifest
+    and the version is the manifest's own hash, so every deploy that changes
+    a static file installs a new worker and drops the old caches. Without a
+    manifest (DEBUG, tests) the version is derived from the files' contents.
+    """
+    urls = [static(name) for name in settings.PWA_PRECACHE]
+    version = getattr(staticfiles_storage, 'manifest_hash', '')
+    if not version:
+        digest = hashlib.md5(usedforsecurity=False)
+        for name in settings.PWA_PRECACHE:
+            path = finders.find(name)
+            if path:
+                with open(path, 'rb') as handle:
+                    digest.update(handle.read())
+        version = digest.hexdigest()[:12]
+    return version, urls
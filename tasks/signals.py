@@ -0,0 +1,101 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import bump_generation
+from .models import Task, Category, Priority, SubTask, Note, Tombstone
+from .stats import (
+    apply_counter_delta, counter_delta,
+    task_counter_keys, subtask_counter_keys, note_counter_keys,
+)
+
+# Dashboard rollup maintenance
+#
+# pre_save remembers the counter keys of the row as it is stored, post_save
+# applies the difference to the new state and post_delete removes the row's
+# keys. Bulk operations bypass these handlers; run ``rebuild_stats`` after them.
+
+TASK_COUNTER_FIELDS = ('status', 'priority_id', 'category_id', 'created_at', 'deadline')
+
+
+def _task_keys(task):
+    return task_counter_keys(*(getattr(task, field) for field in TASK_COUNTER_FIELDS))
+
+
+@receiver(pre_save, sender=Task)
+def remember_task_counters(sender, instance, **kwargs):
+    instance._previous_counter_keys = []
+    if instance._state.adding or instance.pk is None:
+        return
+    previous = sender.objects.filter(pk=instance.pk).values(*TASK_COUNTER_FIELDS).first()
+    if previous:
+        instance._previous_counter_keys = task_counter_keys(**previous)
+
+
+@receiver(post_save, sender=Task)
+def update_task_counters(sender, instance, **kwargs):
+    before = getattr(instance, '_previous_counter_keys', [])
+    apply_counter_delta(counter_delta(before, _task_keys(instance)))
+
+
+@receiver(post_delete, sender=Task)
+def remove_task_counters(sender, instance, **kwargs):
+    apply_counter_delta(counter_delta(_task_keys(instance), []))
+
+
+@receiver(pre_save, sender=SubTask)
+def remember_subtask_counters(sender, instance, **kwargs):
+    instance._previous_counter_keys = []
+    if instance._state.adding or instance.pk is None:
+        return
+    previous = sender.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+    if previous is not None:
+        instance._previous_counter_keys = subtask_counter_keys(previous)
+
+
+@receiver(post_save, sender=SubTask)
+def update_subtask_counters(sender, instance, **kwargs):
+    before = getattr(instance, '_previous_counter_keys', [])
+    apply_counter_delta(counter_delta(before, subtask_counter_keys(instance.status)))
+
+
+@receiver(post_delete, sender=SubTask)
+def remove_subtask_counters(sender, instance, **kwargs):
+    apply_counter_delta(counter_delta(subtask_counter_keys(instance.status), []))
+
+
+@receiver(post_save, sender=Note)
+def update_note_counters(sender, instance, created, **kwargs):
+    if created:
+        apply_counter_delta(counter_delta([], note_counter_keys(instance.created_at)))
+
+
+@receiver(post_delete, sender=Note)
+def remove_note_counters(sender, instance, **kwargs):
+    apply_counter_delta(counter_delta(note_counter_keys(instance.created_at), []))
+
+
+# Sync tombstones
+#
+# The delta-sync feed (tasks.sync) reports deletions from these rows. Bulk
+# deletes write theirs with ``record_tombstones``.
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=SubTask)
+@receiver(post_delete, sender=Note)
+def record_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(model_name=sender._meta.model_name, object_id=instance.pk)
+
+
+# Cache invalidation
+#
+# Every cached page or dashboard is keyed by the generation stamps of the
+# models it was built from, so bumping the stamp invalidates them all.
+
+CACHED_MODELS = (Task, Category, Priority, SubTask, Note)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_cache_generation(sender, **kwargs):
+    if sender in CACHED_MODELS:
+        bump_generation(sender, using=kwargs.get('using'))
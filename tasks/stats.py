@@ -0,0 +1,444 @@
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import (
+    BigIntegerField, Case, Count, DateTimeField, ExpressionWrapper, F, Max, Q, Sum, Value, When,
+)
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .lookups import lookup_table
+from .models import Task, Category, Priority, SubTask, Note, DashboardCounter
+
+# Counter dimensions stored in DashboardCounter
+TASK_TOTAL = 'task_total'
+TASK_STATUS = 'task_status'
+TASK_PRIORITY = 'task_priority'
+TASK_CATEGORY = 'task_category'
+TASK_CREATED = 'task_created'
+TASK_DEADLINE = 'task_deadline'
+TASK_OPEN_DEADLINE = 'task_open_deadline'
+SUBTASK_TOTAL = 'subtask_total'
+SUBTASK_STATUS = 'subtask_status'
+NOTE_TOTAL = 'note_total'
+NOTE_CREATED = 'note_created'
+
+ALL = 'all'
+
+
+def _start_of_day(day):
+    """Aware datetime for midnight of ``day`` in the current timezone"""
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def _percentage(part, total):
+    if not total:
+        return 0
+    return round(part * 100 / total)
+
+
+def _date_ranges(today):
+    """Half-open date ranges used by the time-based counters"""
+    month_start = today.replace(day=1)
+    next_month_start = (month_start + timedelta(days=32)).replace(day=1)
+    week_start = today - timedelta(days=today.weekday())
+    return {
+        'day': (today, today + timedelta(days=1)),
+        'month': (month_start, next_month_start),
+        'week': (week_start, week_start + timedelta(days=7)),
+    }
+
+
+def compute_dashboard_stats(today=None):
+    """
+    Compute every dashboard counter straight from the source tables.
+
+    Nothing in the app calls this: the dashboard reads the precomputed
+    rollup through ``get_dashboard_stats``. It is kept as the reference the
+    counter tests compare that rollup against, and must return the same
+    dictionary shape.
+
+    All task counters come from a single conditional-aggregation query, and
+    SubTask/Note get one query each. Date filters are expressed as half-open
+    ranges so the database can use plain comparisons on the columns.
+    """
+    today = today or timezone.localdate()
+    ranges = _date_ranges(today)
+
+    day_start, next_day_start = map(_start_of_day, ranges['day'])
+    month_start, next_month_start = map(_start_of_day, ranges['month'])
+    week_start, next_week_start = map(_start_of_day, ranges['week'])
+
+    open_statuses = ['Pending', 'In Progress']
+
+    task_stats = Task.objects.aggregate(
+        total_tasks=Count('id'),
+        completed_tasks=Count('id', filter=Q(status='Completed')),
+        in_progress_tasks=Count('id', filter=Q(status='In Progress')),
+        pending_tasks=Count('id', filter=Q(status='Pending')),
+        high_priority_tasks=Count('id', filter=Q(priority__name='High')),
+        critical_tasks=Count('id', filter=Q(priority__name='Critical')),
+        tasks_created_this_month=Count('id', filter=Q(
+            created_at__gte=month_start,
+            created_at__lt=next_month_start,
+        )),
+        tasks_due_this_week=Count('id', filter=Q(
+            deadline__gte=week_start,
+            deadline__lt=next_week_start,
+        )),
+        overdue_tasks=Count('id', filter=Q(
+            deadline__lt=day_start,
+            status__in=open_statuses,
+        )),
+    )
+
+    subtask_stats = SubTask.objects.aggregate(
+        total_subtasks=Count('id'),
+        completed_subtasks=Count('id', filter=Q(status='Completed')),
+    )
+
+    note_stats = Note.objects.aggregate(
+        total_notes=Count('id'),
+        recent_notes=Count('id', filter=Q(
+            created_at__gte=day_start,
+            created_at__lt=next_day_start,
+        )),
+    )
+
+    stats = {**task_stats, **subtask_stats, **note_stats}
+    stats['total_categories'] = Category.objects.count()
+    stats['total_priorities'] = Priority.objects.count()
+    return _with_percentages(stats)
+
+
+def _with_percentages(stats):
+    """Add the status distribution used by the dashboard progress bars"""
+    total = stats['total_tasks']
+    stats['completed_percentage'] = _percentage(stats['completed_tasks'], total)
+    stats['in_progress_percentage'] = _percentage(stats['in_progress_tasks'], total)
+    stats['pending_percentage'] = _percentage(stats['pending_tasks'], total)
+    return stats
+
+
+def _status_slug(status):
+    return status.lower().replace(' ', '_')
+
+
+def task_counts_by(field, ids):
+    """
+    Task totals and per-status breakdown for the given category or priority ids.
+
+    One grouped aggregate over ``(field, status)``, scoped to ``ids`` (the
+    rows shown on the current page). Returns
+    ``{id: {'total': n, 'pending': n, 'in_progress': n, 'completed': n}}``.
+    """
+    empty = {'total': 0, **{_status_slug(status): 0 for status, label in Task.STATUS_CHOICES}}
+    counts = {pk: dict(empty) for pk in ids}
+    rows = (
+        Task.objects.filter(**{f'{field}__in': ids})
+        .order_by()
+        .values_list(field, 'status')
+        .annotate(n=Count('id'))
+    )
+    for pk, status, n in rows:
+        counts[pk]['total'] += n
+        counts[pk][_status_slug(status)] = counts[pk].get(_status_slug(status), 0) + n
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# Incrementally maintained rollup
+# ---------------------------------------------------------------------------
+
+def _day_key(value, tz=None):
+    return timezone.localdate(value, tz).isoformat() if value else None
+
+
+def task_counter_keys(status, priority_id, category_id, created_at, deadline, tz=None):
+    """
+    The ``(dimension, key)`` pairs a single task contributes to. Bulk callers
+    pass ``tz`` (the current timezone) once instead of looking it up per row.
+    """
+    keys = [
+        (TASK_TOTAL, ALL),
+        (TASK_STATUS, status),
+        (TASK_PRIORITY, str(priority_id)),
+        (TASK_CATEGORY, str(category_id)),
+    ]
+    if created_at:
+        keys.append((TASK_CREATED, _day_key(created_at, tz)))
+    if deadline:
+        deadline_key = _day_key(deadline, tz)
+        keys.append((TASK_DEADLINE, deadline_key))
+        if status != 'Completed':
+            keys.append((TASK_OPEN_DEADLINE, deadline_key))
+    return keys
+
+
+def subtask_counter_keys(status):
+    return [(SUBTASK_TOTAL, ALL), (SUBTASK_STATUS, status)]
+
+
+def note_counter_keys(created_at, tz=None):
+    keys = [(NOTE_TOTAL, ALL)]
+    if created_at:
+        keys.append((NOTE_CREATED, _day_key(created_at, tz)))
+    return keys
+
+
+def _grouped(queryset, dimension, expression):
+    """Count rows of ``queryset`` grouped by ``expression`` into a Counter"""
+    counts = Counter()
+    rows = queryset.order_by().values(group=expression).annotate(n=Count('pk'))
+    for row in rows:
+        key = row['group']
+        if key is None:
+            continue
+        if hasattr(key, 'isoformat'):
+            key = key.isoformat()
+        counts[(dimension, str(key))] += row['n']
+    return counts
+
+
+def task_contributions(queryset, status=None, priority_id=None, category_id=None, deadline_shift=None):
+    """
+    Counter contributions of every task in ``queryset``, computed with a few
+    grouped aggregates instead of loading rows.
+
+    The keyword arguments describe a pending set-based UPDATE: when given,
+    the contributions are computed as if the update had already been applied.
+    This lets bulk operations adjust the rollup without rebuilding it.
+    """
+    tz = timezone.get_current_timezone()
+    counts = Counter()
+
+    total = queryset.order_by().count()
+    if not total:
+        return counts
+    counts[(TASK_TOTAL, ALL)] = total
+
+    if status is None:
+        counts += _grouped(queryset, TASK_STATUS, F('status'))
+    else:
+        counts[(TASK_STATUS, status)] = total
+
+    if priority_id is None:
+        counts += _grouped(queryset, TASK_PRIORITY, F('priority_id'))
+    else:
+        counts[(TASK_PRIORITY, str(priority_id))] = total
+
+    if category_id is None:
+        counts += _grouped(queryset, TASK_CATEGORY, F('category_id'))
+    else:
+        counts[(TASK_CATEGORY, str(category_id))] = total
+
+    counts += _grouped(queryset, TASK_CREATED, TruncDate('created_at', tzinfo=tz))
+
+    deadline = F('deadline')
+    if deadline_shift:
+        deadline = ExpressionWrapper(deadline + deadline_shift, output_field=DateTimeField())
+    with_deadline = queryset.filter(deadline__isnull=False)
+    counts += _grouped(with_deadline, TASK_DEADLINE, TruncDate(deadline, tzinfo=tz))
+
+    if status is None:
+        open_tasks = with_deadline.exclude(status='Completed')
+    elif status != 'Completed':
+        open_tasks = with_deadline
+    else:
+        open_tasks = with_deadline.none()
+    counts += _grouped(open_tasks, TASK_OPEN_DEADLINE, TruncDate(deadline, tzinfo=tz))
+    return counts
+
+
+def subtask_contributions(queryset):
+    counts = Counter()
+    total = queryset.order_by().count()
+    if total:
+        counts[(SUBTASK_TOTAL, ALL)] = total
+        counts += _grouped(queryset, SUBTASK_STATUS, F('status'))
+    return counts
+
+
+def note_contributions(queryset):
+    counts = Counter()
+    total = queryset.order_by().count()
+    if total:
+        counts[(NOTE_TOTAL, ALL)] = total
+        tz = timezone.get_current_timezone()
+        counts += _grouped(queryset, NOTE_CREATED, TruncDate('created_at', tzinfo=tz))
+    return counts
+
+
+def counter_delta(before, after):
+    """Signed difference between two collections of counter keys"""
+    delta = Counter(after)
+    delta.subtract(Counter(before))
+    return delta
+
+
+# Rows incremented per UPDATE in apply_counter_delta, keeping the number of
+# query parameters well below SQLite's limit
+COUNTER_UPDATE_CHUNK = 500
+
+
+def apply_counter_delta(delta):
+    """
+    Add a signed ``{(dimension, key): amount}`` mapping to the rollup.
+
+    Existing rows are incremented with one CASE update per chunk and missing
+    ones are inserted in bulk, so large deltas (bulk imports, seeding) cost a
+    handful of queries instead of one per key.
+    """
+    delta = {pair: amount for pair, amount in delta.items() if amount}
+    if not delta:
+        return
+    with transaction.atomic():
+        rows = DashboardCounter.objects.filter(
+            dimension__in={dimension for dimension, _ in delta},
+            key__in={key for _, key in delta},
+        )
+        existing = {(dimension, key): pk for dimension, key, pk in rows.values_list('dimension', 'key', 'pk')}
+
+        missing = [pair for pair in delta if pair not in existing]
+        if missing:
+            try:
+                with transaction.atomic():
+                    DashboardCounter.objects.bulk_create([
+                        DashboardCounter(dimension=dimension, key=key, count=delta[dimension, key])
+                        for dimension, key in missing
+                    ])
+            except IntegrityError:
+                # Another writer created some of these rows first
+                for dimension, key in missing:
+                    _increment_counter(dimension, key, delta[dimension, key])
+
+        increments = [(pk, delta[pair]) for pair, pk in existing.items() if pair in delta]
+        for start in range(0, len(increments), COUNTER_UPDATE_CHUNK):
+            chunk = increments[start:start + COUNTER_UPDATE_CHUNK]
+            DashboardCounter.objects.filter(pk__in=[pk for pk, _ in chunk]).update(
+                count=F('count') + Case(
+                    *[When(pk=pk, then=Value(amount)) for pk, amount in chunk],
+                    output_field=BigIntegerField(),
+                )
+            )
+
+
+def _increment_counter(dimension, key, amount):
+    rows = DashboardCounter.objects.filter(dimension=dimension, key=key)
+    if rows.update(count=F('count') + amount):
+        return
+    try:
+        with transaction.atomic():
+            DashboardCounter.objects.create(dimension=dimension, key=key, count=amount)
+    except IntegrityError:
+        # Another writer created the row first
+        rows.update(count=F('count') + amount)
+
+
+def _batched(model, batch_size):
+    """Split ``model``'s table into primary key ranges of ``batch_size``"""
+    max_pk = model.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+    for start in range(0, max_pk + 1, batch_size):
+        yield model.objects.filter(pk__gte=start, pk__lt=start + batch_size)
+
+
+@contextmanager
+def _read_snapshot():
+    """
+    Run the reads inside against one consistent snapshot without taking the
+    write lock. ``transaction.atomic()`` cannot be used for this: with
+    ``transaction_mode=IMMEDIATE`` it locks out every writer.
+    """
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        with transaction.atomic():
+            yield
+        return
+    connection.ensure_connection()
+    with connection.cursor() as cursor:
+        # Under WAL a deferred transaction that only reads pins the snapshot
+        # of its first SELECT and blocks nobody
+        cursor.execute('BEGIN DEFERRED')
+        try:
+            yield
+        finally:
+            cursor.execute('COMMIT')
+
+
+def rebuild_counters(batch_size=10000, dry_run=False):
+    """
+    Recompute the whole rollup from the source tables, one primary key range
+    at a time, and correct the stored rows.
+
+    The source tables and the stored counters are read from one snapshot
+    that takes no lock, so writers carry on during the rebuild. The drift
+    found is then added as a delta in one short write: deltas that writers
+    applied meanwhile are kept instead of being overwritten.
+
+    Returns the drift found as ``{(dimension, key): (stored, actual)}``.
+    """
+    with _read_snapshot():
+        expected = Counter()
+        for queryset in _batched(Task, batch_size):
+            expected += task_contributions(queryset)
+        for queryset in _batched(SubTask, batch_size):
+            expected += subtask_contributions(queryset)
+        for queryset in _batched(Note, batch_size):
+            expected += note_contributions(queryset)
+        stored = dict(
+            ((dimension, key), count)
+            for dimension, key, count in DashboardCounter.objects.values_list('dimension', 'key', 'count')
+        )
+
+    drift = {
+        key: (stored.get(key, 0), expected.get(key, 0))
+        for key in set(stored) | set(expected)
+        if stored.get(key, 0) != expected.get(key, 0)
+    }
+    if drift and not dry_run:
+        apply_counter_delta({key: actual - before for key, (before, actual) in drift.items()})
+    return drift
+
+
+def get_dashboard_stats(today=None):
+    """
+    Dashboard counters read from the precomputed rollup.
+
+    Returns the same keys as ``compute_dashboard_stats`` but only touches a
+    handful of DashboardCounter rows, so its cost does not depend on the
+    size of the task tables.
+    """
+    today = today or timezone.localdate()
+    ranges = {name: [day.isoformat() for day in bounds] for name, bounds in _date_ranges(today).items()}
+
+    priorities = lookup_table(Priority).rows
+
+    def priority_keys(name):
+        return [str(priority.pk) for priority in priorities if priority.name == name]
+
+    def total(dimension, **lookups):
+        return Sum('count', filter=Q(dimension=dimension, **lookups), default=0)
+
+    stats = DashboardCounter.objects.aggregate(
+        total_tasks=total(TASK_TOTAL),
+        completed_tasks=total(TASK_STATUS, key='Completed'),
+        in_progress_tasks=total(TASK_STATUS, key='In Progress'),
+        pending_tasks=total(TASK_STATUS, key='Pending'),
+        high_priority_tasks=total(TASK_PRIORITY, key__in=priority_keys('High')),
+        critical_tasks=total(TASK_PRIORITY, key__in=priority_keys('Critical')),
+        tasks_created_this_month=total(
+            TASK_CREATED, key__gte=ranges['month'][0], key__lt=ranges['month'][1],
+        ),
+        tasks_due_this_week=total(
+            TASK_DEADLINE, key__gte=ranges['week'][0], key__lt=ranges['week'][1],
+        ),
+        overdue_tasks=total(TASK_OPEN_DEADLINE, key__lt=ranges['day'][0]),
+        total_subtasks=total(SUBTASK_TOTAL),
+        completed_subtasks=total(SUBTASK_STATUS, key='Completed'),
+        total_notes=total(NOTE_TOTAL),
+        recent_notes=total(NOTE_CREATED, key=ranges['day'][0]),
+    )
+    stats['total_categories'] = len(lookup_table(Category).rows)
+    stats['total_priorities'] = len(priorities)
+    return _with_percentages(stats)
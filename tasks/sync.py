@@ -0,0 +1,148 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .cache import get_generations
+from .lookups import lookup_table
+from .models import Task, Category, Priority, SubTask, Note, Tombstone
+
+# Rows returned per stream and request; clients keep calling while has_more
+SYNC_PAGE_SIZE = 500
+
+# Tombstones older than this are pruned (see prune_tombstones); a client
+# whose cursor is older must drop its copy and sync from scratch
+TOMBSTONE_RETENTION = timedelta(days=30)
+
+# (stream name, model, fields sent to the client)
+SYNC_STREAMS = [
+    ('tasks', Task, ['id', 'title', 'description', 'status', 'priority_id', 'category_id',
+                     'deadline', 'created_at', 'updated_at']),
+    ('subtasks', SubTask, ['id', 'task_id', 'title', 'description', 'status', 'created_at', 'updated_at']),
+    ('notes', Note, ['id', 'task_id', 'content', 'created_at', 'updated_at']),
+]
+
+# Cursor entries holding a change_seq position
+POSITIONS = [name for name, _, _ in SYNC_STREAMS] + ['deleted']
+
+
+def encode_sync_cursor(positions):
+    payload = json.dumps(positions, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_sync_cursor(token):
+    """
+    Decode a sync cursor into ``{stream: change_seq, 'at': datetime,
+    'lookups': generations}``; None for anything malformed, including
+    cursors from before the feed was ordered by change_seq.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        positions = {name: payload[name] for name in POSITIONS}
+        if any(type(position) is not int for position in positions.values()):
+            return None
+        positions['at'] = parse_datetime(payload['at'])
+        if positions['at'] is None:
+            return None
+        positions['lookups'] = payload.get('lookups')
+        return positions
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return None
+
+
+def _page(queryset, position, limit):
+    """Up to ``limit`` rows numbered after ``position`` in the change feed, and whether more remain"""
+    rows = list(queryset.filter(change_seq__gt=position).order_by('change_seq')[:limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def record_tombstones(queryset):
+    """
+    Write a tombstone for every row of ``queryset`` with one INSERT ... SELECT.
+
+    For bulk deletes that bypass the post_delete handlers; call it before the
+    rows are removed.
+    """
+    ids_sql, params = queryset.order_by().values(object_id=F('pk')).query.sql_with_params()
+    deleted_at = Tombstone._meta.get_field('deleted_at').get_db_prep_value(timezone.now(), connection)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {Tombstone._meta.db_table} (model_name, object_id, deleted_at) '
+            f'SELECT %s, ids.object_id, %s FROM ({ids_sql}) ids',
+            [queryset.model._meta.model_name, deleted_at, *params],
+        )
+
+
+def prune_tombstones(now=None):
+    """Delete tombstones past the retention window, returning how many were removed"""
+    cutoff = (now or timezone.now()) - TOMBSTONE_RETENTION
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
+
+
+def _lookups():
+    return {
+        'categories': [{'id': row.pk, 'name': row.name} for row in lookup_table(Category).rows],
+        'priorities': [{'id': row.pk, 'name': row.name, 'order': row.order} for row in lookup_table(Priority).rows],
+    }
+
+
+def changes_since(token=None, limit=SYNC_PAGE_SIZE, now=None):
+    """
+    Everything that changed after the position encoded in ``token``.
+
+    Each stream (tasks, subtasks, notes, deletions) is read in
+    ``change_seq`` order from its own index, starting after the client's
+    last position, so the cost depends on the number of changes and not on
+    the size of the tables. The numbers follow commit order (see
+    ``ChangeFeedModel``), so a row committed after a page was read always
+    lands after the cursor, whatever its ``updated_at``. Categories and
+    priorities are small and sent whole whenever their cache generation
+    changed.
+
+    ``reset`` is set when the client must drop its data and start over:
+    the cursor was unreadable, or older than the tombstone retention.
+    """
+    now = now or timezone.now()
+    positions = decode_sync_cursor(token) if token else None
+    reset = bool(token) and (positions is None or positions['at'] < now - TOMBSTONE_RETENTION)
+    if positions is None or reset:
+        positions = {name: 0 for name in POSITIONS}
+
+    result = {'reset': reset, 'changes': {}, 'deleted': {}, 'has_more': False}
+    for name, model, fields in SYNC_STREAMS:
+        rows, more = _page(model.objects.values(*fields, 'change_seq'), positions[name], limit)
+        if rows:
+            positions[name] = rows[-1]['change_seq']
+        for row in rows:
+            del row['change_seq']
+        result['changes'][name] = rows
+        result['has_more'] |= more
+
+    tombstones, more = _page(Tombstone.objects.all(), positions['deleted'], limit)
+    for name, model, _ in SYNC_STREAMS:
+        result['deleted'][name] = [
+            tombstone.object_id for tombstone in tombstones
+            if tombstone.model_name == model._meta.model_name
+        ]
+    result['has_more'] |= more
+    if tombstones:
+        positions['deleted'] = tombstones[-1].change_seq
+    # How recent the client's view of the deletions is, for the retention
+    # check: everything up to now once caught up, so an idle deletion feed
+    # does not age past the retention window and force a reset
+    positions['at'] = tombstones[-1].deleted_at if more else now
+
+    generations = get_generations(Category, Priority)
+    if positions.get('lookups') != generations:
+        result['lookups'] = _lookups()
+    positions['lookups'] = generations
+
+    result['cursor'] = encode_sync_cursor({**positions, 'at': positions['at'].isoformat()})
+    return result
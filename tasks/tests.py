@@ -1,3 +1,791 @@
-from django.test import TestCase
+import io
+import json
+import tempfile
+import threading
+from datetime import timedelta
+from itertools import product
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection, connections, router
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from hangarin_project.routers import PIN_COOKIE, PRIMARY, REPLICA, read_database, replica_reads
+
+from .models import (
+    Task, Category, Priority, SubTask, Note, Job, DashboardCounter, ArchivedTask, ArchivedSubTask, ArchivedNote,
+)
+from .archive import TaskArchiveUnion, archive_tasks
+from .autocomplete import suggest_tasks
+from .forms import SubTaskForm
+from .importer import TaskImporter, read_records
+from .cache import bump_generation, cached, get_or_build, versioned_key
+from .bulk import bulk_update_tasks, purge_deleted, soft_delete_lookup, soft_delete_tasks
+from .search import search_tasks
+from .pagination import encode_cursor, paginate_by_cursor
+from .jobs import JOBS, JOB_STALE_AFTER, claim_job, enqueue, requeue_stale_jobs, run_job
+from .stats import compute_dashboard_stats, get_dashboard_stats, rebuild_counters, task_counts_by
+from .sync import changes_since, encode_sync_cursor
+from .views import TaskListView, SubTaskListView, NoteListView
+
+
+# Production-shaped table sizes and rows per distinct column value. They are
+# written to sqlite_stat1 so the planner chooses the plans it would choose on
+# a large database instead of the ones that suit a near-empty test database.
+TABLE_ROWS = {
+    'tasks_task': 1000000,
+    'tasks_subtask': 3000000,
+    'tasks_note': 2000000,
+    'tasks_priority': 5,
+    'tasks_category': 5,
+}
+ROWS_PER_VALUE = {
+    'status': 333333,
+    'priority_id': 200000,
+    'category_id': 200000,
+    'task_id': 3,
+    # NULL on every row that has not been soft-deleted
+    'deleted_at': 1000000,
+}
+
+
+def load_production_statistics():
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+        for table, rows in TABLE_ROWS.items():
+            cursor.execute('DELETE FROM sqlite_stat1 WHERE tbl = %s', [table])
+            cursor.execute('INSERT INTO sqlite_stat1 (tbl, idx, stat) VALUES (%s, NULL, %s)', [table, str(rows)])
+            cursor.execute(f'PRAGMA index_list({table})')
+            for index in [row[1] for row in cursor.fetchall()]:
+                cursor.execute(f'PRAGMA index_info({index})')
+                columns = [row[2] for row in cursor.fetchall()]
+                stat = [rows]
+                for column in columns:
+                    stat.append(max(1, min(stat[-1], ROWS_PER_VALUE.get(column, 1))))
+                cursor.execute(
+                    'INSERT INTO sqlite_stat1 (tbl, idx, stat) VALUES (%s, %s, %s)',
+                    [table, index, ' '.join(map(str, stat))],
+                )
+        cursor.execute('ANALYZE sqlite_schema')
+
+
+class CacheTestCase(TestCase):
+    """
+    TestCase whose default cache is a throwaway directory: the project's
+    on-disk cache outlives test databases and must not be touched by tests.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls._cache_dir = tempfile.TemporaryDirectory()
+        cls._cache_settings = override_settings(CACHES={
+            **settings.CACHES,
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': cls._cache_dir.name,
+            },
+        })
+        cls._cache_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._cache_settings.disable()
+        cls._cache_dir.cleanup()
+
+    def setUp(self):
+        # Each test starts from an empty cache, like its rolled back database
+        cache.clear()
+
+
+class ReplicaTestCase(CacheTestCase):
+    """
+    CacheTestCase for views that read from the replica.
+
+    Under the test runner the replica alias mirrors the test database
+    (see settings), but through its own connection, which cannot see the
+    test's open transaction. It is pointed at the primary's connection for
+    the duration of the class instead.
+    """
+    databases = {PRIMARY, REPLICA}
+
+    @classmethod
+    def setUpClass(cls):
+        cls._replica_connection = connections[REPLICA]
+        connections[REPLICA] = connections[PRIMARY]
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA] = cls._replica_connection
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Query plans are checked against SQLite')
+class QueryPlanTests(CacheTestCase):
+    """
+    Run EXPLAIN QUERY PLAN for every filter/sort combination the list views
+    support and fail when one of them falls back to a full table scan.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        priority = Priority.objects.create(name='High', order=1)
+        category = Category.objects.create(name='Work')
+        task = Task.objects.create(title='Report', priority=priority, category=category,
+                                   deadline=timezone.now())
+        SubTask.objects.create(title='Draft', task=task)
+        Note.objects.create(task=task, content='Remember the numbers')
+        cls.priority, cls.category, cls.task = priority, category, task
+        load_production_statistics()
+
+    def query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        return self.raw_query_plan(sql, params)
+
+    def raw_query_plan(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertUsesIndex(self, queryset, table, label):
+        plan = self.query_plan(queryset)
+        full_scans = [step for step in plan if step == f'SCAN {table}']
+        self.assertFalse(full_scans, f'{label} scans {table}: {plan}')
+
+    def list_queryset(self, view_class, **params):
+        view = view_class()
+        view.setup(RequestFactory().get('/', params))
+        return view.get_queryset()
+
+    def test_task_list_filters_and_sorts(self):
+        sorts = [
+            'title', '-title', 'status', '-status',
+            'priority__order', '-priority__order', 'category__name', '-category__name',
+            'deadline', '-deadline', 'created_at', '-created_at',
+        ]
+        filters = {
+            'status': ['', 'Pending'],
+            'priority': ['', self.priority.name],
+            'category': ['', self.category.name],
+        }
+        for sort_by, status, priority, category in product(sorts, *filters.values()):
+            params = {'sort_by': sort_by, 'status': status, 'priority': priority, 'category': category}
+            params = {key: value for key, value in params.items() if value}
+            with self.subTest(**params):
+                queryset = self.list_queryset(TaskListView, **params)
+                self.assertUsesIndex(queryset[:10], 'tasks_task', params)
+
+    def test_task_list_search(self):
+        queryset = self.list_queryset(TaskListView, q='report', status='Pending')
+        self.assertUsesIndex(queryset[:10], 'tasks_task', 'task search')
+
+    def test_subtask_list(self):
+        for sort_by in ['-created_at', 'created_at']:
+            for params in [{}, {'task': self.task.pk}, {'status': 'Pending'}]:
+                with self.subTest(sort_by=sort_by, **params):
+                    queryset = self.list_queryset(SubTaskListView, sort_by=sort_by, **params)
+                    self.assertUsesIndex(queryset[:10], 'tasks_subtask', params)
+
+    def test_note_list(self):
+        for sort_by in ['-created_at', 'created_at']:
+            for params in [{}, {'task': self.task.pk}, {'q': 'numbers'}]:
+                with self.subTest(sort_by=sort_by, **params):
+                    queryset = self.list_queryset(NoteListView, sort_by=sort_by, **params)
+                    self.assertUsesIndex(queryset[:10], 'tasks_note', params)
+
+    def test_dashboard_ranges(self):
+        now = timezone.now()
+        querysets = {
+            'created range': Task.objects.filter(created_at__gte=now, created_at__lt=now),
+            'deadline range': Task.objects.filter(deadline__gte=now, deadline__lt=now),
+            'overdue': Task.objects.filter(deadline__lt=now, status__in=['Pending', 'In Progress']),
+            'upcoming deadlines': Task.objects.filter(
+                deadline__gte=now, status__in=['Pending', 'In Progress'],
+            ).order_by('deadline')[:5],
+            'recent tasks': Task.objects.order_by('-created_at')[:5],
+        }
+        for label, queryset in querysets.items():
+            with self.subTest(label):
+                self.assertUsesIndex(queryset, 'tasks_task', label)
+
+    def test_lookup_list_task_counts(self):
+        for field in ['category_id', 'priority_id']:
+            with self.subTest(field):
+                with CaptureQueriesContext(connection) as queries:
+                    task_counts_by(field, [self.category.pk, self.priority.pk])
+                self.assertEqual(len(queries), 1)
+                plan = self.raw_query_plan(queries[0]['sql'])
+                self.assertTrue(any('COVERING INDEX' in step for step in plan), plan)
+
+    def test_task_autocomplete(self):
+        for term in ['', 'rep']:
+            with self.subTest(term=term):
+                with CaptureQueriesContext(connection) as queries:
+                    suggest_tasks(term)
+                plan = self.raw_query_plan(queries[0]['sql'])
+                self.assertNotIn('SCAN tasks_task', plan)
+                self.assertFalse(any('TEMP B-TREE' in step for step in plan), plan)
+
+    def test_sync_feed(self):
+        cursor = changes_since()['cursor']
+        with CaptureQueriesContext(connection) as queries:
+            changes_since(cursor)
+        for query in queries:
+            if 'ORDER BY' not in query['sql']:
+                continue
+            plan = self.raw_query_plan(query['sql'])
+            self.assertFalse(any(step.startswith('SCAN') for step in plan), plan)
+            self.assertFalse(any('TEMP B-TREE' in step for step in plan), plan)
+
+    def test_job_claim(self):
+        queryset = (
+            Job.objects.filter(status=Job.QUEUED, run_after__lte=timezone.now())
+            .order_by('run_after', 'id').values_list('pk', flat=True)[:1]
+        )
+        plan = self.query_plan(queryset)
+        self.assertUsesIndex(queryset, 'tasks_job', 'job claim')
+        self.assertFalse(any('TEMP B-TREE' in step for step in plan), plan)
+
+
+class SyncTests(CacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.priority = Priority.objects.create(name='High')
+        cls.category = Category.objects.create(name='Work')
+
+    def create_task(self, title):
+        return Task.objects.create(title=title, priority=self.priority, category=self.category)
+
+    def sync(self, token):
+        """Page through the feed from ``token``, returning the changes, deletions and last cursor"""
+        changed, deleted = set(), set()
+        while True:
+            result = changes_since(token, limit=5)
+            changed |= {row['id'] for row in result['changes']['tasks']}
+            deleted |= set(result['deleted']['tasks'])
+            token = result['cursor']
+            if not result['has_more']:
+                return changed, deleted, token
+
+    def test_pages_through_bulk_update(self):
+        ids = {self.create_task(f'Task {n}').pk for n in range(15)}
+        token = changes_since()['cursor']
+
+        bulk_update_tasks(Task.objects.all(), status='Completed')
+        changed, _, token = self.sync(token)
+        self.assertEqual(changed, ids)
+        self.assertEqual(self.sync(token)[0], set())
+
+    def test_change_stamped_before_the_cursor(self):
+        task = self.create_task('Slow writer')
+        token = changes_since()['cursor']
+        # A transaction that stamped updated_at long ago but commits only
+        # now still comes after the cursor
+        Task.objects.filter(pk=task.pk).update(title='Committed late', updated_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(self.sync(token)[0], {task.pk})
+
+    def test_deletions(self):
+        self.create_task('Kept')
+        removed = self.create_task('Removed')
+        removed_pk = removed.pk
+        token = changes_since()['cursor']
+        removed.delete()
+        self.assertEqual(self.sync(token)[:2], (set(), {removed_pk}))
+
+    def test_unreadable_cursor_resets(self):
+        self.create_task('Task')
+        for token in ['garbage', encode_sync_cursor({'tasks': ['2026-01-01T00:00:00+00:00', 3]})]:
+            with self.subTest(token=token):
+                result = changes_since(token)
+                self.assertTrue(result['reset'])
+                self.assertEqual(len(result['changes']['tasks']), 1)
+
+    def test_cursor_past_retention_resets(self):
+        token = changes_since()['cursor']
+        self.assertFalse(changes_since(token)['reset'])
+        self.assertTrue(changes_since(token, now=timezone.now() + timedelta(days=31))['reset'])
+
+
+class CacheTests(CacheTestCase):
+    def test_bump_waits_for_commit(self):
+        key, _ = versioned_key('page', [Task])
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_generation(Task)
+            # A reader inside the transaction window still gets the old key
+            self.assertEqual(versioned_key('page', [Task])[0], key)
+        self.assertNotEqual(versioned_key('page', [Task])[0], key)
+
+    def test_bump_invalidates_cached_value(self):
+        self.assertEqual(cached('page', [Task], lambda: 'old'), 'old')
+        self.assertEqual(cached('page', [Task], lambda: 'new'), 'old')
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_generation(Task)
+        self.assertEqual(cached('page', [Task], lambda: 'new'), 'new')
+
+    def test_stale_value_while_rebuilding(self):
+        cached('page', [Task], lambda: 'old')
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_generation(Task)
+        key, stale_key = versioned_key('page', [Task])
+
+        # Another process holds the rebuild lock: serve the previous value
+        cache.add(f'{key}:lock', True)
+        self.assertEqual(get_or_build(key, lambda: 'new', stale_key=stale_key), 'old')
+        cache.delete(f'{key}:lock')
+        self.assertEqual(get_or_build(key, lambda: 'new', stale_key=stale_key), 'new')
+
+    def test_waits_for_lock_holder(self):
+        key, _ = versioned_key('page', [Task])
+        cache.add(f'{key}:lock', True)
+        timer = threading.Timer(0.1, cache.set, (key, 'built elsewhere'))
+        timer.start()
+        try:
+            # Without a stale value the caller waits instead of rebuilding
+            self.assertEqual(get_or_build(key, lambda: self.fail('rebuilt twice')), 'built elsewhere')
+        finally:
+            timer.join()
+
+
+class BulkActionTests(CacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        priority = Priority.objects.create(name='High')
+        category = Category.objects.create(name='Work')
+        cls.tasks = [Task.objects.create(title=f'Task {n}', priority=priority, category=category)
+                     for n in range(4)]
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(get_user_model().objects.create_user('editor', password='pw'))
+
+    def test_selected_ids(self):
+        chosen, untouched = self.tasks[:2], self.tasks[2:]
+        before = timezone.now()
+        response = self.client.post('/tasks/bulk/', {
+            'action': 'status', 'value': 'Completed', 'ids': [task.pk for task in chosen],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'action': 'status', 'affected': {'tasks': 2}})
+
+        for task in chosen:
+            task.refresh_from_db()
+            self.assertEqual(task.status, 'Completed')
+            # Stamped in Python with microseconds, not truncated to the second
+            self.assertGreaterEqual(task.updated_at, before)
+        for task in untouched:
+            self.assertEqual(Task.objects.get(pk=task.pk).updated_at, task.updated_at)
+
+    def test_scope_all_enqueues_job(self):
+        response = self.client.post('/tasks/bulk/', {
+            'action': 'status', 'value': 'Completed', 'scope': 'all', 'status': 'Pending',
+        })
+        self.assertEqual(response.status_code, 202)
+        job = Job.objects.get(pk=response.json()['job']['id'])
+        self.assertEqual(job.kind, 'bulk_tasks')
+        self.assertEqual(response.json()['status_url'], f'/api/jobs/{job.pk}/')
+        # Nothing changes until a worker runs the job
+        self.assertFalse(Task.objects.filter(status='Completed').exists())
+
+    def test_rejects_bad_input(self):
+        for data in [
+            {'action': 'rename', 'value': 'x', 'ids': [1]},
+            {'action': 'status', 'value': 'Done', 'ids': [1]},
+            {'action': 'status', 'value': 'Completed', 'ids': ['one']},
+            {'action': 'status', 'value': 'Completed'},
+        ]:
+            with self.subTest(data=data):
+                self.assertEqual(self.client.post('/tasks/bulk/', data).status_code, 400)
+
+
+class PaginationTests(ReplicaTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        priority = Priority.objects.create(name='High')
+        category = Category.objects.create(name='Work')
+        start = timezone.now()
+        for n in range(5):
+            Task.objects.create(title=f'Task {n}', priority=priority, category=category,
+                                deadline=start + timedelta(days=n))
+
+    def test_invalid_cursor_starts_over(self):
+        queryset = Task.objects.order_by('deadline')
+        first = [task.pk for task in paginate_by_cursor(queryset, 2)]
+        for token in [
+            encode_cursor('deadline', None, {}),
+            encode_cursor('deadline', None, True),
+            encode_cursor('deadline', {}, 1),
+            encode_cursor('deadline', 'not a date', 1),
+            encode_cursor('deadline', [1], 1),
+            'not base64 json',
+        ]:
+            with self.subTest(token=token):
+                self.assertEqual([task.pk for task in paginate_by_cursor(queryset, 2, token)], first)
+
+    def test_crafted_cursor_in_request(self):
+        self.client.force_login(get_user_model().objects.create_user('reader', password='pw'))
+        token = encode_cursor('deadline', None, {})
+        response = self.client.get('/tasks/', {'sort_by': 'deadline', 'cursor': token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['tasks']), 5)
+
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        priority = Priority.objects.create(name='High')
+        category = Category.objects.create(name='Work')
+        for title in ['Report', 'report draft', 'École visit', 'Review']:
+            Task.objects.create(title=title, priority=priority, category=category)
+
+    def suggested(self, term):
+        return [row['text'] for row in suggest_tasks(term)[0]]
+
+    def test_prefix_ignores_ascii_case(self):
+        self.assertEqual(self.suggested('REP'), ['Report', 'report draft'])
+
+    def test_prefix_folds_like_the_index(self):
+        # SQLite's lower() leaves "É" alone, so the prefix must too
+        self.assertEqual(self.suggested('Éc'), ['École visit'])
+
+    def test_invalid_selected_value_is_ignored(self):
+        task = Task.objects.get(title='Review')
+        for value in ['not-a-pk', str(task.pk)]:
+            with self.subTest(value=value):
+                html = str(SubTaskForm(data={'task': value})['task'])
+                self.assertEqual('Review' in html, value == str(task.pk))
+
+
+class PriorityTests(TestCase):
+    def test_new_priority_ranked_last_unless_given(self):
+        Priority.objects.create(name='High', order=3)
+        self.assertEqual(Priority.objects.create(name='Low').order, 4)
+        # An explicit rank of 0 puts the priority first instead of last
+        self.assertEqual(Priority.objects.create(name='Critical', order=0).order, 0)
+
+
+class RouterTests(ReplicaTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.task = Task.objects.create(
+            title='Original', priority=Priority.objects.create(name='High'),
+            category=Category.objects.create(name='Work'),
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(get_user_model().objects.create_user('reader', password='pw'))
+
+    def titles(self):
+        return [task.title for task in self.client.get('/tasks/').context['tasks']]
+
+    def test_read_routing(self):
+        self.assertEqual(Task.objects.all().db, PRIMARY)
+        with replica_reads():
+            self.assertEqual(Task.objects.all().db, REPLICA)
+            self.assertEqual(router.db_for_write(Task), PRIMARY)
+
+        factory = RequestFactory()
+        pinned = factory.get('/tasks/')
+        pinned.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(read_database(factory.get('/tasks/')), REPLICA)
+        self.assertEqual(read_database(pinned), PRIMARY)
+        self.assertEqual(read_database(factory.post('/tasks/bulk/')), PRIMARY)
+
+    def test_write_pins_client(self):
+        response = self.client.post('/tasks/bulk/', {'action': 'status', 'value': 'Completed', 'ids': [self.task.pk]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], settings.REPLICA_MAX_LAG)
+        self.assertFalse(PIN_COOKIE in self.client.get('/tasks/').cookies)
+
+    def test_pinned_client_skips_pages_cached_from_replica(self):
+        self.assertEqual(self.titles(), ['Original'])
+        # A change the replica has not caught up with: no signal, no bump,
+        # so the page cached from the replica stays as it was
+        Task.objects.filter(pk=self.task.pk).update(title='Renamed')
+        self.assertEqual(self.titles(), ['Original'])
+
+        self.client.cookies[PIN_COOKIE] = '1'
+        self.assertEqual(self.titles(), ['Renamed'])
+
+
+class ExportTests(ReplicaTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        priority = Priority.objects.create(name='High')
+        category = Category.objects.create(name='Work')
+        for n in range(7):
+            task = Task.objects.create(title=f'Task {n}', priority=priority, category=category)
+            SubTask.objects.create(task=task, title='Step')
+        cls.user = get_user_model().objects.create_user('exporter', password='pw')
+
+    def test_export(self):
+        self.client.force_login(self.user)
+        response = self.client.get('/tasks/export/', {'format': 'jsonl'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(sorted(json.loads(line)['title'] for line in lines), [f'Task {n}' for n in range(7)])
+
+    async def test_async_export_is_streamed(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get('/tasks/export/', {'format': 'csv'})
+        # An async iterator is streamed as is; a sync one would be buffered
+        self.assertTrue(response.is_async)
+        batches = [batch async for batch in response.streaming_content]
+        lines = b''.join(batches).decode().splitlines()
+        self.assertEqual(len(lines), 8)
+        self.assertEqual(lines[0].split(',')[:3], ['id', 'external_id', 'title'])
+
+
+class JobTests(ReplicaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(get_user_model().objects.create_user('worker', password='pw'))
+
+    def test_job_invalidates_cached_list(self):
+        # Jobs run in run_worker's processes: only a cache shared with the
+        # web process lets their writes invalidate its pages
+        self.assertNotIsInstance(cache, LocMemCache)
+
+        priority = Priority.objects.create(name='High')
+        category = Category.objects.create(name='Work')
+        for n in range(3):
+            Task.objects.create(title=f'Task {n}', priority=priority, category=category)
+        self.assertEqual(len(self.client.get('/tasks/?status=Completed').context['tasks']), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            job = enqueue('bulk_tasks', action='status', filters={}, changes={'status': 'Completed'})
+            self.assertEqual(claim_job('test').pk, job.pk)
+            self.assertTrue(run_job(job.pk))
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.SUCCEEDED)
+        self.assertEqual(len(self.client.get('/tasks/?status=Completed').context['tasks']), 3)
+
+
+    def test_stale_sweep_skips_own_jobs(self):
+        job = enqueue('rebuild_stats')
+        claim_job('test')
+        long_ago = timezone.now() - timedelta(seconds=JOB_STALE_AFTER + 1)
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=long_ago)
+
+        self.assertEqual(requeue_stale_jobs(exclude=[job.pk]), 0)
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.QUEUED)
+
+    def test_success_not_recorded_after_losing_the_claim(self):
+        job = enqueue('rebuild_stats')
+        claim_job('slow')
+
+        def declared_stale(progress):
+            # Meanwhile another worker requeued the job and claimed it again
+            Job.objects.filter(pk=job.pk).update(status=Job.QUEUED)
+            claim_job('other')
+
+        with mock.patch.dict(JOBS, {'rebuild_stats': declared_stale}):
+            self.assertFalse(run_job(job.pk))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker, job.attempts), (Job.RUNNING, 'other', 2))
+
+    def test_import_not_retried(self):
+        job = enqueue('import_tasks', path='/nonexistent/tasks.jsonl')
+        self.assertEqual(job.max_attempts, 1)
+        claim_job('test')
+        self.assertFalse(run_job(job.pk))
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.FAILED)
+
+class CounterTests(CacheTestCase):
+    """The incrementally maintained rollup must match counting the tables"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.high = Priority.objects.create(name='High')
+        cls.critical = Priority.objects.create(name='Critical')
+        cls.category = Category.objects.create(name='Work')
+
+    def assertCountersMatch(self):
+        today = timezone.localdate()
+        self.assertEqual(get_dashboard_stats(today), compute_dashboard_stats(today))
+
+    def create_task(self, title, **fields):
+        return Task.objects.create(title=title, priority=self.high, category=self.category, **fields)
+
+    def test_counters_follow_writes(self):
+        now = timezone.now()
+        overdue = self.create_task('Overdue', deadline=now - timedelta(days=3))
+        upcoming = self.create_task('Upcoming', deadline=now + timedelta(days=1), status='In Progress')
+        plain = self.create_task('Plain')
+        SubTask.objects.create(task=overdue, title='Step', status='Completed')
+        Note.objects.create(task=upcoming, content='Call back')
+        self.assertCountersMatch()
+
+        overdue.status = 'Completed'
+        overdue.priority = self.critical
+        overdue.save()
+        self.assertCountersMatch()
+
+        plain.delete()
+        self.assertCountersMatch()
+
+        soft_delete_tasks(Task.objects.filter(pk=upcoming.pk))
+        self.assertCountersMatch()
+
+        self.create_task('Later', deadline=now + timedelta(days=10))
+        bulk_update_tasks(Task.objects.all(), status='Pending', priority_id=self.high.pk,
+                          deadline_shift=timedelta(days=-20))
+        self.assertCountersMatch()
+
+    def test_rebuild_corrects_drift(self):
+        self.create_task('One')
+        self.create_task('Two', status='Completed')
+        DashboardCounter.objects.filter(dimension='task_total').update(count=7)
+        DashboardCounter.objects.filter(dimension='task_status', key='Completed').delete()
+
+        drift = rebuild_counters()
+        self.assertEqual(drift[('task_total', 'all')], (7, 2))
+        self.assertEqual(drift[('task_status', 'Completed')], (0, 1))
+        self.assertCountersMatch()
+        self.assertEqual(rebuild_counters(dry_run=True), {})
+
+
+class ImportTests(CacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Priority.objects.create(name='High')
+        Category.objects.create(name='Work')
+
+    def import_records(self, records, **options):
+        stream = io.StringIO(''.join(json.dumps(record) + '\n' for record in records))
+        return TaskImporter(batch_size=2, **options).run(read_records(stream, 'jsonl'))
+
+    def test_import(self):
+        records = [
+            {'external_id': f'ext-{n}', 'title': f'Imported zeppelin {n}', 'priority': 'high',
+             'category': 'Work', 'status': 'Completed' if n % 2 else 'Pending',
+             'deadline': '2030-01-01T09:00:00+00:00',
+             'subtasks': [{'title': 'Step', 'status': 'Completed'}], 'notes': [{'content': 'Note'}]}
+            for n in range(5)
+        ]
+        records.append({'title': 'Broken', 'priority': 'Missing', 'category': 'Work'})
+        counts = self.import_records(records)
+
+        self.assertEqual(counts['errors'], 1)
+        self.assertEqual(Task.objects.count(), 5)
+        self.assertEqual(SubTask.objects.count(), 5)
+        self.assertEqual(Note.objects.count(), 5)
+        # Imported rows reach the full-text index and the dashboard counters
+        self.assertEqual(search_tasks(Task.objects.all(), 'zeppelin').count(), 5)
+        today = timezone.localdate()
+        self.assertEqual(get_dashboard_stats(today), compute_dashboard_stats(today))
+
+    def test_upsert_replaces_existing(self):
+        record = {'external_id': 'ext-1', 'title': 'First title', 'priority': 'High', 'category': 'Work'}
+        self.import_records([record])
+        self.assertEqual(self.import_records([record])['errors'], 1)
+
+        self.import_records([{**record, 'title': 'Second title', 'status': 'Completed'}], upsert=True)
+        task = Task.objects.get()
+        self.assertEqual((task.title, task.status), ('Second title', 'Completed'))
+        self.assertEqual(search_tasks(Task.objects.all(), 'second').count(), 1)
+        self.assertEqual(search_tasks(Task.objects.all(), 'first').count(), 0)
+        today = timezone.localdate()
+        self.assertEqual(get_dashboard_stats(today), compute_dashboard_stats(today))
+
+
+class ArchiveTests(CacheTestCase):
+    def test_archive_round_trip(self):
+        priority = Priority.objects.create(name='High')
+        category = Category.objects.create(name='Work')
+        tasks = {
+            (status, age): Task.objects.create(title=f'{status} {age}', status=status,
+                                               priority=priority, category=category)
+            for status, age in product(['Completed', 'Pending'], ['old', 'recent'])
+        }
+        old = tasks['Completed', 'old']
+        SubTask.objects.create(task=old, title='Step')
+        Note.objects.create(task=old, content='Done')
+        Task.objects.filter(title__endswith='old').update(updated_at=timezone.now() - timedelta(days=100))
+        token = changes_since()['cursor']
+
+        self.assertEqual(archive_tasks(), 1)
+
+        self.assertFalse(Task.objects.filter(pk=old.pk).exists())
+        self.assertEqual(ArchivedTask.objects.get().pk, old.pk)
+        self.assertEqual(ArchivedSubTask.objects.count(), 1)
+        self.assertEqual(ArchivedNote.objects.count(), 1)
+        self.assertEqual((SubTask.objects.count(), Note.objects.count()), (0, 0))
+
+        union = TaskArchiveUnion(Task.objects.all(), ArchivedTask.objects.all(), '-created_at')
+        self.assertEqual(len(union), 4)
+        self.assertEqual({task.pk for task in union[0:4]}, {task.pk for task in tasks.values()})
+        self.assertTrue(union[0:4][-1].is_archived)
+
+        # Sync clients drop their copy, and the dashboard no longer counts it
+        self.assertEqual(changes_since(token)['deleted']['tasks'], [old.pk])
+        today = timezone.localdate()
+        self.assertEqual(get_dashboard_stats(today), compute_dashboard_stats(today))
+
+
+class SoftDeleteTests(CacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.priority = Priority.objects.create(name='High')
+        cls.category = Category.objects.create(name='Work')
+
+    def create_task(self, title, category=None, **fields):
+        task = Task.objects.create(title=title, priority=self.priority, category=category or self.category, **fields)
+        SubTask.objects.create(task=task, title='Step')
+        Note.objects.create(task=task, content='Note')
+        return task
+
+    def test_soft_delete_hides_rows(self):
+        task = self.create_task('Imported', external_id='ext-1')
+        kept = self.create_task('Kept')
+        self.assertEqual(soft_delete_tasks(Task.objects.filter(pk=task.pk)),
+                         {'tasks': 1, 'subtasks': 1, 'notes': 1})
+
+        self.assertEqual(list(Task.objects.all()), [kept])
+        self.assertEqual(SubTask.objects.get().task, kept)
+        self.assertEqual(Note.objects.get().task, kept)
+        flagged = Task.all_objects.get(pk=task.pk)
+        self.assertIsNotNone(flagged.deleted_at)
+        # The import key is free for the next import
+        self.assertIsNone(flagged.external_id)
+        self.assertEqual(SubTask.all_objects.filter(deleted_at__isnull=False).count(), 1)
+
+    def test_soft_delete_lookup(self):
+        other = Category.objects.create(name='Home')
+        self.create_task('At home', category=other)
+        kept = self.create_task('At work')
+        soft_delete_lookup(other)
+        self.assertEqual(list(Category.objects.all()), [self.category])
+        self.assertEqual(list(Task.objects.all()), [kept])
+
+    def test_purge_in_batches(self):
+        for n in range(5):
+            self.create_task(f'Task {n}')
+        kept = self.create_task('Kept')
+        soft_delete_tasks(Task.objects.exclude(pk=kept.pk))
+
+        self.assertEqual(purge_deleted(before=timezone.now() - timedelta(days=1))['task'], 0)
+        with CaptureQueriesContext(connection) as queries:
+            counts = purge_deleted(batch_size=2)
+        self.assertEqual(counts, {'note': 5, 'subtask': 5, 'task': 5, 'category': 0, 'priority': 0})
+        task_deletes = [query for query in queries if query['sql'].startswith('DELETE FROM tasks_task ')]
+        self.assertEqual(len(task_deletes), 3)
+        self.assertEqual(list(Task.all_objects.all()), [kept])
+        self.assertEqual(SubTask.all_objects.count(), 1)
+
+    def test_purge_keeps_lookups_still_referenced(self):
+        used, unused = Category.objects.create(name='Used'), Category.objects.create(name='Unused')
+        task = self.create_task('Archived later', category=used, status='Completed')
+        Task.objects.filter(pk=task.pk).update(updated_at=timezone.now() - timedelta(days=100))
+        archive_tasks()
+        for category in (used, unused):
+            soft_delete_lookup(category)
+
+        self.assertEqual(purge_deleted()['category'], 1)
+        self.assertEqual(list(Category.all_objects.filter(deleted_at__isnull=False)), [used])
\ No newline at end of file
@@ -1,168 +1,223 @@
-from django.shortcuts import render
-from django.views.generic import ListView, CreateView, UpdateView, DeleteView, TemplateView
-from django.urls import reverse_lazy
-from .models import Task, Category, Priority, SubTask, Note
-from .forms import TaskForm, CategoryForm, PriorityForm, SubTaskForm, NoteForm
+import asyncio
+import json
+from datetime import datetime, time, timedelta
 
-# views.py
-from django.db.models import Count, Q
-from .models import Task  # Import your Task model
-from django.db.models import Q
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.handlers.asgi import ASGIRequest
+from django.core.paginator import Page
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+from django.http import HttpResponseRedirect, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.views.generic import ListView, CreateView, UpdateView, DeleteView, TemplateView, View
+from django.urls import reverse, reverse_lazy
+from .models import Task, Category, Priority, SubTask, Note, ArchivedTask, Job
+from .forms import TaskForm, CategoryForm, PriorityForm, SubTaskForm, NoteForm
+from .stats import get_dashboard_stats, task_counts_by
+from .cache import acached, bump_generation, cached
+from .pagination import CursorPaginationMixin
+from .filters import filter_tasks, sort_tasks
+from .export import EXPORT_FORMATS, astream_export, stream_export
+from .search import search_all, search_subtasks, search_notes
+from .lookups import lookup_table
+from .bulk import bulk_update_tasks, soft_delete_lookup, soft_delete_tasks
+from .archive import TaskArchiveUnion
+from .autocomplete import MAX_PAGE, suggest_lookup, suggest_tasks
+from .sync import SYNC_PAGE_SIZE, changes_since
+from .serviceworker import precache_manifest
+from .concurrency import gather_parts, run_parts, run_query
+from .jobs import enqueue
+from hangarin_project.routers import REPLICA, ReplicaReadMixin, read_database, replica_reads
+
+
+def selected_task(pk):
+    """The task picked in a list filter, for the autocomplete's initial option"""
+    if not str(pk).isdigit():
+        return None
+    return Task.objects.only('id', 'title').filter(pk=pk).first()
+
+
+class CachedListMixin:
+    """
+    Cache the current page of a ListView.
+
+    The page is keyed by the query string, the database it was read from and
+    the generation stamps of ``cache_models``, so saving or deleting any of
+    them invalidates it. A page read from the lagging replica is never
+    served to a client pinned to the primary.
+    """
+    cache_models = ()
+
+    def cached_for_query(self, name, builder):
+        return cached(
+            f'{self.__class__.__name__}:{name}',
+            self.cache_models,
+            builder,
+            sorted(self.request.GET.lists()),
+            read_database(self.request),
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        def build():
+            paginator, page, object_list, is_paginated = super(CachedListMixin, self).paginate_queryset(queryset, page_size)
+            return {
+                'count': paginator.count,
+                'number': page.number,
+                'object_list': list(object_list),
+            }
+
+        data = self.cached_for_query('page', build)
+        paginator = self.get_paginator(
+            queryset,
+            page_size,
+            orphans=self.get_paginate_orphans(),
+            allow_empty_first_page=self.get_allow_empty(),
+        )
+        paginator.count = data['count']
+        page = Page(data['object_list'], data['number'], paginator)
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class ConcurrentContextMixin:
+    """
+    Context values built by independent queries.
+
+    ``context_parts()`` maps a label to a callable returning a dict of
+    context values. The sync view runs them one after another; its async
+    variant (``AsyncViewMixin``) runs them concurrently with the page query.
+    """
+    defer_parts = False
+    
+    def context_parts(self):
+        return {}
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if not self.defer_parts:
+            context.update(run_parts(self.context_parts()))
+        return context
 
-# tasks/views.py
-from django.utils import timezone
-from django.contrib.auth.mixins import LoginRequiredMixin
-
+class AsyncViewMixin:
+    """
+    Async variant of a read-only view, served by the ASGI entry point (see
+    ``hangarin_project.urls_async``).
+
+    The view's own GET (the page query) and its ``context_parts()`` run
+    concurrently on the query pool, and the response is rendered there too,
+    so the event loop only ever awaits. Login and replica routing mirror
+    LoginRequiredMixin and ReplicaReadMixin, whose dispatch() touch the ORM
+    synchronously and cannot run on the event loop.
+    """
+    
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if isinstance(self, LoginRequiredMixin) and not request.user.is_authenticated:
+            return self.handle_no_permission()
+        with replica_reads(read_database(request) == REPLICA):
+            return await View.dispatch(self, request, *args, **kwargs)
+    
+    async def get(self, request, *args, **kwargs):
+        self.defer_parts = True
+        response, parts = await asyncio.gather(
+            run_query(super().get, request, *args, **kwargs),
+            gather_parts(self.context_parts()),
+        )
+        if hasattr(response, 'render'):
+            response.context_data.update(parts)
+            await run_query(response.render)
+        return response
+
+class SoftDeleteMixin:
+    """
+    Soft-delete the object of a DeleteView instead of cascading through
+    Django's collector, which loads every dependent task, subtask and note.
+    The rows are purged later by the ``purge_deleted`` command.
+    """
+    
+    def soft_delete(self, obj):
+        soft_delete_lookup(obj)
+    
+    def form_valid(self, form):
+        success_url = self.get_success_url()
+        self.soft_delete(self.object)
+        return HttpResponseRedirect(success_url)
 
-class HomePageView(LoginRequiredMixin, TemplateView):
+class HomePageView(ReplicaReadMixin, LoginRequiredMixin, ConcurrentContextMixin, TemplateView):
     template_name = "home.html"
+    cache_models = (Task, Category, Priority, SubTask, Note)
     
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        # Get current date for time-based queries
-        today = timezone.now().date()
-        current_month = today.month
-        current_year = today.year
-        
-        # Task Statistics
-        context['total_tasks'] = Task.objects.count()
-        context['completed_tasks'] = Task.objects.filter(status='Completed').count()
-        context['in_progress_tasks'] = Task.objects.filter(status='In Progress').count()
-        context['pending_tasks'] = Task.objects.filter(status='Pending').count()
-        
-        # Priority-based statistics
-        context['high_priority_tasks'] = Task.objects.filter(priority__name='High').count()
-        context['critical_tasks'] = Task.objects.filter(priority__name='Critical').count()
-        
-        # Time-based statistics
-        context['tasks_created_this_month'] = Task.objects.filter(
-            created_at__month=current_month,
-            created_at__year=current_year
-        ).count()
-        
-        context['tasks_due_this_week'] = Task.objects.filter(
-            deadline__week=today.isocalendar()[1],
-            deadline__year=current_year
-        ).count()
-        
-        # Overdue tasks
-        context['overdue_tasks'] = Task.objects.filter(
-            deadline__lt=today,
-            status__in=['Pending', 'In Progress']
-        ).count()
-        
-        # Category statistics
-        context['total_categories'] = Category.objects.count()
-        context['total_priorities'] = Priority.objects.count()
-        
-        # SubTask statistics
-        context['total_subtasks'] = SubTask.objects.count()
-        context['completed_subtasks'] = SubTask.objects.filter(status='Completed').count()
-        
-        # Note statistics
-        context['total_notes'] = Note.objects.count()
-        context['recent_notes'] = Note.objects.filter(
-            created_at__date=today
-        ).count()
-        
-        # Recent activities
-        context['recent_tasks'] = Task.objects.all().order_by('-created_at')[:5]
-        context['upcoming_deadlines'] = Task.objects.filter(
-            deadline__gte=today,
-            status__in=['Pending', 'In Progress']
-        ).order_by('deadline')[:5]
+    def dashboard_parts(self, today):
+        tasks = Task.objects.for_listing()
+        return {
+            # Dashboard counters come from the precomputed rollup
+            'counters': lambda: get_dashboard_stats(today),
+            # Recent activities
+            'recent': lambda: {'recent_tasks': list(tasks.order_by('-created_at')[:5])},
+            'upcoming': lambda: {'upcoming_deadlines': list(tasks.filter(
+                deadline__gte=timezone.make_aware(datetime.combine(today, time.min)),
+                status__in=['Pending', 'In Progress']
+            ).order_by('deadline')[:5])},
+        }
+    
+    def context_parts(self):
+        today = timezone.localdate()
+        return {'dashboard': lambda: cached(
+            'home', self.cache_models, lambda: run_parts(self.dashboard_parts(today)),
+            today, read_database(self.request),
+        )}
+
+class AsyncHomePageView(AsyncViewMixin, HomePageView):
+    
+    def context_parts(self):
+        today = timezone.localdate()
         
-        return context
+        async def dashboard():
+            return await acached(
+                'home', self.cache_models, lambda: gather_parts(self.dashboard_parts(today)),
+                today, read_database(self.request),
+            )
+        return {'dashboard': dashboard}
 
 # Task Views with enhanced context
-class TaskListView(ListView):
+class TaskListView(ReplicaReadMixin, CursorPaginationMixin, CachedListMixin, ConcurrentContextMixin, ListView):
     model = Task
     context_object_name = 'tasks'
     template_name = 'task_list.html'
     paginate_by = 10
+    cache_models = (Task, Category, Priority)
+    queryset = Task.objects.for_listing()
+
+    def include_archived(self):
+        return self.request.GET.get('archived') == '1'
+
+    def is_cursor_paginated(self):
+        # The archive union is paginated by page number only
+        return not self.include_archived() and super().is_cursor_paginated()
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        
-        # Get filter parameters
-        search_query = self.request.GET.get('q', '')
-        category_filter = self.request.GET.get('category', '')
-        priority_filter = self.request.GET.get('priority', '')
-        status_filter = self.request.GET.get('status', '')
-        sort_by = self.request.GET.get('sort_by', '-created_at')  # Fixed parameter name
-        
-        # Apply search filter
-        if search_query:
-            queryset = queryset.filter(
-                Q(title__icontains=search_query) | 
-                Q(description__icontains=search_query)
-            )
+        sort_by = self.request.GET.get('sort_by', '-created_at')
+        if self.include_archived():
+            hot = filter_tasks(Task.objects.all(), self.request.GET)
+            archived = filter_tasks(ArchivedTask.objects.all(), self.request.GET)
+            return TaskArchiveUnion(hot, archived, sort_tasks(hot, sort_by).query.order_by[0])
         
-        # Apply category filter - show ONLY tasks from selected category
-        if category_filter:
-            # Try to find category by name first, then by ID
-            try:
-                category = Category.objects.get(name=category_filter)
-                queryset = queryset.filter(category=category)
-            except (Category.DoesNotExist, ValueError):
-                # If category name not found or invalid, try filtering by ID
-                try:
-                    queryset = queryset.filter(category_id=category_filter)
-                except (ValueError, ValidationError):
-                    # If it's not a valid ID, return empty queryset
-                    queryset = queryset.none()
-        
-        # Apply priority filter - show ONLY tasks with selected priority
-        if priority_filter:
-            # Try to find priority by name first
-            try:
-                priority = Priority.objects.get(name=priority_filter)
-                queryset = queryset.filter(priority=priority)
-            except (Priority.DoesNotExist, ValueError):
-                # If priority name not found, try filtering by ID
-                try:
-                    queryset = queryset.filter(priority_id=priority_filter)
-                except (ValueError, ValidationError):
-                    # If it's not a valid ID, return empty queryset
-                    queryset = queryset.none()
-        
-        # Apply status filter - show ONLY tasks with selected status
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
-        
-        # Apply sorting
-        valid_sorts = [
-            'title', '-title', 
-            'status', '-status', 
-            'priority__name', '-priority__name',
-            'category__name', '-category__name',
-            'deadline', '-deadline', 
-            'created_at', '-created_at'
-        ]
-        if sort_by in valid_sorts:
-            queryset = queryset.order_by(sort_by)
-        else:
-            queryset = queryset.order_by('-created_at')
+        queryset = super().get_queryset()
         
-        return queryset
+        queryset = filter_tasks(queryset, self.request.GET)
+        return sort_tasks(queryset, sort_by)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
         # Get current filter values
+        context['include_archived'] = self.include_archived()
         context['current_search'] = self.request.GET.get('q', '')
         context['current_category'] = self.request.GET.get('category', '')
         context['current_priority'] = self.request.GET.get('priority', '')
         context['current_status'] = self.request.GET.get('status', '')
         context['current_sort'] = self.request.GET.get('sort_by', '-created_at')
         
-        # Add filter options to context
-        context['categories'] = Category.objects.all()
-        context['priorities'] = Priority.objects.all()
-        
         # Define status choices directly in the view
         context['status_choices'] = [
             ('Pending', 'Pending'),
@@ -170,17 +225,33 @@ class TaskListView(ListView):
             ('Completed', 'Completed')
         ]
         
-        # Add statistics for template
-        context['total_tasks'] = Task.objects.count()
-        context['total_filtered_tasks'] = self.get_queryset().count()
+        # Cursor pagination skips the COUNT(*) over the filtered rows
+        paginator = context['paginator']
+        context['total_filtered_tasks'] = paginator.count if paginator else None
         
         return context
+
+    def context_parts(self):
+        return {
+            # Filter options
+            'categories': lambda: {'categories': lookup_table(Category).rows},
+            'priorities': lambda: {'priorities': lookup_table(Priority).rows},
+            # Statistics for the header
+            'total': lambda: {'total_tasks': cached(
+                'task-total', (Task,), Task.objects.count, read_database(self.request),
+            )},
+        }
+
+class AsyncTaskListView(AsyncViewMixin, TaskListView):
+    pass
 # Apply similar pattern to other ListViews
-class SubTaskListView( ListView):
+class SubTaskListView(ReplicaReadMixin, CursorPaginationMixin, CachedListMixin, ConcurrentContextMixin, ListView):
     model = SubTask
     template_name = 'subtask_list.html'
     context_object_name = 'subtasks'
     paginate_by = 10
+    cache_models = (SubTask, Task)
+    queryset = SubTask.objects.select_related('task').defer('task__description')
     ordering = ["subtask__subtask_name","name"]
 
     def get_queryset(self):
@@ -189,11 +260,7 @@ class SubTaskListView( ListView):
         query = self.request.GET.get('q')
         
         if query:
-            qs = qs.filter(
-                Q(title__icontains=query) |
-                Q(task__title__icontains=query) |
-                Q(status__icontains=query)
-            )
+            qs = search_subtasks(qs, query)
         
         # Filter by status
         status_filter = self.request.GET.get('status')
@@ -236,7 +303,6 @@ class SubTaskListView( ListView):
         
         # Available options
         context['status_choices'] = SubTask.STATUS_CHOICES
-        context['tasks'] = Task.objects.all()
         
         # Sorting options
         context['sort_options'] = {
@@ -250,11 +316,20 @@ class SubTaskListView( ListView):
             '-task__title': 'Parent Task Z-A',
         }
         
-        # Statistics
-        context['total_subtasks'] = SubTask.objects.count()
-        context['completed_subtasks'] = SubTask.objects.filter(status='Completed').count()
-        
         return context
+
+    def context_parts(self):
+        return {
+            'selected_task': lambda: {'selected_task': selected_task(self.request.GET.get('task', ''))},
+            # Statistics
+            'totals': lambda: cached('subtask-totals', (SubTask,), lambda: SubTask.objects.aggregate(
+                total_subtasks=Count('id'),
+                completed_subtasks=Count('id', filter=Q(status='Completed')),
+            ), read_database(self.request)),
+        }
+
+class AsyncSubTaskListView(AsyncViewMixin, SubTaskListView):
+    pass
     
 class TaskCreateView(LoginRequiredMixin, CreateView):
     model = Task
@@ -268,13 +343,116 @@ class TaskUpdateView(LoginRequiredMixin, UpdateView):
     template_name = 'task_form.html'
     success_url = reverse_lazy('task-list')
 
-class TaskDeleteView(LoginRequiredMixin, DeleteView):
+class TaskDeleteView(LoginRequiredMixin, SoftDeleteMixin, DeleteView):
     model = Task
     template_name = 'task_del.html'
     success_url = reverse_lazy('task-list')
+    
+    def soft_delete(self, obj):
+        soft_delete_tasks(Task.objects.filter(pk=obj.pk))
+
+class TaskExportView(LoginRequiredMixin, View):
+    """
+    Stream the tasks matching the task list's filters and sort as CSV or
+    JSON Lines (``?format=jsonl``), with their subtasks and notes.
+
+    Reads from the replica when there is one. The rows are only fetched
+    while the response streams, after dispatch returned, so the queryset
+    carries the alias itself instead of relying on ``replica_reads()``.
+    Under ASGI the body is an async iterator (``astream_export``), which
+    Django streams as is instead of buffering it.
+    """
+    
+    def get(self, request, *args, **kwargs):
+        fmt = request.GET.get('format', 'csv')
+        if fmt not in EXPORT_FORMATS:
+            return JsonResponse({'error': f'unknown format {fmt!r}'}, status=400)
+        
+        tasks = filter_tasks(Task.objects.using(read_database(request)), request.GET)
+        tasks = sort_tasks(tasks, request.GET.get('sort_by', '-created_at'))
+        
+        stream = astream_export if isinstance(request, ASGIRequest) else stream_export
+        response = StreamingHttpResponse(stream(tasks, fmt), content_type=EXPORT_FORMATS[fmt])
+        filename = f'tasks-{timezone.localdate():%Y%m%d}.{fmt}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        # Ask proxies to pass the rows through instead of buffering the whole file
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+class TaskBulkActionView(LoginRequiredMixin, View):
+    """
+    Apply one action to many tasks with a single set-based statement.
+
+    POST ``action`` (status, category, priority, deadline or delete) and
+    ``value`` (the new status, category/priority name or id, or the deadline
+    shift in days), plus either repeated ``ids`` or ``scope=all`` together
+    with the task list's filter parameters. Ticked tasks are changed right
+    away and the affected row counts returned; ``scope=all`` can match any
+    number of tasks, so it is queued as a background job instead and the
+    response (202) carries the job and the URL to poll for its status.
+    No task is loaded into memory either way.
+    """
+    actions = ['status', 'category', 'priority', 'deadline', 'delete']
+    filters = ['q', 'status', 'priority', 'category']
+    
+    def post(self, request, *args, **kwargs):
+        action = request.POST.get('action')
+        value = request.POST.get('value', '')
+        if action not in self.actions:
+            return JsonResponse({'error': f'unknown action {action!r}'}, status=400)
+        
+        changes = {}
+        if action == 'status':
+            if value not in dict(Task.STATUS_CHOICES):
+                return JsonResponse({'error': f'unknown status {value!r}'}, status=400)
+            changes['status'] = value
+        elif action in ('category', 'priority'):
+            row = lookup_table(Category if action == 'category' else Priority).resolve(value)
+            if row is None:
+                return JsonResponse({'error': f'unknown {action} {value!r}'}, status=400)
+            changes[f'{action}_id'] = row.pk
+        else:
+            try:
+                changes['deadline_shift_days'] = int(value)
+            except ValueError:
+                return JsonResponse({'error': 'deadline shift must be a whole number of days'}, status=400)
+        
+        if request.POST.get('scope') == 'all':
+            filters = {name: request.POST.get(name, '') for name in self.filters}
+            job = enqueue('bulk_tasks', action=action, filters=filters, changes=changes)
+            return JsonResponse({
+                'action': action,
+                'job': job.as_dict(),
+                'status_url': reverse('job-status', args=[job.pk]),
+            }, status=202)
+        
+        try:
+            ids = [int(pk) for pk in request.POST.getlist('ids')]
+        except ValueError:
+            return JsonResponse({'error': 'ids must be integers'}, status=400)
+        if not ids:
+            return JsonResponse({'error': 'no tasks selected'}, status=400)
+        tasks = Task.objects.filter(pk__in=ids)
+        
+        if action == 'delete':
+            return JsonResponse({'action': action, 'affected': soft_delete_tasks(tasks)})
+        days = changes.pop('deadline_shift_days', None)
+        if days is not None:
+            changes['deadline_shift'] = timedelta(days=days)
+        return JsonResponse({'action': action, 'affected': {'tasks': bulk_update_tasks(tasks, **changes)}})
+
+
+class JobStatusView(LoginRequiredMixin, View):
+    """State and progress of a background job, polled by the UI until it finishes"""
+    
+    def get(self, request, pk, *args, **kwargs):
+        job = Job.objects.filter(pk=pk).first()
+        if job is None:
+            return JsonResponse({'error': 'job not found'}, status=404)
+        return JsonResponse(job.as_dict())
 
 # Category Views with enhanced context
-class CategoryListView( ListView):
+class CategoryListView(ReplicaReadMixin, ListView):
     model = Category
     template_name = 'category_list.html'
     context_object_name = 'categories'
@@ -316,15 +494,17 @@ class CategoryListView( ListView):
             '-name': 'Name Z-A',
         }
         
-        # Add task counts for each category
-        categories_with_counts = []
-        for category in self.get_queryset():
-            task_count = Task.objects.filter(category=category).count()
-            categories_with_counts.append({
+        # Add task counts for the categories on this page (one grouped query)
+        page = context['object_list']
+        counts = task_counts_by('category_id', [category.pk for category in page])
+        context['categories_with_counts'] = [
+            {
                 'category': category,
-                'task_count': task_count
-            })
-        context['categories_with_counts'] = categories_with_counts
+                'task_count': counts[category.pk]['total'],
+                'status_counts': counts[category.pk],
+            }
+            for category in page
+        ]
         
         return context
 class CategoryCreateView(CreateView):
@@ -339,18 +519,17 @@ class CategoryUpdateView(UpdateView):
     template_name = 'category_form.html'
     success_url = reverse_lazy('category-list')
 
-class CategoryDeleteView(DeleteView):
+class CategoryDeleteView(SoftDeleteMixin, DeleteView):
     model = Category
     template_name = 'category_del.html'
     success_url = reverse_lazy('category-list')
 
 # Priority Views with enhanced context
-class PriorityListView( ListView):
+class PriorityListView(ReplicaReadMixin, ListView):
     model = Priority
     template_name = 'priority_list.html'
     context_object_name = 'priorities'
     paginate_by = 10
-    ordering = ["priority__priority_name","name"]
 
     def get_queryset(self):
         """Customize records returned with search"""
@@ -364,36 +543,12 @@ class PriorityListView( ListView):
 
     def get_ordering(self):
         """Dynamic sorting control for priorities"""
-        # Custom ordering for priority levels
         sort_by = self.request.GET.get('sort_by', 'custom')
         
-        if sort_by == 'custom':
-            # Custom ordering: Critical, High, Medium, Low, Optional
-            priority_order = {'Critical': 1, 'High': 2, 'Medium': 3, 'Low': 4, 'Optional': 5}
-            return ['name']  # We'll handle custom ordering in get_queryset
-        elif sort_by in ['name', '-name']:
+        if sort_by in ['name', '-name']:
             return sort_by
-        else:
-            return 'name'
-
-    def get_queryset(self):
-        """Override to handle custom priority ordering"""
-        qs = super().get_queryset()
-        query = self.request.GET.get('q')
-        
-        if query:
-            qs = qs.filter(name__icontains=query)
-        
-        # Handle custom ordering for priorities
-        sort_by = self.request.GET.get('sort_by', 'custom')
-        if sort_by == 'custom':
-            priority_order = {'Critical': 1, 'High': 2, 'Medium': 3, 'Low': 4, 'Optional': 5}
-            # Convert to list and sort by custom order
-            priorities_list = list(qs)
-            priorities_list.sort(key=lambda x: priority_order.get(x.name, 6))
-            return priorities_list
-        
-        return qs
+        # Custom ordering comes from the rank stored in Priority.order
+        return ['order', 'name']
 
     def get_context_data(self, **kwargs):
         """Add extra template variables"""
@@ -404,19 +559,22 @@ class PriorityListView( ListView):
         
         # Sorting options
         context['sort_options'] = {
+            'custom': 'Priority Rank',
             'name': 'Name A-Z',
             '-name': 'Name Z-A',
         }
         
-        # Add task counts for each priority
-        priorities_with_counts = []
-        for priority in self.get_queryset():
-            task_count = Task.objects.filter(priority=priority).count()
-            priorities_with_counts.append({
+        # Add task counts for the priorities on this page (one grouped query)
+        page = context['object_list']
+        counts = task_counts_by('priority_id', [priority.pk for priority in page])
+        context['priorities_with_counts'] = [
+            {
                 'priority': priority,
-                'task_count': task_count
-            })
-        context['priorities_with_counts'] = priorities_with_counts
+                'task_count': counts[priority.pk]['total'],
+                'status_counts': counts[priority.pk],
+            }
+            for priority in page
+        ]
         
         return context
     
@@ -432,11 +590,44 @@ class PriorityUpdateView(UpdateView):
     template_name = 'priority_form.html'
     success_url = reverse_lazy('priority-list')
 
-class PriorityDeleteView(DeleteView):
+class PriorityDeleteView(SoftDeleteMixin, DeleteView):
     model = Priority
     template_name = 'priority_del.html'
     success_url = reverse_lazy('priority-list')
 
+class PriorityReorderView(View):
+    """
+    Persist a drag-and-drop reorder of priorities.
+
+    Expects the moved priority ids, in their new order, as repeated ``ids``
+    POST values. The ids keep the rank slots they occupied before the move,
+    and the whole table is renumbered 1..n in a single UPDATE.
+    """
+    
+    def post(self, request, *args, **kwargs):
+        try:
+            moved = [int(pk) for pk in request.POST.getlist('ids')]
+        except ValueError:
+            return JsonResponse({'error': 'ids must be integers'}, status=400)
+        
+        with transaction.atomic():
+            ranked = list(Priority.objects.order_by('order', 'name').values_list('id', flat=True))
+            if sorted(moved) != sorted(set(moved) & set(ranked)):
+                return JsonResponse({'error': 'unknown or duplicate priority ids'}, status=400)
+            
+            slots = [index for index, pk in enumerate(ranked) if pk in set(moved)]
+            for slot, pk in zip(slots, moved):
+                ranked[slot] = pk
+            
+            updated = Priority.objects.filter(id__in=ranked).update(order=Case(
+                *[When(id=pk, then=Value(rank)) for rank, pk in enumerate(ranked, start=1)],
+                output_field=IntegerField(),
+            ))
+        
+        # update() skips the save signals, so invalidate the caches by hand
+        bump_generation(Priority)
+        return JsonResponse({'updated': updated, 'order': ranked})
+
 # SubTask Views with enhanced context
 
 class SubTaskCreateView(CreateView):
@@ -457,11 +648,13 @@ class SubTaskDeleteView(DeleteView):
     success_url = reverse_lazy('subtask-list')
 
 # Note Views with enhanced context
-class NoteListView(ListView):
+class NoteListView(ReplicaReadMixin, CursorPaginationMixin, CachedListMixin, ConcurrentContextMixin, ListView):
     model = Note
     context_object_name = 'notes'
     template_name = 'note_list.html'
     paginate_by = 10
+    cache_models = (Note, Task)
+    queryset = Note.objects.select_related('task').defer('task__description')
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -470,12 +663,9 @@ class NoteListView(ListView):
         search_query = self.request.GET.get('q', '')
         task_filter = self.request.GET.get('task', '')
         
-        # Apply search filter
+        # Apply search filter (full-text index)
         if search_query:
-            queryset = queryset.filter(
-                Q(content__icontains=search_query) |
-                Q(task__title__icontains=search_query)
-            )
+            queryset = search_notes(queryset, search_query)
         
         # Apply task filter
         if task_filter:
@@ -483,21 +673,42 @@ class NoteListView(ListView):
             
         return queryset
 
+    def get_ordering(self):
+        """Dynamic sorting control for notes"""
+        allowed_sort_fields = [
+            'task__title', '-task__title',
+            'created_at', '-created_at',
+            'updated_at', '-updated_at',
+        ]
+        
+        sort_by = self.request.GET.get('sort_by', '-created_at')
+        if sort_by in allowed_sort_fields:
+            return sort_by
+        return '-created_at'
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
         # Get current filter values
         context['current_search'] = self.request.GET.get('q', '')
         context['current_task'] = self.request.GET.get('task', '')
-        
-        # Add all tasks for the filter dropdown
-        context['tasks_list'] = Task.objects.all().order_by('title')
-        
-        # Statistics
-        context['note_count'] = Note.objects.count()
+        context['current_sort'] = self.request.GET.get('sort_by', '-created_at')
         
         return context
 
+    def context_parts(self):
+        return {
+            # Only the selected task is rendered, the rest come from the autocomplete
+            'selected_task': lambda: {'selected_task': selected_task(self.request.GET.get('task', ''))},
+            # Statistics
+            'total': lambda: {'note_count': cached(
+                'note-total', (Note,), Note.objects.count, read_database(self.request),
+            )},
+        }
+
+class AsyncNoteListView(AsyncViewMixin, NoteListView):
+    pass
+
 class NoteCreateView(CreateView):
     model = Note
     form_class = NoteForm
@@ -513,4 +724,78 @@ class NoteUpdateView(UpdateView):
 class NoteDeleteView(DeleteView):
     model = Note
     template_name = 'note_del.html'
-    success_url = reverse_lazy('note-list')
\ No newline at end of file
+    success_url = reverse_lazy('note-list')
+
+
+class SearchView(View):
+    """Unified search over tasks, subtasks and notes, ranked and highlighted"""
+    max_limit = 100
+
+    def get(self, request, *args, **kwargs):
+        query = request.GET.get('q', '').strip()
+        try:
+            limit = min(int(request.GET.get('limit', 20)), self.max_limit)
+        except ValueError:
+            limit = 20
+        results = search_all(query, limit=max(limit, 1)) if query else []
+        return JsonResponse({'query': query, 'results': results})
+
+
+class AutocompleteView(View):
+    """
+    Paged suggestions for the autocomplete widgets, as
+    ``{"results": [{"id", "text"}], "pagination": {"more"}}``.
+    """
+    sources = {
+        'tasks': suggest_tasks,
+        'categories': lambda term, page: suggest_lookup(Category, term, page),
+        'priorities': lambda term, page: suggest_lookup(Priority, term, page),
+    }
+
+    def get(self, request, kind, *args, **kwargs):
+        source = self.sources.get(kind)
+        if source is None:
+            return JsonResponse({'error': f'unknown source {kind!r}'}, status=404)
+        try:
+            page = min(max(int(request.GET.get('page', 1)), 1), MAX_PAGE)
+        except ValueError:
+            page = 1
+        results, more = source(request.GET.get('q', ''), page)
+        return JsonResponse({'results': results, 'pagination': {'more': more and page < MAX_PAGE}})
+
+
+class SyncView(View):
+    """
+    Delta feed for offline clients: rows changed and deleted since ``since``.
+
+    Clients store the returned ``cursor`` and pass it back as ``since``,
+    calling again straight away while ``has_more`` is true. A ``reset``
+    response means the local copy must be discarded first.
+    """
+    max_limit = SYNC_PAGE_SIZE
+
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = min(int(request.GET.get('limit', self.max_limit)), self.max_limit)
+        except ValueError:
+            limit = self.max_limit
+        return JsonResponse(changes_since(request.GET.get('since') or None, limit=max(limit, 1)))
+
+
+class ServiceWorkerView(TemplateView):
+    """The service worker script, rendered with the current precache manifest"""
+    template_name = 'serviceworker.js'
+    content_type = 'application/javascript'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        version, urls = precache_manifest()
+        context.update(version=version, precache=json.dumps(urls), static_url=settings.STATIC_URL)
+        return context
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        # Browsers must check for a new worker (and so a new cache version)
+        # on every visit
+        response['Cache-Control'] = 'no-cache'
+        return response
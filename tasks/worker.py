@@ -0,0 +1,18 @@
+"""
+Entry points of the ``run_worker`` pool processes.
+
+The pool starts its processes with "spawn": a forked child would inherit
+the parent's open SQLite connection, which must never be used by two
+processes. Spawned children import this module before Django is set up,
+so nothing here may import models at module level.
+"""
+import django
+
+
+def init_process():
+    django.setup()
+
+
+def execute(pk):
+    from .jobs import run_job
+    return run_job(pk)
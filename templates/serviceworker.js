@@ -0,0 +1,91 @@
+// Rendered by tasks.views.ServiceWorkerView; the version and the precache
+// list come from the collectstatic manifest (tasks.serviceworker).
+var VERSION = '{{ version }}';
+var STATIC_CACHE = 'hangarin-static-' + VERSION;
+var PAGE_CACHE = 'hangarin-pages-' + VERSION;
+var PRECACHE = {{ precache|safe }};
+var STATIC_URL = '{{ static_url }}';
+
+// Same-origin GET routes answered from the cache while a fresh copy is fetched
+var REVALIDATE = [/^\/search\//, /^\/autocomplete\//];
+// Never cached: feeds with their own cursors, downloads, auth and admin
+var NETWORK_ONLY = [/^\/api\//, /^\/tasks\/export\//, /^\/accounts\//, /^\/admin\//];
+
+// Content-hashed names (style.1a2b3c4d5e6f.css) never change their content
+var HASHED = /\.[0-9a-f]{12}\.[^\/.]+$/;
+
+self.addEventListener('install', function (e) {
+    e.waitUntil(
+        caches.open(STATIC_CACHE)
+            .then(function (cache) { return cache.addAll(PRECACHE); })
+            .then(function () { return self.skipWaiting(); })
+    );
+});
+
+self.addEventListener('activate', function (e) {
+    e.waitUntil(
+        caches.keys()
+            .then(function (names) {
+                return Promise.all(names.filter(function (name) {
+                    return name !== STATIC_CACHE && name !== PAGE_CACHE;
+                }).map(function (name) { return caches.delete(name); }));
+            })
+            .then(function () { return self.clients.claim(); })
+    );
+});
+
+function matches(patterns, path) {
+    return patterns.some(function (pattern) { return pattern.test(path); });
+}
+
+function store(cacheName, request, response) {
+    // Redirects (e.g. to the login page) and errors are not worth keeping
+    if (response.ok && response.type === 'basic') {
+        var copy = response.clone();
+        caches.open(cacheName).then(function (cache) { cache.put(request, copy); });
+    }
+    return response;
+}
+
+function cacheFirst(request) {
+    return caches.match(request).then(function (cached) {
+        return cached || fetch(request).then(function (response) {
+            return store(STATIC_CACHE, request, response);
+        });
+    });
+}
+
+function staleWhileRevalidate(cacheName, request) {
+    return caches.match(request).then(function (cached) {
+        var network = fetch(request).then(function (response) {
+            return store(cacheName, request, response);
+        });
+        if (cached) {
+            network.catch(function () {});
+            return cached;
+        }
+        return network;
+    });
+}
+
+self.addEventListener('fetch', function (e) {
+    var request = e.request;
+    var url = new URL(request.url);
+    if (url.origin !== self.location.origin) {
+        return;
+    }
+    if (request.method !== 'GET' || url.pathname.indexOf('/accounts/logout') === 0) {
+        // A write makes the cached pages stale, and after a logout they
+        // belong to the user who left; the next visits go to the network
+        caches.delete(PAGE_CACHE);
+        return;
+    }
+    if (matches(NETWORK_ONLY, url.pathname)) {
+        return;
+    }
+    if (url.pathname.indexOf(STATIC_URL) === 0) {
+        e.respondWith(HASHED.test(url.pathname) ? cacheFirst(request) : staleWhileRevalidate(STATIC_CACHE, request));
+    } else if (request.mode === 'navigate' || matches(REVALIDATE, url.pathname)) {
+        e.respondWith(staleWhileRevalidate(PAGE_CACHE, request));
+    }
+});